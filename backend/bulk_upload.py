@@ -0,0 +1,129 @@
+"""
+Bulk upload helpers
+Expands a multi-file upload - plain files plus zip / tar(.gz/.bz2/.xz)
+archives - into members read one at a time, with limits on member count and
+uncompressed size, and maps a function over them in parallel with a bounded
+window so a large dump is never held in memory at once.
+"""
+
+import contextvars
+import logging
+import os
+import tarfile
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+ARCHIVE_SUFFIXES = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+
+
+class BulkUploadError(ValueError):
+    """The upload cannot be processed (unreadable archive)"""
+
+
+class UploadLimitError(BulkUploadError):
+    """The upload has more members or more uncompressed bytes than allowed"""
+
+
+def is_archive(filename):
+    return filename.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def _skip_member(name):
+    # Directories and OS metadata (macOS resource forks, Windows thumbnails, dotfiles)
+    base = os.path.basename(name.rstrip('/'))
+    return not base or base.startswith('.') or '__MACOSX/' in name or base.lower() in ('thumbs.db', 'desktop.ini')
+
+
+def _zip_members(stream):
+    with zipfile.ZipFile(stream) as archive:
+        for info in archive.infolist():
+            if info.is_dir() or _skip_member(info.filename):
+                continue
+            yield info.filename, info.file_size, lambda info=info: archive.read(info)
+
+
+def _tar_members(stream):
+    with tarfile.open(fileobj=stream, mode='r:*') as archive:
+        for info in archive:
+            if not info.isfile() or _skip_member(info.name):
+                continue
+            yield info.name, info.size, lambda info=info: archive.extractfile(info).read()
+
+
+def _members(filename, stream):
+    if not is_archive(filename):
+        stream.seek(0, os.SEEK_END)
+        size = stream.tell()
+        stream.seek(0)
+        return [(filename, size, stream.read)]
+    return _zip_members(stream) if filename.lower().endswith('.zip') else _tar_members(stream)
+
+
+def check_limits(uploads, max_files=5000, max_bytes=1024 ** 3):
+    """
+    Count members and uncompressed bytes from file and archive headers without extracting
+    anything, so an oversized or unreadable upload is rejected before any of it is ingested.
+    Returns (files, bytes) and rewinds every stream; raises UploadLimitError / BulkUploadError.
+    """
+    count, total = 0, 0
+    for filename, stream in uploads:
+        try:
+            for _, size, _ in _members(filename, stream):
+                count += 1
+                total += size
+                if count > max_files:
+                    raise UploadLimitError(f"Upload has more than {max_files} files")
+                if total > max_bytes:
+                    raise UploadLimitError(f"Upload is larger than {max_bytes} bytes uncompressed")
+        except (zipfile.BadZipFile, tarfile.TarError, EOFError, OSError) as e:
+            raise BulkUploadError(f"Unreadable archive {filename}: {e}")
+        stream.seek(0)
+    return count, total
+
+
+def iter_members(uploads, max_files=5000, max_bytes=1024 ** 3):
+    """
+    Yields (filename, archive name or None, bytes) for every file in uploads, a list of
+    (filename, seekable binary stream). Archive members are named by their path inside the
+    archive. Enforces the same limits as check_limits as it reads.
+    """
+    count, total = 0, 0
+    for filename, stream in uploads:
+        archive_name = filename if is_archive(filename) else None
+        for name, size, read in _members(filename, stream):
+            count += 1
+            if count > max_files:
+                raise UploadLimitError(f"Upload has more than {max_files} files")
+            # Sizes from headers are checked before reading, so a zip bomb is never inflated
+            if total + size > max_bytes:
+                raise UploadLimitError(f"Upload is larger than {max_bytes} bytes uncompressed")
+            data = read()
+            total += len(data)
+            if total > max_bytes:
+                raise UploadLimitError(f"Upload is larger than {max_bytes} bytes uncompressed")
+            yield name, archive_name, data
+
+
+def parallel_map(func, items, workers=4, window=None):
+    """
+    Like map(func, items) but runs up to `workers` calls at once, keeping at most `window`
+    (default 2 x workers) items in flight; results come back in input order. Calls run in
+    the caller's context so their spans land in the request trace.
+    """
+    workers = max(1, workers)
+    window = max(workers, window or 2 * workers)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bulk-extract') as executor:
+        pending = deque()
+        try:
+            for item in items:
+                pending.append(executor.submit(contextvars.copy_context().run, func, item))
+                if len(pending) >= window:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+            if pending:
+                logging.info(f"Bulk upload stopped with {len(pending)} members still queued")
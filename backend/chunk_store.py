@@ -0,0 +1,130 @@
+"""
+Local compressed chunk store
+Keeps chunk text out of Pinecone metadata - rows are keyed by vector ID and
+compressed with zstd (zlib when zstandard is not installed). zstandard
+(de)compressor objects are not thread-safe, so each thread gets its own.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# SQLite's default limit on bound parameters per statement
+MAX_SQL_PARAMS = 900
+
+
+class ChunkStore:
+    """SQLite-backed id -> compressed text store with batched reads"""
+
+    def __init__(self, path, level=3):
+        self.path = path
+        self.level = level
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS chunks (
+                id TEXT PRIMARY KEY,
+                codec TEXT NOT NULL,
+                data BLOB NOT NULL,
+                index_name TEXT NOT NULL DEFAULT ''
+            )
+        """)
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(chunks)")]
+        if 'index_name' not in columns:
+            # Stores written before rows were tagged with their index
+            self._conn.execute("ALTER TABLE chunks ADD COLUMN index_name TEXT NOT NULL DEFAULT ''")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS chunks_index_name ON chunks (index_name)")
+        self._conn.commit()
+        self.codec = 'zstd' if zstandard else 'zlib'
+        self._local = threading.local()
+
+    def _zstd(self):
+        local = self._local
+        if not hasattr(local, 'compressor'):
+            local.compressor = zstandard.ZstdCompressor(level=self.level)
+            local.decompressor = zstandard.ZstdDecompressor()
+        return local
+
+    def _compress(self, text):
+        raw = text.encode('utf-8')
+        if self.codec == 'zstd':
+            return self._zstd().compressor.compress(raw)
+        return zlib.compress(raw, min(self.level * 2, 9))
+
+    def _decompress(self, codec, data):
+        if codec == 'zstd':
+            if not zstandard:
+                raise RuntimeError("Chunk stored with zstd but zstandard is not installed")
+            return self._zstd().decompressor.decompress(data).decode('utf-8')
+        return zlib.decompress(data).decode('utf-8')
+
+    def put_many(self, items, index_name=''):
+        """Store (vector_id, text) pairs for an index, replacing existing rows"""
+        rows = [(vector_id, self.codec, self._compress(text), index_name) for vector_id, text in items]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunks (id, codec, data, index_name) VALUES (?, ?, ?, ?)", rows
+            )
+            self._conn.commit()
+
+    def get_many(self, ids):
+        """Return {vector_id: text} for every stored id in one batched lookup"""
+        ids = list(dict.fromkeys(ids))
+        found = {}
+        with self._lock:
+            for start in range(0, len(ids), MAX_SQL_PARAMS):
+                batch = ids[start:start + MAX_SQL_PARAMS]
+                placeholders = ','.join('?' for _ in batch)
+                rows = self._conn.execute(
+                    f"SELECT id, codec, data FROM chunks WHERE id IN ({placeholders})", batch
+                ).fetchall()
+                for vector_id, codec, data in rows:
+                    found[vector_id] = (codec, data)
+        texts = {}
+        for vector_id, (codec, data) in found.items():
+            try:
+                texts[vector_id] = self._decompress(codec, data)
+            except Exception as e:
+                logging.warning(f"Unable to decode stored chunk {vector_id}: {e}")
+        return texts
+
+    def delete_many(self, ids):
+        ids = list(ids)
+        with self._lock:
+            for start in range(0, len(ids), MAX_SQL_PARAMS):
+                batch = ids[start:start + MAX_SQL_PARAMS]
+                placeholders = ','.join('?' for _ in batch)
+                self._conn.execute(f"DELETE FROM chunks WHERE id IN ({placeholders})", batch)
+            self._conn.commit()
+
+    def delete_index(self, index_name):
+        """Drop every chunk stored for a deleted index; returns the row count"""
+        with self._lock:
+            deleted = self._conn.execute("DELETE FROM chunks WHERE index_name = ?", (index_name,)).rowcount
+            self._conn.commit()
+        return deleted
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_chunk_store(path):
+    """Process-wide chunk store (lazily opened)"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            logging.info(f"Opening chunk store at {path} ({'zstd' if zstandard else 'zlib'})")
+            _store = ChunkStore(path)
+    return _store
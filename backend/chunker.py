@@ -0,0 +1,262 @@
+"""
+Sentence-aware text chunker
+Produces the same chunks as LlamaIndex's SentenceSplitter: split by paragraph,
+then by sentence (punkt), then by phrase regex, then by word, then by character,
+and greedily merge the splits with a token overlap. It does this without
+building a Document, nodes and a new splitter per call. A chunker is built once
+per (chunk_size, overlap) and reused. Chunks carry character offsets and can be
+produced incrementally from a stream of text pieces.
+"""
+
+import importlib.util
+import os
+import re
+import threading
+
+CHUNKING_REGEX = "[^,.;。？！]+[,.;。？！]?|[,.;。？！]"
+DEFAULT_PARAGRAPH_SEP = "\n\n\n"
+TOKENIZER_MODEL = 'gpt-3.5-turbo'  # LlamaIndex's default tokenizer (cl100k_base)
+
+_tokenizer_lock = threading.Lock()
+_encoding = None
+
+
+def get_encoding():
+    """tiktoken encoding used for chunk sizes, loaded from LlamaIndex's bundled cache when available"""
+    global _encoding
+    if _encoding is None:
+        with _tokenizer_lock:
+            if _encoding is None:
+                import tiktoken
+                spec = importlib.util.find_spec('llama_index.core')
+                if 'TIKTOKEN_CACHE_DIR' not in os.environ and spec and spec.submodule_search_locations:
+                    cache_dir = os.path.join(spec.submodule_search_locations[0], '_static', 'tiktoken_cache')
+                    os.environ['TIKTOKEN_CACHE_DIR'] = cache_dir
+                    try:
+                        _encoding = tiktoken.encoding_for_model(TOKENIZER_MODEL)
+                    finally:
+                        del os.environ['TIKTOKEN_CACHE_DIR']
+                else:
+                    _encoding = tiktoken.encoding_for_model(TOKENIZER_MODEL)
+    return _encoding
+
+
+class _Split:
+    __slots__ = ('text', 'start', 'is_sentence', 'tokens')
+
+    def __init__(self, text, start, is_sentence, tokens):
+        self.text = text
+        self.start = start
+        self.is_sentence = is_sentence
+        self.tokens = tokens
+
+
+class _Merger:
+    """Greedy split merger with token overlap (SentenceSplitter._merge, one split at a time)"""
+
+    def __init__(self, chunk_size, chunk_overlap):
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.current = []
+        self.current_tokens = 0
+        self.new_chunk = True
+
+    def _close(self):
+        closed = self.current
+        self.current, self.current_tokens, self.new_chunk = [], 0, True
+        # Seed the next chunk with trailing splits of this one, up to chunk_overlap tokens
+        index = len(closed) - 1
+        while index >= 0 and self.current_tokens + closed[index].tokens <= self.chunk_overlap:
+            self.current_tokens += closed[index].tokens
+            self.current.insert(0, closed[index])
+            index -= 1
+        return closed
+
+    def add(self, split):
+        """Add one split; returns the list of splits for a chunk this closed, or None"""
+        closed = None
+        if self.current_tokens + split.tokens > self.chunk_size and not self.new_chunk:
+            closed = self._close()
+        self.current.append(split)
+        self.current_tokens += split.tokens
+        self.new_chunk = False
+        return closed
+
+    def finish(self):
+        return None if self.new_chunk else self.current
+
+
+class SentenceChunker:
+    """Reusable, thread-safe chunker; sizes are in tokens like SentenceSplitter"""
+
+    def __init__(self, chunk_size=1000, chunk_overlap=200, separator=' ',
+                 paragraph_separator=DEFAULT_PARAGRAPH_SEP, secondary_chunking_regex=CHUNKING_REGEX):
+        if chunk_overlap > chunk_size:
+            raise ValueError(f"Chunk overlap ({chunk_overlap}) must not exceed chunk size ({chunk_size})")
+        from nltk.tokenize import PunktSentenceTokenizer
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separator = separator
+        self.paragraph_separator = paragraph_separator
+        self._secondary = re.compile(secondary_chunking_regex) if secondary_chunking_regex else None
+        self._sentences = PunktSentenceTokenizer()
+        self._encoding = get_encoding()
+
+    # -- token counting -------------------------------------------------------
+
+    def _count(self, text):
+        # encode_ordinary is faster; special-token text ('<|endoftext|>') must count as one token like LlamaIndex
+        if '<|' in text:
+            return len(self._encoding.encode(text, allowed_special='all'))
+        return len(self._encoding.encode_ordinary(text))
+
+    # -- splitting -----------------------------------------------------------
+
+    @staticmethod
+    def _split_keep_separator(text, separator):
+        """[(piece, offset)] like split_text_keep_separator: separator kept at the start of each piece"""
+        pieces, offset = [], 0
+        for index, part in enumerate(text.split(separator)):
+            piece = separator + part if index > 0 else part
+            if piece:
+                pieces.append((piece, offset))
+            offset += len(piece)
+        return pieces
+
+    def _sentence_pieces(self, text):
+        # Each sentence runs to the start of the next one; text before the first span is dropped
+        spans = list(self._sentences.span_tokenize(text))
+        return [
+            (text[start:spans[index + 1][0] if index + 1 < len(spans) else len(text)], start)
+            for index, (start, _) in enumerate(spans)
+        ]
+
+    def _pieces(self, text):
+        """Returns ([(piece, offset)], is_sentence) using the first split function that divides text"""
+        for split_fn in (lambda t: self._split_keep_separator(t, self.paragraph_separator), self._sentence_pieces):
+            pieces = split_fn(text)
+            if len(pieces) > 1:
+                return pieces, True
+        sub_sentence_fns = [lambda t: self._split_keep_separator(t, self.separator), self._split_chars]
+        if self._secondary is not None:
+            sub_sentence_fns.insert(0, self._split_regex)
+        for split_fn in sub_sentence_fns:
+            pieces = split_fn(text)
+            if len(pieces) > 1:
+                break
+        return pieces, False
+
+    def _split_regex(self, text):
+        return [(match.group(), match.start()) for match in self._secondary.finditer(text)]
+
+    @staticmethod
+    def _split_chars(text):
+        return [(char, offset) for offset, char in enumerate(text)]
+
+    def _split(self, text, start, tokens, out):
+        """Append splits no larger than chunk_size for text (known to be `tokens` long) to out"""
+        if tokens <= self.chunk_size:
+            out.append(_Split(text, start, True, tokens))
+            return
+        pieces, is_sentence = self._pieces(text)
+        for (piece, offset), piece_tokens in zip(pieces, map(self._count, [piece for piece, _ in pieces])):
+            if piece_tokens <= self.chunk_size:
+                out.append(_Split(piece, start + offset, is_sentence, piece_tokens))
+            else:
+                self._split(piece, start + offset, piece_tokens, out)
+
+    # -- output ----------------------------------------------------------------
+
+    @staticmethod
+    def _chunk(splits):
+        raw = ''.join(split.text for split in splits)
+        text = raw.strip()
+        if not text:
+            return None
+        start = splits[0].start + (len(raw) - len(raw.lstrip()))
+        return {'text': text, 'start_position': start, 'end_position': start + len(text)}
+
+    def iter_chunks(self, pieces):
+        """
+        Yield chunk dicts (text, start_position, end_position, chunk_index) from an
+        iterable of text pieces, producing the same chunks as chunking the joined text.
+        """
+        merger = _Merger(self.chunk_size, self.chunk_overlap)
+        separator = self.paragraph_separator
+        buffer, buffer_start = '', 0
+        streaming = False  # True once the text is known to exceed chunk_size
+        next_check = self.chunk_size  # buffer size (bytes) at which to count tokens again
+        counted = None  # (offset, length, tokens) of the last whole-buffer count, reused if it is one paragraph
+        scanned = 0  # buffer position already searched for a separator
+        chunk_index = 0
+
+        def emit(closed):
+            nonlocal chunk_index
+            chunk = self._chunk(closed) if closed else None
+            if chunk:
+                chunk['chunk_index'] = chunk_index
+                chunk_index += 1
+            return chunk
+
+        def feed(paragraph, offset):
+            if counted and counted[:2] == (offset, len(paragraph)):
+                tokens = counted[2]
+            else:
+                tokens = self._count(paragraph)
+            splits = []
+            self._split(paragraph, offset, tokens, splits)
+            for split in splits:
+                chunk = emit(merger.add(split))
+                if chunk:
+                    yield chunk
+
+        for piece in pieces:
+            if not piece:
+                continue
+            buffer += piece
+            if not streaming:
+                # Text that fits in one chunk is a single split, so hold everything until it provably doesn't
+                # (a token is at least one byte, so byte length bounds the token count)
+                size = len(buffer.encode('utf-8'))
+                if size <= next_check:
+                    continue
+                counted = (buffer_start, len(buffer), self._count(buffer))
+                if counted[2] <= self.chunk_size:
+                    next_check = 2 * size
+                    continue
+                streaming = True
+            # Cut complete paragraphs - each ends where the next separator starts. The buffer begins
+            # with a separator except at the very start of the text (split_text_keep_separator semantics)
+            cursor = 0
+            search = len(separator) if buffer.startswith(separator) else 1
+            while (boundary := buffer.find(separator, max(cursor + search, scanned))) != -1:
+                yield from feed(buffer[cursor:boundary], buffer_start + cursor)
+                cursor, search = boundary, len(separator)
+            buffer, buffer_start = buffer[cursor:], buffer_start + cursor
+            scanned = max(0, len(buffer) - len(separator) + 1)
+
+        if buffer:
+            # The last paragraph, or the whole text when it never got past a chunk's worth of bytes
+            yield from feed(buffer, buffer_start)
+        chunk = emit(merger.finish())
+        if chunk:
+            yield chunk
+
+    def chunk(self, text):
+        return list(self.iter_chunks([text]))
+
+
+_chunkers = {}
+_chunkers_lock = threading.Lock()
+
+
+def get_chunker(chunk_size, chunk_overlap):
+    """Shared chunker per (chunk_size, chunk_overlap)"""
+    key = (chunk_size, chunk_overlap)
+    chunker = _chunkers.get(key)
+    if chunker is None:
+        with _chunkers_lock:
+            chunker = _chunkers.get(key)
+            if chunker is None:
+                chunker = _chunkers[key] = SentenceChunker(chunk_size, chunk_overlap)
+    return chunker
@@ -0,0 +1,265 @@
+"""
+Resumable crawl checkpoints
+Crawl jobs, their frontier and every URL's status are written to a local
+SQLite file as the crawl goes, so a crawl interrupted by a crash, deploy or
+request timeout continues where it stopped: completed pages are neither
+fetched nor embedded again, and fetch-strategy hints carry over.
+
+URL status: queued -> fetching -> fetched (handed to ingestion) -> ingested,
+or empty (nothing to ingest), duplicate or failed. Resuming requeues fetching,
+fetched and failed URLs.
+
+Jobs not touched for ttl_seconds are dropped with their URL rows, so the file
+does not keep one row per crawled URL forever.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+PAGE_STATUSES = ('ingested', 'duplicate')  # count towards max_pages
+RETRY_STATUSES = ('fetching', 'fetched', 'failed')
+
+
+class CrawlCheckpoints:
+    """SQLite-backed crawl job store"""
+
+    def __init__(self, path, lease_seconds=120, ttl_seconds=7 * 86400):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                crawl_id TEXT PRIMARY KEY,
+                params TEXT NOT NULL,
+                status TEXT NOT NULL,
+                hints TEXT NOT NULL DEFAULT '{}',
+                created_at REAL NOT NULL,
+                heartbeat REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS urls (
+                crawl_id TEXT NOT NULL,
+                url TEXT NOT NULL,
+                depth INTEGER NOT NULL,
+                score REAL NOT NULL,
+                status TEXT NOT NULL,
+                document_id TEXT,
+                chunks INTEGER,
+                PRIMARY KEY (crawl_id, url)
+            );
+            CREATE INDEX IF NOT EXISTS urls_status ON urls (crawl_id, status);
+        """)
+        self._conn.commit()
+
+    def create(self, params):
+        """Start a new job; returns its CrawlJob (already claimed)"""
+        self.expire()
+        crawl_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (crawl_id, params, status, created_at, heartbeat) VALUES (?, ?, 'running', ?, ?)",
+                (crawl_id, json.dumps(params), now, now)
+            )
+            self._conn.commit()
+        return CrawlJob(self, crawl_id, params, {}, resumed=False)
+
+    def claim(self, crawl_id):
+        """
+        Take over an existing job for this process. Returns its CrawlJob, or None if the job does
+        not exist or another request is still running it (heartbeat within lease_seconds).
+        """
+        now = time.time()
+        with self._lock:
+            claimed = self._conn.execute(
+                "UPDATE jobs SET status = 'running', heartbeat = ? WHERE crawl_id = ? AND (status != 'running' OR heartbeat < ?)",
+                (now, crawl_id, now - self.lease_seconds)
+            ).rowcount
+            row = self._conn.execute("SELECT params, hints FROM jobs WHERE crawl_id = ?", (crawl_id,)).fetchone()
+            if claimed:
+                # Anything in flight when the last run stopped is fetched again
+                self._conn.execute(
+                    f"UPDATE urls SET status = 'queued' WHERE crawl_id = ? AND status IN ({','.join('?' * len(RETRY_STATUSES))})",
+                    (crawl_id, *RETRY_STATUSES)
+                )
+            self._conn.commit()
+        if not claimed or row is None:
+            return None
+        return CrawlJob(self, crawl_id, json.loads(row[0]), json.loads(row[1]), resumed=True)
+
+    def summary(self, crawl_id):
+        with self._lock:
+            job = self._conn.execute(
+                "SELECT params, status, created_at, heartbeat FROM jobs WHERE crawl_id = ?", (crawl_id,)
+            ).fetchone()
+            if job is None:
+                return None
+            counts = dict(self._conn.execute(
+                "SELECT status, COUNT(*) FROM urls WHERE crawl_id = ? GROUP BY status", (crawl_id,)
+            ).fetchall())
+            chunks = self._conn.execute(
+                "SELECT COALESCE(SUM(chunks), 0) FROM urls WHERE crawl_id = ? AND status = 'ingested'", (crawl_id,)
+            ).fetchone()[0]
+        return {
+            'crawl_id': crawl_id,
+            'status': job[1],
+            'params': json.loads(job[0]),
+            'created_at': job[2],
+            'updated_at': job[3],
+            'urls': counts,
+            'pages_ingested': counts.get('ingested', 0),
+            'total_chunks': chunks
+        }
+
+    def expire(self):
+        """Drop jobs (and their URLs) whose heartbeat is older than ttl_seconds - complete, paused or abandoned"""
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            stale = [row[0] for row in self._conn.execute(
+                "SELECT crawl_id FROM jobs WHERE heartbeat < ?", (cutoff,)
+            ).fetchall()]
+        for crawl_id in stale:
+            # One job per transaction so a crawl with millions of URLs does not hold the lock for long
+            with self._lock:
+                self._conn.execute("DELETE FROM urls WHERE crawl_id = ?", (crawl_id,))
+                self._conn.execute("DELETE FROM jobs WHERE crawl_id = ? AND heartbeat < ?", (crawl_id, cutoff))
+                self._conn.commit()
+        if stale:
+            logging.info(f"Expired {len(stale)} crawl jobs")
+        return len(stale)
+
+
+class CrawlJob:
+    """One claimed crawl job; frontier additions are buffered and written before the next fetch"""
+
+    def __init__(self, store, crawl_id, params, hints, resumed):
+        self.store = store
+        self.crawl_id = crawl_id
+        self.params = params
+        self.hints = hints
+        self.resumed = resumed
+        self._pending = []
+        self._pending_lock = threading.Lock()  # marks arrive from ingest pipeline threads
+
+    def _execute_many(self, sql, rows):
+        with self.store._lock:
+            self.store._conn.executemany(sql, rows)
+            self._touch()
+
+    def _touch(self):
+        self.store._conn.execute("UPDATE jobs SET heartbeat = ? WHERE crawl_id = ?", (time.time(), self.crawl_id))
+        self.store._conn.commit()
+
+    def heartbeat(self):
+        with self.store._lock:
+            self._touch()
+
+    @contextmanager
+    def keep_alive(self):
+        """
+        Renew the lease every lease_seconds / 3 while the body runs, so a single slow fetch or embed
+        is not mistaken for a dead worker. A worker that dies stops renewing and the job can be taken over.
+        """
+        stop = threading.Event()
+
+        def renew():
+            while not stop.wait(max(1.0, self.store.lease_seconds / 3)):
+                try:
+                    self.heartbeat()
+                except Exception as e:
+                    logging.warning(f"Unable to renew the lease of crawl {self.crawl_id}: {e}")
+
+        thread = threading.Thread(target=renew, name=f"crawl-lease-{self.crawl_id[:8]}", daemon=True)
+        thread.start()
+        try:
+            yield self
+        finally:
+            stop.set()
+            thread.join()
+
+    # -- frontier journal (called by CrawlFrontier) ---------------------------------
+
+    def queued(self, url, depth, score):
+        with self._pending_lock:
+            self._pending.append((self.crawl_id, url, depth, score))
+
+    def flush(self):
+        with self._pending_lock:
+            rows, self._pending = self._pending, []
+        if rows:
+            self._execute_many(
+                "INSERT OR IGNORE INTO urls (crawl_id, url, depth, score, status) VALUES (?, ?, ?, ?, 'queued')", rows
+            )
+
+    # -- state ---------------------------------------------------------------------------
+
+    def mark(self, url, status, document_id=None, chunks=None):
+        self.flush()
+        self._execute_many(
+            "UPDATE urls SET status = ?, document_id = COALESCE(?, document_id), chunks = COALESCE(?, chunks) "
+            "WHERE crawl_id = ? AND url = ?",
+            [(status, document_id, chunks, self.crawl_id, url)]
+        )
+
+    def save_hints(self, hints):
+        self.hints = dict(hints)
+        self._execute_many("UPDATE jobs SET hints = ? WHERE crawl_id = ?", [(json.dumps(self.hints), self.crawl_id)])
+
+    def _iter_urls(self, batch_size=10000):
+        # Paged along the primary key so a crawl with millions of URLs is never loaded at once
+        last = ''
+        while True:
+            with self.store._lock:
+                rows = self.store._conn.execute(
+                    "SELECT url, depth, score, status FROM urls WHERE crawl_id = ? AND url > ? ORDER BY url LIMIT ?",
+                    (self.crawl_id, last, batch_size)
+                ).fetchall()
+            yield from rows
+            if len(rows) < batch_size:
+                return
+            last = rows[-1][0]
+
+    def frontier_state(self):
+        """(queued (url, depth, score) rows, every known URL) as iterators for CrawlFrontier.restore"""
+        queued = ((url, depth, score) for url, depth, score, status in self._iter_urls() if status == 'queued')
+        seen = (url for url, _, _, _ in self._iter_urls())
+        return queued, seen
+
+    def page_count(self):
+        with self.store._lock:
+            return self.store._conn.execute(
+                f"SELECT COUNT(*) FROM urls WHERE crawl_id = ? AND status IN ({','.join('?' * len(PAGE_STATUSES))})",
+                (self.crawl_id, *PAGE_STATUSES)
+            ).fetchone()[0]
+
+    def finish(self, complete):
+        """Release the job: 'complete', or 'paused' to be resumed by a later request"""
+        self.flush()
+        self._execute_many(
+            "UPDATE jobs SET status = ? WHERE crawl_id = ?", [('complete' if complete else 'paused', self.crawl_id)]
+        )
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_checkpoints(path, lease_seconds=120, ttl_seconds=7 * 86400):
+    """Process-wide checkpoint store (lazily opened)"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            logging.info(f"Opening crawl checkpoints at {path}")
+            _store = CrawlCheckpoints(path, lease_seconds, ttl_seconds)
+    return _store
@@ -0,0 +1,376 @@
+"""
+Crawl frontier with robots.txt and sitemap discovery
+URLs come from sitemaps (robots.txt Sitemap: lines, else /sitemap.xml,
+following sitemap indexes) and from page links. They are scored by depth,
+path patterns, sitemap priority and lastmod freshness and popped best-first,
+so a small page budget goes to content pages before navigation, tag and
+account links.
+
+Memory stays flat on large crawls: seen URLs are kept as 64-bit fingerprints
+in an open-addressing array, and past `max_memory` queued URLs the worse half
+of the queue is spilled to sorted temporary segment files that are merged back
+on pop.
+"""
+
+import gzip
+import hashlib
+import heapq
+import io
+import itertools
+import json
+import logging
+import re
+import tempfile
+import time
+from array import array
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from urllib import robotparser
+from urllib.parse import urlparse, urljoin
+
+USER_AGENT = '*'
+MAX_SITEMAP_BYTES = 50 * 1024 * 1024  # sitemap protocol limit per file (uncompressed)
+
+SKIP_EXTENSIONS = (
+    '.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '.ico', '.bmp', '.mp4', '.mp3', '.avi', '.mov', '.webm',
+    '.zip', '.gz', '.tar', '.rar', '.7z', '.exe', '.dmg', '.css', '.js', '.json', '.xml', '.rss', '.woff', '.woff2',
+    '.ttf', '.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx'
+)
+LOW_VALUE_PATH = re.compile(
+    r"/(login|log-in|signin|sign-in|signup|sign-up|register|account|my-account|cart|basket|checkout|wishlist|"
+    r"search|tag|tags|category|categories|author|feed|rss|share|print|privacy|privacy-policy|terms|cookies?|"
+    r"legal|wp-admin|wp-login\.php|cdn-cgi)(/|$)", re.I
+)
+LOW_VALUE_QUERY = re.compile(r"(^|&)(page|p|sort|order|orderby|filter|utm_[a-z]+|ref|replytocom|share)=", re.I)
+HIGH_VALUE_PATH = re.compile(
+    r"/(blog|news|articles?|posts?|docs|documentation|guides?|help|faq|kb|knowledge-base|learn|resources|"
+    r"products?|listings?|propert(y|ies)|services?|pricing|about)(/|$)", re.I
+)
+
+
+def score_url(url, depth, start_path='/', lastmod=None, priority=None, now=None, parsed=None):
+    """Higher is crawled first (parsed: urlparse(url), if the caller already has it)"""
+    parsed = parsed or urlparse(url)
+    path = parsed.path or '/'
+    score = -float(depth)
+    if LOW_VALUE_PATH.search(path):
+        score -= 2.0
+    if HIGH_VALUE_PATH.search(path):
+        score += 1.0
+    if start_path not in ('', '/') and path.startswith(start_path):
+        score += 1.0
+    # Content pages usually end in a descriptive slug or an id: /blog/how-we-index-pdfs, /listing/48213
+    slug = path.rstrip('/').rsplit('/', 1)[-1]
+    if slug.count('-') >= 2 or re.search(r"\d{3,}", slug):
+        score += 0.5
+    if parsed.query:
+        score -= 1.0 if LOW_VALUE_QUERY.search(parsed.query) else 0.25
+    if priority is not None:
+        score += priority - 0.5
+    if lastmod is not None:
+        age_days = max(0.0, ((now or time.time()) - lastmod) / 86400)
+        score += max(0.0, 1.0 - age_days / 365)
+    return score
+
+
+def parse_lastmod(value):
+    """W3C datetime (2024-05-01 or 2024-05-01T10:00:00+00:00) -> epoch seconds, None if unparseable"""
+    value = (value or '').strip()
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def parse_sitemap(content, max_urls=None):
+    """
+    Returns ([(loc, lastmod, priority)], [child sitemap locs]) from sitemap or sitemap index bytes,
+    stopping after max_urls page URLs. Entries are parsed incrementally and cleared, so a 50 MB
+    sitemap is not held as one element tree.
+    Raises ValueError when gzipped content expands past MAX_SITEMAP_BYTES.
+    """
+    if content[:2] == b'\x1f\x8b':
+        with gzip.GzipFile(fileobj=io.BytesIO(content)) as handle:
+            content = handle.read(MAX_SITEMAP_BYTES + 1)
+        if len(content) > MAX_SITEMAP_BYTES:
+            raise ValueError(f"Sitemap expands past {MAX_SITEMAP_BYTES} bytes")
+    urls, sitemaps = [], []
+    depth = 0
+    for event, element in ET.iterparse(io.BytesIO(content), events=('start', 'end')):
+        if event == 'start':
+            depth += 1
+            continue
+        depth -= 1
+        if depth != 1:
+            continue
+        # A <url> / <sitemap> entry directly under the root
+        fields = {child.tag.rsplit('}', 1)[-1]: (child.text or '').strip() for child in element}
+        tag = element.tag
+        element.clear()
+        loc = fields.get('loc')
+        if not loc:
+            continue
+        if tag.endswith('sitemap'):
+            sitemaps.append(loc)
+            continue
+        try:
+            priority = float(fields['priority']) if fields.get('priority') else None
+        except ValueError:
+            priority = None
+        urls.append((loc, parse_lastmod(fields.get('lastmod')), priority))
+        if max_urls is not None and len(urls) >= max_urls:
+            break
+    return urls, sitemaps
+
+
+class RobotsRules:
+    """Parsed robots.txt; allows everything when the file is missing or unreadable"""
+
+    def __init__(self, robots_txt=None):
+        self._parser = None
+        self.sitemaps = []
+        if robots_txt:
+            self._parser = robotparser.RobotFileParser()
+            self._parser.parse(robots_txt.splitlines())
+            self.sitemaps = list(self._parser.site_maps() or [])
+
+    def allowed(self, url):
+        return self._parser is None or self._parser.can_fetch(USER_AGENT, url)
+
+
+class UrlFingerprintSet:
+    """
+    Exact set of URLs stored as 64-bit blake2b fingerprints in a linear-probing array: about
+    12-24 bytes per URL instead of 100+ for a set of URL strings. Two different URLs collide
+    with probability ~n^2/2^65, which is negligible even for millions of URLs.
+    """
+
+    MAX_LOAD = 0.7
+
+    def __init__(self, capacity=1024):
+        size = 8
+        while size * self.MAX_LOAD < capacity:
+            size <<= 1
+        self._slots = array('Q', bytes(8 * size))
+        self._mask = size - 1
+        self._count = 0
+
+    @staticmethod
+    def fingerprint(url):
+        value = int.from_bytes(hashlib.blake2b(url.encode('utf-8'), digest_size=8).digest(), 'little')
+        return value or 1  # 0 marks an empty slot
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def nbytes(self):
+        return self._slots.itemsize * len(self._slots)
+
+    def _slot(self, fingerprint):
+        slots, mask = self._slots, self._mask
+        position = fingerprint & mask
+        while slots[position] and slots[position] != fingerprint:
+            position = (position + 1) & mask
+        return position
+
+    def __contains__(self, url):
+        return self._slots[self._slot(self.fingerprint(url))] != 0
+
+    def add(self, url):
+        """Returns True if url was not in the set yet"""
+        fingerprint = self.fingerprint(url)
+        position = self._slot(fingerprint)
+        if self._slots[position]:
+            return False
+        self._slots[position] = fingerprint
+        self._count += 1
+        if self._count > self.MAX_LOAD * len(self._slots):
+            self._grow()
+        return True
+
+    def _grow(self):
+        old = self._slots
+        self._slots = array('Q', bytes(16 * len(old)))
+        self._mask = len(self._slots) - 1
+        for fingerprint in old:
+            if fingerprint:
+                self._slots[self._slot(fingerprint)] = fingerprint
+
+
+class SpillQueue:
+    """
+    Min-heap of (key, order, url, depth) entries holding at most max_memory of them in memory.
+    When it is full, the worse half is written sorted to a temporary segment file; pop merges the
+    heap with the head of each segment, so entries still come out in exact order.
+    """
+
+    MAX_SEGMENTS = 32  # open segment files before they are merged into one
+
+    def __init__(self, max_memory=50000, directory=None):
+        self.max_memory = max(2, max_memory)
+        self.directory = directory
+        self._heap = []
+        self._heads = []  # heap of (entry, segment file) - the next unread entry of each segment
+        self._length = 0
+        self.spilled = 0
+
+    def __len__(self):
+        return self._length
+
+    def push(self, entry):
+        heapq.heappush(self._heap, entry)
+        self._length += 1
+        if len(self._heap) >= self.max_memory:
+            self._spill()
+
+    def pop(self):
+        """Smallest entry, or None when empty"""
+        if self._heads and (not self._heap or self._heads[0][0] < self._heap[0]):
+            entry = self._pop_segment()
+        elif self._heap:
+            entry = heapq.heappop(self._heap)
+        else:
+            return None
+        self._length -= 1
+        return entry
+
+    def close(self):
+        for _, handle in self._heads:
+            handle.close()
+        self._heads = []
+
+    def _segment(self, entries):
+        handle = tempfile.TemporaryFile('w+', encoding='utf-8', dir=self.directory)
+        handle.writelines(json.dumps(entry) + '\n' for entry in entries)
+        handle.seek(0)
+        self._advance(handle)
+
+    def _advance(self, handle):
+        line = handle.readline()
+        if line:
+            heapq.heappush(self._heads, (tuple(json.loads(line)), handle))
+        else:
+            handle.close()
+
+    def _pop_segment(self):
+        entry, handle = heapq.heappop(self._heads)
+        self._advance(handle)
+        return entry
+
+    def _spill(self):
+        # A sorted list is a valid heap, so the better half stays usable as is
+        entries = sorted(self._heap)
+        keep = len(entries) // 2
+        self._heap = entries[:keep]
+        self._segment(entries[keep:])
+        self.spilled += len(entries) - keep
+        if len(self._heads) > self.MAX_SEGMENTS:
+            self._segment(self._drain_segments())  # streaming k-way merge into a single segment
+
+    def _drain_segments(self):
+        while self._heads:
+            yield self._pop_segment()
+
+
+class CrawlFrontier:
+    """
+    Best-first frontier over one host; each URL is queued at most once.
+    journal.queued(url, depth, score) is called for every queued URL (see crawl_checkpoint.py).
+    """
+
+    def __init__(self, start_url, max_depth=1, max_size=1000000, robots=None, journal=None, max_memory=50000):
+        parsed = urlparse(start_url)
+        self.domain = parsed.netloc
+        self.origin = f"{parsed.scheme}://{parsed.netloc}"
+        self.start_path = parsed.path or '/'
+        self.max_depth = max_depth
+        self.max_size = max_size
+        self.robots = robots or RobotsRules()
+        self.journal = journal
+        self._queue = SpillQueue(max_memory)
+        self._order = itertools.count()
+        self._seen = UrlFingerprintSet()
+        self.sitemaps = []
+        self.stats = {'queued': 0, 'from_sitemap': 0, 'robots_blocked': 0, 'filtered': 0, 'spilled': 0}
+
+    def __len__(self):
+        return len(self._queue)
+
+    def add(self, url, depth, lastmod=None, priority=None, boost=0.0, source='link'):
+        """Queue url unless it was seen, is off-site, too deep, not HTML-like or disallowed; returns True if queued"""
+        if depth > self.max_depth or not self._seen.add(url):
+            return False
+        parsed = urlparse(url)
+        if parsed.netloc != self.domain or parsed.scheme not in ('http', 'https'):
+            return False
+        if parsed.path.lower().endswith(SKIP_EXTENSIONS) or len(self._queue) >= self.max_size:
+            self.stats['filtered'] += 1
+            return False
+        if not self.robots.allowed(url):
+            self.stats['robots_blocked'] += 1
+            return False
+        score = score_url(url, depth, self.start_path, lastmod, priority, parsed=parsed) + boost
+        self._queue.push((-score, next(self._order), url, depth))
+        self.stats['spilled'] = self._queue.spilled
+        if self.journal is not None:
+            self.journal.queued(url, depth, score)
+        self.stats['queued'] += 1
+        if source == 'sitemap':
+            self.stats['from_sitemap'] += 1
+        return True
+
+    def restore(self, queued, seen):
+        """Reload a checkpointed frontier: queued (url, depth, score) rows plus every URL already seen"""
+        for url in seen:
+            self._seen.add(url)
+        for url, depth, score in queued:
+            self._queue.push((-score, next(self._order), url, depth))
+
+    def pop(self):
+        """(url, depth) of the best queued URL, or None when empty"""
+        entry = self._queue.pop()
+        self.stats['spilled'] = self._queue.spilled
+        if entry is None:
+            return None
+        _, _, url, depth = entry
+        return url, depth
+
+    def close(self):
+        """Remove spilled segment files"""
+        self._queue.close()
+
+    def load_robots(self, fetch, enforce=True):
+        """Fetch robots.txt with fetch(url) -> bytes or None; enforce=False only reads its Sitemap: lines"""
+        robots_txt = fetch(urljoin(self.origin, '/robots.txt'))
+        rules = RobotsRules(robots_txt.decode('utf-8', 'replace') if robots_txt else None)
+        self.sitemaps = rules.sitemaps or [urljoin(self.origin, '/sitemap.xml')]
+        if enforce:
+            self.robots = rules
+
+    def add_sitemap_urls(self, fetch, normalize=lambda url: url, max_sitemaps=5, max_urls=5000):
+        """Queue sitemap URLs at depth 1, following sitemap indexes breadth-first up to max_sitemaps files"""
+        if self.max_depth < 1:
+            return
+        pending = list(self.sitemaps or [urljoin(self.origin, '/sitemap.xml')])
+        fetched, found = 0, 0
+        while pending and fetched < max_sitemaps and found < max_urls:
+            sitemap_url = pending.pop(0)
+            content = fetch(sitemap_url)
+            fetched += 1
+            if not content:
+                continue
+            try:
+                urls, children = parse_sitemap(content, max_urls - found)
+            except (ET.ParseError, OSError, EOFError, ValueError) as e:
+                logging.warning(f"Unreadable sitemap {sitemap_url}: {e}")
+                continue
+            pending.extend(children)
+            for loc, lastmod, priority in urls[:max_urls - found]:
+                found += 1
+                self.add(normalize(loc), 1, lastmod=lastmod, priority=priority, source='sitemap')
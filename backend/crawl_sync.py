@@ -0,0 +1,370 @@
+"""
+Scheduled re-crawl of ingested websites
+A registry of crawled sources per project (local SQLite) with interval or cron
+schedules, the pages each source ingested (document id, content hash, ETag /
+Last-Modified) and a scheduler thread that runs due sources. Sources are
+claimed with a lease, and at most max_concurrent run at once across every
+process sharing the registry file, so syncs cannot crowd out interactive work.
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+INTERVAL_PATTERN = re.compile(r"^(?:every\s+)?(\d+)\s*([smhd]?)$", re.I)
+INTERVAL_UNITS = {'': 1, 's': 1, 'm': 60, 'h': 3600, 'd': 86400}
+MIN_INTERVAL_SECONDS = 60
+CRON_ALIASES = {'@hourly': '0 * * * *', '@daily': '0 0 * * *', '@weekly': '0 0 * * 0', '@monthly': '0 0 1 * *'}
+CRON_RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))  # minute hour day-of-month month day-of-week
+
+
+def _parse_cron_field(field, low, high):
+    values = set()
+    for part in field.split(','):
+        part, _, step = part.partition('/')
+        if part == '*':
+            start, end = low, high
+        elif '-' in part:
+            start, end = (int(value) for value in part.split('-', 1))
+        else:
+            start = end = int(part)
+            if step:
+                end = high  # '5/15' means 5-59/15, not just 5
+        step = int(step) if step else 1
+        if start < low or end > high or start > end or step < 1:
+            raise ValueError(f"Cron field out of range: {field!r}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class Schedule:
+    """'every 6h' / '90m' / '3600' intervals, @hourly/@daily/@weekly/@monthly or 5-field cron (UTC)"""
+
+    def __init__(self, spec):
+        self.spec = (spec or '').strip()
+        text = CRON_ALIASES.get(self.spec.lower(), self.spec)
+        match = INTERVAL_PATTERN.match(text)
+        self.interval = None
+        if match:
+            self.interval = int(match.group(1)) * INTERVAL_UNITS[match.group(2).lower()]
+            if self.interval < MIN_INTERVAL_SECONDS:
+                raise ValueError(f"Schedule interval must be at least {MIN_INTERVAL_SECONDS} seconds")
+            return
+        fields = text.split()
+        if len(fields) != 5:
+            raise ValueError(f"Invalid schedule {spec!r}: use an interval like 'every 6h' or a 5-field cron expression")
+        try:
+            self.minutes, self.hours, self.days, self.months, weekdays = (
+                _parse_cron_field(field, low, high) for field, (low, high) in zip(fields, CRON_RANGES)
+            )
+        except ValueError as e:
+            raise ValueError(f"Invalid schedule {spec!r}: {e}")
+        self.weekdays = frozenset(day % 7 for day in weekdays)  # 0 and 7 are both Sunday
+        self._any_day = fields[2] == '*'
+        self._any_weekday = fields[4] == '*'
+
+    def _day_matches(self, moment):
+        day_ok = moment.day in self.days
+        weekday_ok = (moment.weekday() + 1) % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok  # cron runs when either restricted day field matches
+
+    def next_after(self, timestamp):
+        """First run time (epoch seconds) strictly after timestamp"""
+        if self.interval is not None:
+            return timestamp + self.interval
+        moment = datetime.fromtimestamp(timestamp, timezone.utc).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment + timedelta(days=5 * 366)
+        while moment < limit:
+            if moment.month not in self.months:
+                year, month = (moment.year + 1, 1) if moment.month == 12 else (moment.year, moment.month + 1)
+                moment = moment.replace(year=year, month=month, day=1, hour=0, minute=0)
+            elif not self._day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment.timestamp()
+        raise ValueError(f"Schedule {self.spec!r} never fires")
+
+
+class SourceRegistry:
+    """SQLite-backed registry of scheduled sources and the pages each one ingested"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS sources (
+                source_id TEXT PRIMARY KEY,
+                project TEXT NOT NULL,
+                index_name TEXT NOT NULL,
+                url TEXT NOT NULL,
+                schedule TEXT NOT NULL,
+                params TEXT NOT NULL,
+                next_run REAL NOT NULL,
+                lease_until REAL NOT NULL DEFAULT 0,
+                last_run REAL,
+                last_status TEXT,
+                last_result TEXT,
+                created_at REAL NOT NULL
+            );
+            CREATE UNIQUE INDEX IF NOT EXISTS sources_target ON sources (project, index_name, url);
+            CREATE TABLE IF NOT EXISTS pages (
+                source_id TEXT NOT NULL,
+                url TEXT NOT NULL,
+                depth INTEGER NOT NULL,
+                document_id TEXT,
+                content_hash TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                chunks INTEGER,
+                last_seen REAL NOT NULL,
+                PRIMARY KEY (source_id, url)
+            );
+        """)
+        self._conn.commit()
+
+    @staticmethod
+    def _source(row):
+        (source_id, project, index_name, url, schedule, params, next_run, lease_until,
+         last_run, last_status, last_result, created_at) = row
+        return {
+            'source_id': source_id, 'project': project, 'index_name': index_name, 'url': url,
+            'schedule': schedule, 'params': json.loads(params), 'next_run': next_run,
+            'running': lease_until > time.time(), 'last_run': last_run, 'last_status': last_status,
+            'last_result': json.loads(last_result) if last_result else None, 'created_at': created_at
+        }
+
+    def register(self, url, project, index_name, schedule, params, run_now=False):
+        """Add a source, or update the schedule and parameters of the same (project, index, url)"""
+        now = time.time()
+        next_run = now if run_now else Schedule(schedule).next_after(now)
+        with self._lock:
+            self._conn.execute(
+                """INSERT INTO sources (source_id, project, index_name, url, schedule, params, next_run, created_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (project, index_name, url) DO UPDATE SET
+                       schedule = excluded.schedule, params = excluded.params, next_run = excluded.next_run""",
+                (uuid.uuid4().hex, project, index_name, url, schedule, json.dumps(params), next_run, now)
+            )
+            self._conn.commit()
+            row = self._conn.execute(
+                "SELECT * FROM sources WHERE project = ? AND index_name = ? AND url = ?", (project, index_name, url)
+            ).fetchone()
+        return self._source(row)
+
+    def get(self, source_id):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM sources WHERE source_id = ?", (source_id,)).fetchone()
+        return self._source(row) if row else None
+
+    def list(self, project=None):
+        with self._lock:
+            if project is None:
+                rows = self._conn.execute("SELECT * FROM sources ORDER BY created_at").fetchall()
+            else:
+                rows = self._conn.execute(
+                    "SELECT * FROM sources WHERE project = ? ORDER BY created_at", (project,)
+                ).fetchall()
+        return [self._source(row) for row in rows]
+
+    def remove(self, source_id):
+        """Unregister a source (its ingested documents are kept)"""
+        with self._lock:
+            deleted = self._conn.execute("DELETE FROM sources WHERE source_id = ?", (source_id,)).rowcount
+            self._conn.execute("DELETE FROM pages WHERE source_id = ?", (source_id,))
+            self._conn.commit()
+        return bool(deleted)
+
+    # -- claiming ------------------------------------------------------------------------
+
+    def claim(self, source_id=None, max_concurrent=1, lease_seconds=900):
+        """
+        Lease a source to run: the given one, or else the most overdue. Returns (source, None) or
+        (None, reason) with reason 'missing', 'running', 'capacity' or 'idle' (nothing due).
+        """
+        now = time.time()
+        with self._lock:
+            # IMMEDIATE takes the write lock up front, so the capacity check holds across processes
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if source_id is not None:
+                    row = self._conn.execute("SELECT * FROM sources WHERE source_id = ?", (source_id,)).fetchone()
+                else:
+                    row = self._conn.execute(
+                        "SELECT * FROM sources WHERE next_run <= ? AND lease_until <= ? ORDER BY next_run LIMIT 1",
+                        (now, now)
+                    ).fetchone()
+                if row is None:
+                    return None, 'missing' if source_id is not None else 'idle'
+                if row[7] > now:
+                    return None, 'running'
+                running = self._conn.execute("SELECT COUNT(*) FROM sources WHERE lease_until > ?", (now,)).fetchone()[0]
+                if running >= max_concurrent:
+                    return None, 'capacity'
+                self._conn.execute(
+                    "UPDATE sources SET lease_until = ? WHERE source_id = ?", (now + lease_seconds, row[0])
+                )
+                return self._source(row), None
+            finally:
+                self._conn.commit()
+
+    def heartbeat(self, source_id, lease_seconds):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE sources SET lease_until = ? WHERE source_id = ?", (time.time() + lease_seconds, source_id)
+            )
+            self._conn.commit()
+
+    def finish(self, source_id, status, result):
+        """Release the lease, record the run and schedule the next one"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT schedule FROM sources WHERE source_id = ?", (source_id,)).fetchone()
+            if row is None:
+                return
+            self._conn.execute(
+                """UPDATE sources SET lease_until = 0, last_run = ?, last_status = ?, last_result = ?, next_run = ?
+                   WHERE source_id = ?""",
+                (now, status, json.dumps(result), Schedule(row[0]).next_after(now), source_id)
+            )
+            self._conn.commit()
+
+    # -- pages -----------------------------------------------------------------------------
+
+    def pages(self, source_id):
+        """{url: page row} for every page the source currently has ingested"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url, depth, document_id, content_hash, etag, last_modified, chunks FROM pages WHERE source_id = ?",
+                (source_id,)
+            ).fetchall()
+        return {
+            row[0]: {'depth': row[1], 'document_id': row[2], 'content_hash': row[3], 'etag': row[4],
+                     'last_modified': row[5], 'chunks': row[6]}
+            for row in rows
+        }
+
+    def save_page(self, source_id, url, depth, document_id, content_hash, etag=None, last_modified=None, chunks=None):
+        with self._lock:
+            self._conn.execute(
+                """INSERT OR REPLACE INTO pages
+                   (source_id, url, depth, document_id, content_hash, etag, last_modified, chunks, last_seen)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (source_id, url, depth, document_id, content_hash, etag, last_modified, chunks, time.time())
+            )
+            self._conn.commit()
+
+    def seed_pages(self, source_id, pages):
+        """Record pages ingested before the source was registered ({url: page row}); known URLs are left alone"""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                """INSERT OR IGNORE INTO pages
+                   (source_id, url, depth, document_id, content_hash, etag, last_modified, chunks, last_seen)
+                   VALUES (?, ?, ?, ?, ?, NULL, NULL, ?, ?)""",
+                [(source_id, url, page['depth'], page['document_id'], page['content_hash'], page['chunks'], now)
+                 for url, page in pages.items()]
+            )
+            self._conn.commit()
+
+    def touch_page(self, source_id, url, etag=None, last_modified=None):
+        """Record that an unchanged page was seen, refreshing its validators when the server sent new ones"""
+        with self._lock:
+            self._conn.execute(
+                """UPDATE pages SET last_seen = ?, etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified)
+                   WHERE source_id = ? AND url = ?""",
+                (time.time(), etag, last_modified, source_id, url)
+            )
+            self._conn.commit()
+
+    def remove_page(self, source_id, url):
+        with self._lock:
+            self._conn.execute("DELETE FROM pages WHERE source_id = ? AND url = ?", (source_id, url))
+            self._conn.commit()
+
+
+class SyncScheduler:
+    """
+    Polls the registry every poll_seconds and runs each due source in its own thread with
+    run(source) -> result dict. A run that raises is recorded as failed; either way the source
+    is rescheduled from its schedule.
+    """
+
+    def __init__(self, registry, run, max_concurrent=1, lease_seconds=900, poll_seconds=60):
+        self.registry = registry
+        self.run = run
+        self.max_concurrent = max(1, max_concurrent)
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name='crawl-sync', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.tick()
+            except Exception as e:
+                logging.warning(f"Crawl sync scheduler tick failed: {e}")
+            self._stop.wait(self.poll_seconds)
+
+    def tick(self):
+        """Start every due source the concurrency cap allows; returns the started threads"""
+        threads = []
+        while not self._stop.is_set():
+            source, _ = self.registry.claim(max_concurrent=self.max_concurrent, lease_seconds=self.lease_seconds)
+            if source is None:
+                break
+            thread = threading.Thread(target=self.run_source, args=(source,), daemon=True)
+            thread.start()
+            threads.append(thread)
+        return threads
+
+    def run_source(self, source):
+        status, result = 'ok', None
+        try:
+            result = self.run(source)
+        except Exception as e:
+            logging.exception(f"Sync of {source['url']} ({source['source_id']}) failed")
+            status, result = 'failed', {'error': str(e)}
+        finally:
+            self.registry.finish(source['source_id'], status, result)
+        return status, result
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry(path):
+    """Process-wide source registry (lazily opened)"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            logging.info(f"Opening crawl source registry at {path}")
+            _registry = SourceRegistry(path)
+    return _registry
@@ -0,0 +1,301 @@
+"""
+Near-duplicate detection for crawled pages and chunks
+64-bit SimHash over word shingles. Candidates are looked up through four
+16-bit LSH bands - two fingerprints within MAX_DISTANCE (3) bits always share
+a band - and fingerprints are kept per (index, namespace) in a local SQLite
+file so duplicates are caught across crawls, not just within one.
+
+Exact duplicates of whole uploaded files are caught earlier, before any text
+is extracted, by the sha256 of their bytes (DocumentHashIndex).
+"""
+
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+
+WORD_PATTERN = re.compile(r"\w+")
+SHINGLE_SIZE = 3
+MAX_DISTANCE = 3
+BANDS = MAX_DISTANCE + 1
+BAND_BITS = 64 // BANDS
+_SIGN_BIT = 1 << 63
+
+
+def _feature_hash(feature):
+    return int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def simhash(text, shingle_size=SHINGLE_SIZE):
+    """64-bit SimHash of word shingles, or None when the text has no words"""
+    words = WORD_PATTERN.findall((text or '').lower())
+    if not words:
+        return None
+    if len(words) < shingle_size:
+        shingles = [' '.join(words)]
+    else:
+        shingles = [' '.join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)]
+
+    import numpy as np
+    hashes = np.array([_feature_hash(shingle) for shingle in shingles], dtype='>u8')
+    # One row of 64 bits per shingle (most significant first); a bit is set when most shingles set it
+    bits = np.unpackbits(hashes.view(np.uint8)).reshape(len(shingles), 64)
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 > len(shingles)
+    return int.from_bytes(np.packbits(votes).tobytes(), 'big')
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+def _bands(fingerprint):
+    mask = (1 << BAND_BITS) - 1
+    return [(band << BAND_BITS) | ((fingerprint >> (band * BAND_BITS)) & mask) for band in range(BANDS)]
+
+
+def _to_sql(fingerprint):
+    # SQLite integers are signed 64-bit
+    return fingerprint - (1 << 64) if fingerprint & _SIGN_BIT else fingerprint
+
+
+def _from_sql(value):
+    return value + (1 << 64) if value < 0 else value
+
+
+class NearDuplicateIndex:
+    """SQLite-backed SimHash index per scope, separately for pages and chunks (kind)"""
+
+    def __init__(self, path, max_distance=MAX_DISTANCE):
+        if max_distance > MAX_DISTANCE:
+            raise ValueError(f"max_distance above {MAX_DISTANCE} is not guaranteed to be found by the LSH bands")
+        self.path = path
+        self.max_distance = max_distance
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS fingerprints (
+                id INTEGER PRIMARY KEY,
+                scope TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                fingerprint INTEGER NOT NULL,
+                document_id TEXT NOT NULL,
+                ref TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS fingerprints_document ON fingerprints (scope, document_id);
+            CREATE TABLE IF NOT EXISTS bands (
+                scope TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                band INTEGER NOT NULL,
+                fingerprint_id INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS bands_lookup ON bands (scope, kind, band);
+            CREATE INDEX IF NOT EXISTS bands_fingerprint ON bands (fingerprint_id);
+        """)
+        self._conn.commit()
+
+    @staticmethod
+    def scope(index_name, namespace):
+        return f"{index_name}/{namespace}"
+
+    def _find(self, scope, kind, fingerprint):
+        bands = _bands(fingerprint)
+        rows = self._conn.execute(
+            f"""SELECT DISTINCT f.fingerprint, f.ref FROM bands b JOIN fingerprints f ON f.id = b.fingerprint_id
+                WHERE b.scope = ? AND b.kind = ? AND b.band IN ({','.join('?' for _ in bands)})""",
+            (scope, kind, *bands)
+        ).fetchall()
+        best = None
+        for stored, ref in rows:
+            distance = hamming(fingerprint, _from_sql(stored))
+            if distance <= self.max_distance and (best is None or distance < best[0]):
+                best = (distance, ref)
+        return best[1] if best else None
+
+    def check_and_add(self, scope, kind, document_id, items):
+        """
+        For each (fingerprint, ref) return the ref of a stored near-duplicate, or None after
+        storing it. Items are checked in order, so later items also match earlier ones.
+        """
+        results = []
+        with self._lock:
+            for fingerprint, ref in items:
+                duplicate_of = self._find(scope, kind, fingerprint) if fingerprint is not None else None
+                results.append(duplicate_of)
+                if duplicate_of is not None or fingerprint is None:
+                    continue
+                cursor = self._conn.execute(
+                    "INSERT INTO fingerprints (scope, kind, fingerprint, document_id, ref) VALUES (?, ?, ?, ?, ?)",
+                    (scope, kind, _to_sql(fingerprint), document_id, ref)
+                )
+                self._conn.executemany(
+                    "INSERT INTO bands (scope, kind, band, fingerprint_id) VALUES (?, ?, ?, ?)",
+                    [(scope, kind, band, cursor.lastrowid) for band in _bands(fingerprint)]
+                )
+            self._conn.commit()
+        return results
+
+    def delete_document(self, scope, document_id):
+        """Forget a document's fingerprints so its content can be ingested again"""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM bands WHERE fingerprint_id IN (SELECT id FROM fingerprints WHERE scope = ? AND document_id = ?)",
+                (scope, document_id)
+            )
+            deleted = self._conn.execute(
+                "DELETE FROM fingerprints WHERE scope = ? AND document_id = ?", (scope, document_id)
+            ).rowcount
+            self._conn.commit()
+        return deleted
+
+    def delete_index(self, index_name):
+        """Forget the fingerprints of every namespace of a deleted index"""
+        prefix = self.scope(index_name, '')
+        with self._lock:
+            for table in ('bands', 'fingerprints'):
+                self._conn.execute(f"DELETE FROM {table} WHERE substr(scope, 1, ?) = ?", (len(prefix), prefix))
+            self._conn.commit()
+
+
+class DocumentHashIndex:
+    """SQLite-backed sha256 -> document index per scope, with the other filenames the content was uploaded as"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS documents (
+                scope TEXT NOT NULL,
+                sha256 TEXT NOT NULL,
+                document_id TEXT NOT NULL,
+                filename TEXT NOT NULL,
+                chunks INTEGER NOT NULL,
+                total_characters INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (scope, sha256)
+            );
+            CREATE INDEX IF NOT EXISTS documents_id ON documents (scope, document_id);
+            CREATE TABLE IF NOT EXISTS aliases (
+                scope TEXT NOT NULL,
+                document_id TEXT NOT NULL,
+                filename TEXT NOT NULL,
+                PRIMARY KEY (scope, document_id, filename)
+            );
+        """)
+        self._conn.commit()
+
+    scope = staticmethod(NearDuplicateIndex.scope)
+
+    def _aliases(self, scope, document_id):
+        return [row[0] for row in self._conn.execute(
+            "SELECT filename FROM aliases WHERE scope = ? AND document_id = ? ORDER BY rowid", (scope, document_id)
+        ).fetchall()]
+
+    def find(self, scope, sha256):
+        """The document already ingested with this content, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT document_id, filename, chunks, total_characters, created_at FROM documents WHERE scope = ? AND sha256 = ?",
+                (scope, sha256)
+            ).fetchone()
+            if row is None:
+                return None
+            return {
+                'document_id': row[0],
+                'filename': row[1],
+                'chunks': row[2],
+                'total_characters': row[3],
+                'created_at': row[4],
+                'aliases': self._aliases(scope, row[0])
+            }
+
+    def add(self, scope, sha256, document_id, filename, chunks, total_characters):
+        """Record an ingested document; the first document stored for a hash keeps it. Returns True if stored."""
+        with self._lock:
+            stored = self._conn.execute(
+                "INSERT OR IGNORE INTO documents (scope, sha256, document_id, filename, chunks, total_characters, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (scope, sha256, document_id, filename, chunks, total_characters, time.time())
+            ).rowcount
+            self._conn.commit()
+        return bool(stored)
+
+    def alias(self, scope, document_id, filename):
+        """Record another filename for a document; returns all of its aliases"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO aliases (scope, document_id, filename) VALUES (?, ?, ?)", (scope, document_id, filename)
+            )
+            self._conn.commit()
+            return self._aliases(scope, document_id)
+
+    def aliases(self, scope, document_ids):
+        """{document_id: [filename, ...]} for the documents that have aliases"""
+        document_ids = list(document_ids)
+        if not document_ids:
+            return {}
+        found = {}
+        with self._lock:
+            for start in range(0, len(document_ids), 500):
+                batch = document_ids[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT document_id, filename FROM aliases WHERE scope = ? AND document_id IN ({','.join('?' * len(batch))}) "
+                    "ORDER BY rowid", (scope, *batch)
+                ).fetchall()
+                for document_id, filename in rows:
+                    found.setdefault(document_id, []).append(filename)
+        return found
+
+    def delete_document(self, scope, document_id):
+        """Forget a deleted document so its content can be ingested again"""
+        with self._lock:
+            deleted = self._conn.execute(
+                "DELETE FROM documents WHERE scope = ? AND document_id = ?", (scope, document_id)
+            ).rowcount
+            self._conn.execute("DELETE FROM aliases WHERE scope = ? AND document_id = ?", (scope, document_id))
+            self._conn.commit()
+        return deleted
+
+    def delete_index(self, index_name):
+        """Forget the documents of every namespace of a deleted index"""
+        prefix = self.scope(index_name, '')
+        with self._lock:
+            for table in ('documents', 'aliases'):
+                self._conn.execute(f"DELETE FROM {table} WHERE substr(scope, 1, ?) = ?", (len(prefix), prefix))
+            self._conn.commit()
+
+
+_index = None
+_index_lock = threading.Lock()
+_document_index = None
+
+
+def get_index(path):
+    """Process-wide near-duplicate index (lazily opened)"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            logging.info(f"Opening near-duplicate index at {path}")
+            _index = NearDuplicateIndex(path)
+    return _index
+
+
+def get_document_index(path):
+    """Process-wide whole-document hash index (lazily opened)"""
+    global _document_index
+    with _index_lock:
+        if _document_index is None:
+            logging.info(f"Opening document hash index at {path}")
+            _document_index = DocumentHashIndex(path)
+    return _document_index
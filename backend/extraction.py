@@ -0,0 +1,211 @@
+"""
+Shared text extraction
+One place that turns uploaded file bytes into text for ingestion
+(/api/upload, bulk and resumable uploads) and for /api/analyse-document,
+including the spreadsheet column profiles used for analysis.
+Results are cached on disk keyed by (sha256 of the bytes, extractor,
+extractor version, options), so a file that is analysed and then ingested -
+or uploaded again under another name - is parsed once. The cache is a
+SQLite file of compressed text with least-recently-used eviction down to a
+byte budget.
+
+Bump an extractor's version when its output changes; old entries are then
+never read again and age out.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from io import BytesIO
+
+import spreadsheet_profile
+
+
+def extract_text_from_pdf(file_bytes):
+    """Extract text from PDF file"""
+    import PyPDF2
+    pdf_file = BytesIO(file_bytes)
+    pdf_reader = PyPDF2.PdfReader(pdf_file)
+    text = ""
+    for page in pdf_reader.pages:
+        text += page.extract_text() + "\n\n"
+    return text
+
+
+def extract_text_from_docx(file_bytes):
+    """Extract text from DOCX file"""
+    import docx
+    doc_file = BytesIO(file_bytes)
+    doc = docx.Document(doc_file)
+    text = "\n".join([paragraph.text for paragraph in doc.paragraphs])
+    return text
+
+
+def extract_text_from_excel(file_bytes):
+    """Extract text from every sheet of an Excel workbook"""
+    import pandas as pd
+    xls = pd.ExcelFile(BytesIO(file_bytes))
+    text = ""
+    for sheet_name in xls.sheet_names:
+        df = pd.read_excel(xls, sheet_name)
+        text += f"\n\n=== Sheet: {sheet_name} ===\n"
+        text += df.to_string()
+    return text
+
+
+def extract_text_from_csv(file_bytes):
+    import pandas as pd
+    return pd.read_csv(BytesIO(file_bytes)).to_string()
+
+
+def extract_text_from_txt(file_bytes):
+    return file_bytes.decode('utf-8')
+
+
+def profile_spreadsheet(file_bytes, file_format):
+    """Column profile of a workbook / CSV as JSON (see spreadsheet_profile.py)"""
+    return json.dumps(spreadsheet_profile.profile_workbook(file_bytes, file_format))
+
+
+# extractor: (version, function(file_bytes, **options))
+EXTRACTORS = {
+    'pdf': (1, extract_text_from_pdf),
+    'docx': (1, extract_text_from_docx),
+    'excel': (1, extract_text_from_excel),
+    'csv': (1, extract_text_from_csv),
+    'text': (1, extract_text_from_txt),
+    'spreadsheet_profile': (1, profile_spreadsheet),
+}
+EXTENSIONS = {'pdf': 'pdf', 'docx': 'docx', 'doc': 'docx', 'xlsx': 'excel', 'xls': 'excel', 'csv': 'csv', 'txt': 'text'}
+UNCACHED = ('text',)  # decoding is cheaper than a cache lookup
+
+
+def extractor_for(filename):
+    extension = filename.lower().split('.')[-1]
+    if extension not in EXTENSIONS:
+        raise ValueError(f"Unsupported file type: {extension}")
+    return EXTENSIONS[extension]
+
+
+class ExtractionCache:
+    """SQLite-backed (sha256, extractor, version, options) -> compressed text with LRU eviction"""
+
+    def __init__(self, path, max_bytes=512 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS extractions (
+                sha256 TEXT NOT NULL,
+                extractor TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                options TEXT NOT NULL,
+                data BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (sha256, extractor, version, options)
+            );
+            CREATE INDEX IF NOT EXISTS extractions_last_used ON extractions (last_used);
+        """)
+        self._conn.commit()
+
+    def get(self, sha256, extractor, version, options):
+        with self._lock:
+            key = (sha256, extractor, version, options)
+            row = self._conn.execute(
+                "SELECT data FROM extractions WHERE sha256 = ? AND extractor = ? AND version = ? AND options = ?", key
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE extractions SET last_used = ? WHERE sha256 = ? AND extractor = ? AND version = ? AND options = ?",
+                (time.time(), *key)
+            )
+            self._conn.commit()
+        try:
+            return zlib.decompress(row[0]).decode('utf-8')
+        except Exception as e:
+            logging.warning(f"Unable to decode cached extraction {sha256[:12]} ({extractor}): {e}")
+            return None
+
+    def put(self, sha256, extractor, version, options, text):
+        """Store an extraction, then evict least recently used entries until the cache fits max_bytes"""
+        data = zlib.compress(text.encode('utf-8'), 6)
+        if len(data) > self.max_bytes // 4:
+            return False  # one file would flush most of the cache
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO extractions (sha256, extractor, version, options, data, size, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (sha256, extractor, version, options, data, len(data), time.time())
+            )
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM extractions").fetchone()[0]
+            evicted = 0
+            if total > self.max_bytes:
+                # Down to 90% so the next few puts don't each evict again
+                target = total - int(self.max_bytes * 0.9)
+                freed = 0
+                for rowid, size in self._conn.execute("SELECT rowid, size FROM extractions ORDER BY last_used").fetchall():
+                    if freed >= target:
+                        break
+                    self._conn.execute("DELETE FROM extractions WHERE rowid = ?", (rowid,))
+                    freed += size
+                    evicted += 1
+            self._conn.commit()
+        if evicted:
+            logging.info(f"Extraction cache evicted {evicted} entries")
+        return True
+
+    def stats(self):
+        with self._lock:
+            entries, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM extractions").fetchone()
+        return {'entries': entries, 'bytes': total, 'max_bytes': self.max_bytes}
+
+
+def extract(file_bytes, filename, cache=None, sha256=None, extractor=None, **options):
+    """
+    Text of an uploaded file. The extractor is picked from the filename unless given. Returns
+    (text, hit) where hit is True / False for a cache hit / miss and None when no cache was used.
+    """
+    extractor = extractor or extractor_for(filename)
+    version, function = EXTRACTORS[extractor]
+    if cache is None or extractor in UNCACHED:
+        return function(file_bytes, **options), None
+    sha256 = sha256 or hashlib.sha256(file_bytes).hexdigest()
+    options_key = json.dumps(options, sort_keys=True)
+    text = cache.get(sha256, extractor, version, options_key)
+    if text is not None:
+        return text, True
+    text = function(file_bytes, **options)
+    cache.put(sha256, extractor, version, options_key, text)
+    return text, False
+
+
+def cached(cache, sha256, extractor, **options):
+    """Text an earlier extract() stored for content with this sha256, or None - the file itself is not needed"""
+    version, _ = EXTRACTORS[extractor]
+    return cache.get(sha256, extractor, version, json.dumps(options, sort_keys=True))
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache(path, max_bytes=512 * 1024 * 1024):
+    """Process-wide extraction cache (lazily opened)"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            logging.info(f"Opening extraction cache at {path}")
+            _cache = ExtractionCache(path, max_bytes)
+    return _cache
@@ -0,0 +1,139 @@
+"""
+Gunicorn configuration - production entry point for the Knowledge Base API
+
+    cd backend && gunicorn -c gunicorn.conf.py app:app
+
+Worker model: WEB_CONCURRENCY processes x GUNICORN_THREADS threads (gthread).
+Requests spend most of their time waiting on Gemini / Pinecone / crawled
+sites, so threads give cheap concurrency while processes give CPU
+parallelism for extraction and chunking.
+"""
+
+import logging
+import multiprocessing
+import os
+import shutil
+import signal
+import sys
+import tempfile
+import time
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5001')}"
+
+# Free tiers (512MB) fit about two workers with pandas and the parsers loaded
+workers = int(os.environ.get('WEB_CONCURRENCY', min(2, multiprocessing.cpu_count())))
+threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+worker_class = 'gthread'
+
+# The local vector store keeps namespace state in memory - a single process is required
+if os.environ.get('VECTOR_STORE_BACKEND', 'pinecone').lower() == 'local' and workers > 1:
+    print("⚠️ VECTOR_STORE_BACKEND=local supports a single worker process - forcing workers=1")
+    workers = 1
+
+# Crawls with Playwright and large uploads can take minutes
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '300'))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', '120'))
+# Seconds kept back from the drain so the worker exits on its own before the master's SIGKILL
+DRAIN_MARGIN = 2
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', '5'))
+
+# Recycle workers periodically to cap memory growth from parser libraries
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', '1000'))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', '100'))
+
+# Import the app once in the master so workers share configuration and modules copy-on-write
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+# Heavy SDKs are imported lazily; opt in to importing them in the master before forking
+# (shared memory, slower first boot) when instances are long-lived
+warm_imports = os.environ.get('GUNICORN_WARM_IMPORTS', 'false').lower() == 'true'
+
+# Workers write metric snapshots here and /metrics sums them (set before the app is imported).
+# Only a directory created here is removed as a whole; one set by the operator just loses the snapshots.
+metrics_dir = os.environ.get('METRICS_MULTIPROCESS_DIR')
+owns_metrics_dir = not metrics_dir
+if owns_metrics_dir:
+    metrics_dir = os.environ['METRICS_MULTIPROCESS_DIR'] = os.path.join(tempfile.gettempdir(), f"kb-metrics-{os.getpid()}")
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def clear_metrics_dir():
+    """Remove the metric snapshots (<pid>.json, archive.json, .lock) - or the whole directory if it is ours"""
+    if owns_metrics_dir:
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+        return
+    if not os.path.isdir(metrics_dir):
+        return
+    for filename in os.listdir(metrics_dir):
+        stem = filename[:-len('.tmp')] if filename.endswith('.tmp') else filename
+        name, extension = os.path.splitext(stem)
+        if (extension == '.json' and (name.isdigit() or name == 'archive')) or filename == '.lock':
+            try:
+                os.remove(os.path.join(metrics_dir, filename))
+            except FileNotFoundError:
+                pass
+
+
+def on_starting(server):
+    """Start every server with empty metrics (snapshots of a previous run's workers are meaningless)"""
+    clear_metrics_dir()
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+def on_exit(server):
+    clear_metrics_dir()
+
+
+def when_ready(server):
+    """Runs in the master after the app is loaded and before workers are forked"""
+    app_module = sys.modules.get('app')
+    if warm_imports and preload_app and app_module is not None:
+        app_module.warm_up()
+
+
+def post_worker_init(worker):
+    """Note when SIGTERM arrives, start metric snapshots and the re-crawl scheduler (the registry caps concurrent syncs)"""
+    worker.exit_requested_at = None
+    handle_exit = signal.getsignal(signal.SIGTERM)
+
+    def handle_term(sig, frame):
+        # The master SIGKILLs the worker graceful_timeout after this signal
+        if worker.exit_requested_at is None:
+            worker.exit_requested_at = time.monotonic()
+        handle_exit(sig, frame)
+
+    signal.signal(signal.SIGTERM, handle_term)
+
+    app_module = sys.modules.get('app')
+    if app_module is None:
+        return
+    app_module.metrics.REGISTRY.start_worker()
+    if app_module.CRAWL_SYNC_ENABLED:
+        app_module.start_sync_scheduler()
+
+
+def drain_budget(worker):
+    """Seconds the worker can still spend draining before the master kills it"""
+    requested_at = getattr(worker, 'exit_requested_at', None)
+    if requested_at is not None:
+        # gthread has already spent part of the window finishing open requests
+        return max(graceful_timeout - (time.monotonic() - requested_at) - DRAIN_MARGIN, 0)
+    # Recycled (max_requests) workers are killed once silent for `timeout`; gthread may already
+    # have spent up to graceful_timeout of that on open requests
+    return max(min(graceful_timeout, timeout - graceful_timeout - DRAIN_MARGIN), 0)
+
+
+def worker_exit(server, worker):
+    """Wait for in-flight ingest jobs (including background ones) before the worker goes away"""
+    app_module = sys.modules.get('app')
+    if app_module is None:
+        return
+    budget = drain_budget(worker)
+    drained = app_module.inflight_jobs.drain(timeout=budget)
+    logging.info(f"Worker {worker.pid} exiting (ingest jobs drained: {drained}, budget {budget:.0f}s)")
+    if worker.pid == os.getpid():
+        # Final snapshot; the next scrape folds it into the archive
+        app_module.metrics.REGISTRY.flush()
@@ -0,0 +1,290 @@
+"""
+Streaming crawl -> chunk -> embed -> upsert pipeline
+Each stage runs in its own thread (embedding can use several) and hands work
+to the next through a bounded queue, so a full queue blocks the stage feeding
+it. Chunks from many pages are coalesced into full embedding batches and
+vectors into full upsert batches; a partial batch is flushed once its stage has
+waited `linger` seconds for more input.
+"""
+
+import contextvars
+import logging
+import queue
+import threading
+import time
+
+_DONE = object()
+
+
+class PageJob:
+    """Progress of one page through the pipeline (index is 1-based, in crawl order)"""
+
+    def __init__(self, index, page):
+        self.index = index
+        self.page = page
+        self.document = None
+        self.chunk_count = 0
+        self.pending = 0  # chunks not yet upserted
+        self.stored = []  # ids of vectors upserted so far, discarded if the page fails later
+        self.dropped = False
+        self.error = None
+
+    @property
+    def ok(self):
+        return self.error is None and self.document is not None and self.pending == 0
+
+    def fail(self, error):
+        if self.error is None:
+            self.error = error
+
+    def release(self):
+        """Drop the page text, images and chunk texts once they are stored; keeps what callers report"""
+        self.page.pop('text', None)
+        self.page.pop('images', None)
+        if self.document is not None:
+            self.document.pop('chunks', None)
+
+
+class StreamingIngest:
+    """
+    Runs pages through prepare -> embed -> store concurrently.
+
+    prepare(page, index) returns a document dict with a 'chunks' list (raise to fail the page,
+    return None to drop it, e.g. as a duplicate), embed(texts) returns one embedding per text,
+    build_vector(document, chunk_index, embedding) returns the vector to store and
+    store(vectors) writes one batch. on_success(job) / on_failure(job) are called once for
+    every page that was / could not be ingested; a page whose on_success raises is failed, and
+    neither callback can stop the pipeline. discard(vector_ids) deletes the vectors a
+    failed page had already stored, so a retry does not leave a partial copy behind. Page and chunk texts of finished pages are
+    released (PageJob.release), so memory does not grow with the length of the crawl.
+    """
+
+    def __init__(self, prepare, embed, build_vector, store, embed_batch_size=100, upsert_batch_size=100,
+                 page_queue_size=4, queue_size=256, linger=0.05, embed_workers=1, queue_gauge=None, on_success=None, on_failure=None,
+                 discard=None):
+        self.prepare = prepare
+        self.embed = embed
+        self.build_vector = build_vector
+        self.store = store
+        self.embed_batch_size = max(1, embed_batch_size)
+        self.upsert_batch_size = max(1, upsert_batch_size)
+        self.linger = linger
+        self.embed_workers = max(1, embed_workers)
+        self.queue_gauge = queue_gauge
+        self.on_success = on_success
+        self.on_failure = on_failure
+        self.discard = discard
+        self._pages = queue.Queue(maxsize=max(1, page_queue_size))
+        self._chunks = queue.Queue(maxsize=max(self.embed_batch_size, queue_size))
+        self._vectors = queue.Queue(maxsize=max(self.upsert_batch_size, queue_size))
+        self._abort = threading.Event()
+        self._lock = threading.Lock()
+        self._embedders_running = self.embed_workers
+        self._crawl_error = None
+        self.jobs = []
+        self.stats = {'embed_batches': 0, 'embedded_chunks': 0, 'upsert_batches': 0, 'upserted_vectors': 0}
+
+    # -- queue helpers -----------------------------------------------------------
+
+    def _put(self, name, target, item):
+        # Blocks while the queue is full (backpressure) but gives up if the pipeline aborted
+        while not self._abort.is_set():
+            try:
+                target.put(item, timeout=0.1)
+            except queue.Full:
+                continue
+            if self.queue_gauge and item is not _DONE:
+                self.queue_gauge.inc(queue=name)
+            return True
+        return False
+
+    def _get(self, name, source, timeout=None):
+        # Raises queue.Empty after timeout; reads as _DONE once the pipeline aborted
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if self._abort.is_set():
+                return _DONE
+            wait = 0.1 if deadline is None else min(0.1, deadline - time.monotonic())
+            try:
+                item = source.get(timeout=max(0.0, wait))
+                break
+            except queue.Empty:
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise
+        if self.queue_gauge and item is not _DONE:
+            self.queue_gauge.dec(queue=name)
+        return item
+
+    def _get_batch(self, name, source, size):
+        """Block for one item, then take more until size items or `linger` seconds pass; returns (items, done)"""
+        first = self._get(name, source)
+        if first is _DONE:
+            return [], True
+        items = [first]
+        deadline = time.monotonic() + self.linger
+        while len(items) < size:
+            try:
+                item = self._get(name, source, timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is _DONE:
+                return items, True
+            items.append(item)
+        return items, False
+
+    def _fail(self, job, error):
+        if job.error is None:
+            job.fail(error)
+            self._discard_stored(job)
+            if self.on_failure:
+                try:
+                    self.on_failure(job)
+                except Exception as callback_error:
+                    logging.warning(f"on_failure callback for page {job.index} raised: {callback_error}")
+
+    def _discard_stored(self, job):
+        # job.error is set first, so a batch the writer stores concurrently is discarded by the writer
+        with self._lock:
+            vector_ids, job.stored = job.stored, []
+        if vector_ids and self.discard:
+            try:
+                self.discard(vector_ids)
+            except Exception as error:
+                logging.warning(f"Unable to discard {len(vector_ids)} vectors of failed page {job.index}: {error}")
+
+    # -- stages ------------------------------------------------------------------
+
+    def _crawl(self, pages):
+        try:
+            for index, page in enumerate(pages, start=1):
+                if not self._put('ingest_pages', self._pages, (index, page)):
+                    return
+        except Exception as error:
+            self._crawl_error = error
+        finally:
+            self._put('ingest_pages', self._pages, _DONE)
+
+    def _chunk(self):
+        while True:
+            item = self._get('ingest_pages', self._pages)
+            if item is _DONE:
+                break
+            job = PageJob(*item)
+            self.jobs.append(job)
+            try:
+                job.document = self.prepare(job.page, job.index)
+                if job.document is None:
+                    job.dropped = True
+                    job.release()
+                    continue
+                job.pending = job.chunk_count = len(job.document['chunks'])
+            except Exception as error:
+                self._fail(job, error)
+                continue
+            for chunk_index in range(job.pending):
+                if not self._put('ingest_chunks', self._chunks, (job, chunk_index)):
+                    return
+        for _ in range(self.embed_workers):
+            self._put('ingest_chunks', self._chunks, _DONE)
+
+    def _embed_items(self, items):
+        texts = [job.document['chunks'][chunk_index]['text'] for job, chunk_index in items]
+        embeddings = self.embed(texts)
+        with self._lock:
+            self.stats['embed_batches'] += 1
+            self.stats['embedded_chunks'] += len(texts)
+        for (job, chunk_index), embedding in zip(items, embeddings):
+            vector = self.build_vector(job.document, chunk_index, embedding)
+            if not self._put('ingest_vectors', self._vectors, (job, vector)):
+                return
+
+    def _embed(self):
+        try:
+            done = False
+            while not done:
+                items, done = self._get_batch('ingest_chunks', self._chunks, self.embed_batch_size)
+                items = [item for item in items if item[0].error is None]
+                if not items:
+                    continue
+                try:
+                    self._embed_items(items)
+                except Exception as error:
+                    pages = list(dict.fromkeys(job for job, _ in items))
+                    if len(pages) == 1:
+                        self._fail(pages[0], error)
+                        continue
+                    # Retry page by page so one bad page doesn't sink the others sharing its batch
+                    logging.warning(f"Embedding batch across {len(pages)} pages failed ({error}); retrying per page")
+                    for page_job in pages:
+                        try:
+                            self._embed_items([item for item in items if item[0] is page_job])
+                        except Exception as page_error:
+                            self._fail(page_job, page_error)
+        finally:
+            with self._lock:
+                self._embedders_running -= 1
+                last = self._embedders_running == 0
+            if last:
+                self._put('ingest_vectors', self._vectors, _DONE)
+
+    def _write(self):
+        done = False
+        while not done:
+            items, done = self._get_batch('ingest_vectors', self._vectors, self.upsert_batch_size)
+            items = [item for item in items if item[0].error is None]
+            if not items:
+                continue
+            try:
+                self.store([vector for _, vector in items])
+            except Exception as error:
+                with self._lock:
+                    # Part of the batch may have been written before the error
+                    for job, vector in items:
+                        job.stored.append(vector['id'])
+                for job in dict.fromkeys(job for job, _ in items):
+                    self._fail(job, error)
+                continue
+            self.stats['upsert_batches'] += 1
+            self.stats['upserted_vectors'] += len(items)
+            for job, vector in items:
+                with self._lock:
+                    job.stored.append(vector['id'])
+                job.pending -= 1
+            for job in dict.fromkeys(job for job, _ in items):
+                if job.error is not None:
+                    # Failed (in an embed worker) while this batch was being written
+                    self._discard_stored(job)
+                elif job.ok:
+                    if self.on_success:
+                        try:
+                            self.on_success(job)
+                        except Exception as error:
+                            # e.g. a bookkeeping store is locked: fail this page only, the rest keep draining
+                            logging.warning(f"on_success callback for page {job.index} raised: {error}")
+                            self._fail(job, error)
+                            continue
+                    job.stored = []
+                    job.release()  # pages are not accumulated for the length of the crawl
+
+    # -- entry point ---------------------------------------------------------------
+
+    def _start(self, target, *args):
+        # Stage threads inherit the caller's context so spans land in the request trace
+        thread = threading.Thread(target=contextvars.copy_context().run, args=(target, *args), daemon=True)
+        thread.start()
+        return thread
+
+    def run(self, pages):
+        """Ingest an iterable of pages; returns the PageJobs in page order"""
+        threads = [self._start(self._crawl, pages), self._start(self._chunk)]
+        threads.extend(self._start(self._embed) for _ in range(self.embed_workers))
+        try:
+            self._write()
+        finally:
+            # Unblock any stage still waiting on a full queue if the writer stopped early
+            self._abort.set()
+            for thread in threads:
+                thread.join()
+        if self._crawl_error is not None:
+            raise self._crawl_error
+        return sorted(self.jobs, key=lambda job: job.index)
@@ -0,0 +1,61 @@
+"""
+Process lifecycle helpers for production serving
+Tracks in-flight ingest jobs so a worker can drain them before exiting
+"""
+
+import functools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+
+class InflightTracker:
+    """Counts running jobs by kind and lets shutdown wait for them to finish"""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._active = {}
+
+    @contextmanager
+    def track(self, kind):
+        with self._condition:
+            self._active[kind] = self._active.get(kind, 0) + 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._active[kind] -= 1
+                if not self._active[kind]:
+                    del self._active[kind]
+                self._condition.notify_all()
+
+    def job(self, kind):
+        """Decorator form of track() for route handlers"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.track(kind):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def active(self):
+        with self._condition:
+            return dict(self._active)
+
+    def drain(self, timeout):
+        """Block until no jobs are running or timeout expires; returns True if drained"""
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while self._active:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logging.warning(f"Shutdown drain timed out with jobs still running: {self._active}")
+                    return False
+                logging.info(f"Draining in-flight jobs before exit: {self._active}")
+                self._condition.wait(timeout=min(remaining, 5))
+        return True
+
+
+inflight_jobs = InflightTracker()
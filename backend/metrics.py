@@ -0,0 +1,349 @@
+"""
+In-process metrics with Prometheus text exposition
+Counters, gauges and fixed-bucket histograms guarded by a single lock each -
+cheap enough to leave on in production.
+
+Values are kept per process. Under gunicorn (multiprocess mode) every worker
+also writes a snapshot of its values to a shared directory every few
+seconds, and a scrape of any worker sums the snapshots of all of them.
+Counters and histograms of workers that have exited are folded into an
+archive file so totals never go backwards; their gauges are dropped.
+"""
+
+import bisect
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import ContextDecorator
+
+# Seconds - spans fast CPU stages (ms) through Playwright fetches (tens of seconds)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def items(self):
+        """{label_values: value} snapshot of this process"""
+        with self._lock:
+            return dict(self._values)
+
+    @staticmethod
+    def merge(total, value):
+        return (total or 0) + value
+
+    def reset(self):
+        """Start from zero (a forked worker must not repeat the parent's values)"""
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def collect(self, items=None):
+        items = sorted((self.items() if items is None else items).items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {value}" for key, value in items
+        ]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), callback=None):
+        super().__init__(name, documentation, labelnames)
+        self._callback = callback
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def items(self):
+        if self._callback:
+            # Callback returns {label_value_tuple: value}, evaluated at scrape / snapshot time
+            return {tuple(str(value) for value in key): value for key, value in self._callback().items()}
+        return super().items()
+
+
+class _Timer(ContextDecorator):
+    def __init__(self, histogram, labels):
+        self._histogram = histogram
+        self._labels = labels
+
+    def _recreate_cm(self):
+        # Used as a decorator, each call gets its own start time (threads share the decorator)
+        return _Timer(self._histogram, self._labels)
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._histogram.observe(time.perf_counter() - self._started, **self._labels)
+        return False
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][position] += 1
+            series[1] += value
+            series[2] += 1
+
+    def totals(self):
+        """{label_values: (sum, count)} snapshot, for benchmarks and tests"""
+        with self._lock:
+            return {key: (series[1], series[2]) for key, series in self._values.items()}
+
+    def time(self, **labels):
+        """Context manager / decorator recording elapsed seconds"""
+        return _Timer(self, labels)
+
+    def items(self):
+        with self._lock:
+            return {key: [list(series[0]), series[1], series[2]] for key, series in self._values.items()}
+
+    @staticmethod
+    def merge(total, value):
+        if total is None:
+            return [list(value[0]), value[1], value[2]]
+        return [[a + b for a, b in zip(total[0], value[0])], total[1] + value[1], total[2] + value[2]]
+
+    def collect(self, items=None):
+        items = sorted((self.items() if items is None else items).items())
+        lines = self.header()
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', le))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self.multiprocess_dir = None
+        self._flusher = None
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def snapshot(self):
+        """{metric name: [[label values, value], ...]} for this process"""
+        return {metric.name: [[list(key), value] for key, value in metric.items().items()] for metric in self._metrics}
+
+    def enable_multiprocess(self, directory):
+        """Sum values across the processes writing snapshots to `directory` (call before serving)"""
+        os.makedirs(directory, exist_ok=True)
+        self.multiprocess_dir = directory
+
+    def start_worker(self, interval=5.0):
+        """
+        In a freshly forked worker: drop values inherited from the parent and write this process's
+        snapshot every `interval` seconds
+        """
+        if not self.multiprocess_dir:
+            return
+        for metric in self._metrics:
+            metric.reset()
+
+        def flush_periodically():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.flush()
+                except Exception as e:
+                    logging.warning(f"Unable to write metrics snapshot: {e}")
+
+        self._flusher = threading.Thread(target=flush_periodically, name='metrics-flush', daemon=True)
+        self._flusher.start()
+
+    def flush(self):
+        """Write this process's snapshot (atomically) to the multiprocess directory"""
+        if not self.multiprocess_dir:
+            return
+        path = os.path.join(self.multiprocess_dir, f"{os.getpid()}.json")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as handle:
+            json.dump(self.snapshot(), handle)
+        os.replace(tmp_path, path)
+
+    def _aggregate(self):
+        kinds = {metric.name: metric for metric in self._metrics}
+        totals = {metric.name: {} for metric in self._metrics}
+
+        def add(snapshot, include_gauges=True):
+            for name, series in snapshot.items():
+                metric = kinds.get(name)
+                if metric is None or (metric.kind == 'gauge' and not include_gauges):
+                    continue
+                for key, value in series:
+                    key = tuple(key)
+                    totals[name][key] = metric.merge(totals[name].get(key), value)
+
+        directory = self.multiprocess_dir
+        archive_path = os.path.join(directory, 'archive.json')
+        with open(os.path.join(directory, '.lock'), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                snapshots = {}
+                for filename in os.listdir(directory):
+                    pid, extension = os.path.splitext(filename)
+                    if extension != '.json' or not pid.isdigit():
+                        continue
+                    try:
+                        with open(os.path.join(directory, filename)) as handle:
+                            snapshots[int(pid)] = json.load(handle)
+                    except (OSError, ValueError):
+                        continue
+                archive = {}
+                if os.path.exists(archive_path):
+                    with open(archive_path) as handle:
+                        archive = json.load(handle)
+                dead = [pid for pid in snapshots if pid != os.getpid() and not _pid_alive(pid)]
+                if dead:
+                    # Fold exited workers' counters and histograms into the archive
+                    add(archive)
+                    for pid in dead:
+                        add(snapshots.pop(pid), include_gauges=False)
+                    archive = {
+                        name: [[list(key), value] for key, value in series.items()]
+                        for name, series in totals.items() if kinds[name].kind != 'gauge'
+                    }
+                    with open(f"{archive_path}.tmp", 'w') as handle:
+                        json.dump(archive, handle)
+                    os.replace(f"{archive_path}.tmp", archive_path)
+                    for pid in dead:
+                        os.remove(os.path.join(directory, f"{pid}.json"))
+                    totals = {metric.name: {} for metric in self._metrics}
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+        add(archive)
+        for pid, snapshot in snapshots.items():
+            if pid != os.getpid():
+                add(snapshot)
+        add(self.snapshot())
+        return totals
+
+    def exposition(self):
+        totals = self._aggregate() if self.multiprocess_dir else {}
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.collect(totals.get(metric.name) if self.multiprocess_dir else None))
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Pipeline stages: extract_text, chunk_text, generate_embeddings, upsert, index_query, generate_content
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    'kb_stage_duration_seconds', 'Duration of ingestion and retrieval pipeline stages', ['stage']
+))
+FETCH_SECONDS = REGISTRY.register(Histogram(
+    'kb_fetch_duration_seconds', 'Duration of page fetch attempts by fetcher and outcome', ['fetcher', 'outcome']
+))
+HTTP_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    'kb_http_request_duration_seconds', 'HTTP request latency by route', ['route', 'method']
+))
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    'kb_http_requests_total', 'HTTP requests by route and status', ['route', 'method', 'status']
+))
+ERRORS = REGISTRY.register(Counter(
+    'kb_errors_total', 'Errors by component', ['component']
+))
+RETRIES = REGISTRY.register(Counter(
+    'kb_retries_total', 'Retries and fallbacks by operation', ['operation']
+))
+CACHE_REQUESTS = REGISTRY.register(Counter(
+    'kb_cache_requests_total', 'Cache lookups by cache and result (hit/miss)', ['cache', 'result']
+))
+QUEUE_DEPTH = REGISTRY.register(Gauge(
+    'kb_queue_depth', 'Current depth of internal work queues', ['queue']
+))
+DEDUP_SKIPPED = REGISTRY.register(Counter(
+    'kb_dedup_skipped_total', 'Duplicate content skipped at ingest by kind (document/page/chunk)', ['kind']
+))
+SYNC_RUNS = REGISTRY.register(Counter(
+    'kb_sync_runs_total', 'Scheduled / on-demand re-crawls of registered sources by status (ok/failed)', ['status']
+))
+SYNC_PAGES = REGISTRY.register(Counter(
+    'kb_sync_pages_total', 'Pages seen by re-crawls by outcome (new/changed/unchanged/gone/duplicate/failed)', ['outcome']
+))
@@ -0,0 +1,132 @@
+"""
+Sampling profiler for on-demand production profiling
+A background thread snapshots Python stacks with sys._current_frames() at a
+fixed interval, so the profiled code runs unmodified (no tracing hooks).
+Output is flamegraph-compatible collapsed stacks plus a top-N function table.
+"""
+
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+
+_SITE_MARKERS = (os.sep + 'site-packages' + os.sep, os.sep + 'dist-packages' + os.sep)
+
+
+def _frame_label(code):
+    filename = code.co_filename
+    for marker in _SITE_MARKERS:
+        if marker in filename:
+            filename = filename.split(marker, 1)[1]
+            break
+    else:
+        filename = os.path.basename(filename)
+    # ';' separates frames in collapsed stacks
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(';', ':')
+
+
+class SamplingProfiler:
+    """Samples the given thread ids (default: every other thread) until stopped"""
+
+    def __init__(self, interval=0.01, thread_ids=None, exclude_thread_ids=(), max_depth=128):
+        self.interval = interval
+        self.thread_ids = set(thread_ids) if thread_ids else None
+        self.exclude_thread_ids = set(exclude_thread_ids)
+        self.max_depth = max_depth
+        self.stacks = Counter()
+        self.samples = 0
+        self.started_at = None
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is None or self._stop.is_set():
+            return self
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.time() - self.started_at
+        return self
+
+    def _run(self):
+        excluded = self.exclude_thread_ids | {threading.get_ident()}
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id in excluded or (self.thread_ids and thread_id not in self.thread_ids):
+                    continue
+                labels = []
+                while frame is not None and len(labels) < self.max_depth:
+                    labels.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                if labels:
+                    self.stacks[';'.join(reversed(labels))] += 1
+                    self.samples += 1
+
+    def collapsed(self):
+        """Brendan Gregg collapsed format - feed to flamegraph.pl, speedscope or inferno"""
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def top(self, limit=25):
+        self_counts, total_counts = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(';')
+            self_counts[frames[-1]] += count
+            for function in set(frames):
+                total_counts[function] += count
+        total = self.samples or 1
+        return [{
+            'function': function,
+            'self_samples': self_counts[function],
+            'total_samples': total_samples,
+            'self_percent': round(100.0 * self_counts[function] / total, 2),
+            'total_percent': round(100.0 * total_samples / total, 2)
+        } for function, total_samples in sorted(
+            total_counts.items(), key=lambda item: (self_counts[item[0]], item[1]), reverse=True
+        )[:limit]]
+
+    def summary(self, limit=25):
+        return {
+            'samples': self.samples,
+            'interval_ms': self.interval * 1000,
+            'duration_seconds': round(self.duration, 3),
+            'top': self.top(limit)
+        }
+
+
+class ProfileStore:
+    """Keeps the most recent finished profiles so they can be downloaded after the request"""
+
+    def __init__(self, max_profiles=20):
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+        self._profiles = OrderedDict()
+
+    def add(self, profiler, label):
+        profile_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            self._profiles[profile_id] = (label, profiler)
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+        return profile_id
+
+    def get(self, profile_id):
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def list(self):
+        with self._lock:
+            return [{
+                'id': profile_id,
+                'label': label,
+                'samples': profiler.samples,
+                'started_at': profiler.started_at,
+                'duration_seconds': round(profiler.duration, 3)
+            } for profile_id, (label, profiler) in reversed(self._profiles.items())]
@@ -0,0 +1,179 @@
+"""
+Rerank stage for semantic search results
+Rescores an over-fetched candidate set on CPU and keeps the best top_n
+"""
+
+import importlib.util
+import logging
+import math
+import re
+import time
+from collections import Counter
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    """Lowercase alphanumeric tokens (keeps postal codes and unit numbers intact)"""
+    return TOKEN_PATTERN.findall((text or '').lower())
+
+
+class LexicalScorer:
+    """
+    BM25 scorer computed over the candidate set itself
+    Blended with the dense score so semantic matches are not thrown away
+    """
+
+    name = 'lexical'
+
+    def __init__(self, k1=1.2, b=0.75, dense_weight=0.5):
+        self.k1 = k1
+        self.b = b
+        self.dense_weight = dense_weight
+
+    def load(self):
+        pass
+
+    def prepare(self, query, candidates):
+        """Compute corpus statistics for the candidate set once per query"""
+        docs = [tokenize(candidate['text']) for candidate in candidates]
+        doc_freq = Counter()
+        for tokens in docs:
+            doc_freq.update(set(tokens))
+        total = len(docs) or 1
+        avg_len = (sum(len(tokens) for tokens in docs) / total) or 1.0
+        idf = {
+            term: math.log(1 + (total - freq + 0.5) / (freq + 0.5))
+            for term, freq in doc_freq.items()
+        }
+        return {
+            'query_terms': set(tokenize(query)),
+            'docs': docs,
+            'idf': idf,
+            'avg_len': avg_len
+        }
+
+    def score_batch(self, state, candidates, start):
+        """Score candidates[start:start + len(candidates)] against the prepared state"""
+        scores = []
+        for offset, candidate in enumerate(candidates):
+            tokens = state['docs'][start + offset]
+            term_counts = Counter(tokens)
+            length_norm = 1 - self.b + self.b * len(tokens) / state['avg_len']
+            bm25 = 0.0
+            for term in state['query_terms']:
+                tf = term_counts.get(term, 0)
+                if tf:
+                    bm25 += state['idf'].get(term, 0.0) * tf * (self.k1 + 1) / (tf + self.k1 * length_norm)
+            scores.append(bm25)
+        return scores
+
+    def finalize(self, candidates, raw_scores):
+        """Normalise BM25 into [0, 1] and blend with the dense similarity"""
+        top = max(raw_scores) if raw_scores else 0.0
+        blended = []
+        for candidate, raw in zip(candidates, raw_scores):
+            lexical = raw / top if top > 0 else 0.0
+            dense = candidate.get('score') or 0.0
+            blended.append(self.dense_weight * dense + (1 - self.dense_weight) * lexical)
+        return blended
+
+
+class CrossEncoderScorer:
+    """Small local cross-encoder (sentence-transformers) loaded once per process"""
+
+    name = 'cross-encoder'
+    _models = {}
+
+    def __init__(self, model_name):
+        self.model_name = model_name
+
+    @classmethod
+    def available(cls):
+        # sentence-transformers pulls in torch - only check it is installed, import on first use
+        return importlib.util.find_spec('sentence_transformers') is not None
+
+    def _model(self):
+        model = self._models.get(self.model_name)
+        if model is None:
+            from sentence_transformers import CrossEncoder
+            logging.info(f"Loading rerank model {self.model_name}...")
+            model = CrossEncoder(self.model_name, device='cpu')
+            self._models[self.model_name] = model
+        return model
+
+    def load(self):
+        """Load the model ahead of scoring so the first rerank is not spent loading it"""
+        self._model()
+
+    def prepare(self, query, candidates):
+        return {'query': query}
+
+    def score_batch(self, state, candidates, start):
+        pairs = [(state['query'], candidate['text']) for candidate in candidates]
+        return [float(score) for score in self._model().predict(pairs, batch_size=len(pairs))]
+
+    def finalize(self, candidates, raw_scores):
+        return raw_scores
+
+
+def get_scorer(method, model_name=None):
+    """Resolve the configured scorer, falling back to lexical when the model stack is missing"""
+    if method == 'cross-encoder':
+        if CrossEncoderScorer.available() and model_name:
+            return CrossEncoderScorer(model_name)
+        logging.warning("Cross-encoder reranking unavailable - falling back to lexical scorer")
+    return LexicalScorer()
+
+
+def rerank(query, candidates, top_n, scorer, budget_ms=250, batch_size=32):
+    """
+    Rescore candidates in batches and return (top_n candidates, info)
+
+    Each candidate is a dict with at least 'text' and 'score'. When scoring
+    runs past the latency budget the original (dense) order is returned.
+    Loading the scorer's model is not counted against the budget.
+    """
+    info = {
+        'method': scorer.name,
+        'candidates': len(candidates),
+        'applied': False,
+        'fallback': None,
+        'latency_ms': 0.0
+    }
+
+    if not candidates:
+        return [], info
+
+    started = time.perf_counter()
+    try:
+        scorer.load()
+        started = time.perf_counter()
+        state = scorer.prepare(query, candidates)
+        raw_scores = []
+        for start in range(0, len(candidates), batch_size):
+            batch = candidates[start:start + batch_size]
+            raw_scores.extend(scorer.score_batch(state, batch, start))
+            if (time.perf_counter() - started) * 1000 > budget_ms:
+                info['fallback'] = 'latency_budget_exceeded'
+                break
+        if info['fallback'] is None:
+            final_scores = scorer.finalize(candidates, raw_scores)
+    except Exception as e:
+        logging.warning(f"Rerank failed, keeping dense order: {e}")
+        info['fallback'] = 'error'
+
+    info['latency_ms'] = round((time.perf_counter() - started) * 1000, 2)
+
+    if info['fallback']:
+        return candidates[:top_n], info
+
+    order = sorted(range(len(candidates)), key=lambda i: (-final_scores[i], i))
+    reranked = []
+    for position in order[:top_n]:
+        candidate = dict(candidates[position])
+        candidate['rerank_score'] = float(final_scores[position])
+        reranked.append(candidate)
+
+    info['applied'] = True
+    return reranked, info
@@ -0,0 +1,102 @@
+"""
+LLM response cache
+Generated answers stored in a local SQLite file under a key built from
+everything that determines the prompt, so the same request - from any
+worker - is answered without calling the model again. Entries expire after
+ttl_seconds, and past max_entries the least recently used go first.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+
+def make_key(*parts):
+    """Stable hash of JSON-serialisable key parts"""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed key -> text cache with a TTL and an entry limit"""
+
+    def __init__(self, path, ttl_seconds=86400, max_entries=10000):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS responses_created ON responses (created_at);
+            CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+        """)
+        self._conn.commit()
+
+    def get(self, key):
+        """The cached text, or None when missing or older than ttl_seconds"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] < now - self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return row[0]
+
+    def put(self, key, value):
+        """Store text, dropping expired entries and then the least recently used beyond max_entries"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, value, now, now)
+            )
+            expired = self._conn.execute(
+                "DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,)
+            ).rowcount
+            count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            evicted = 0
+            if count > self.max_entries:
+                evicted = self._conn.execute(
+                    "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_used LIMIT ?)",
+                    (count - self.max_entries,)
+                ).rowcount
+            self._conn.commit()
+        if expired or evicted:
+            logging.info(f"Response cache dropped {expired} expired and {evicted} least recently used entries")
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {'entries': entries, 'max_entries': self.max_entries, 'ttl_seconds': self.ttl_seconds}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache(path, ttl_seconds=86400, max_entries=10000):
+    """Process-wide response cache (lazily opened)"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            logging.info(f"Opening response cache at {path}")
+            _cache = ResponseCache(path, ttl_seconds, max_entries)
+    return _cache
@@ -0,0 +1,281 @@
+"""
+Resumable chunked uploads
+An upload is initiated with its filename and total size, its bytes arrive as
+PUT byte ranges written straight into a spool file, and it is completed once
+every byte is in. Sessions live in a local SQLite file next to the spool
+directory, so any worker can take the next range and a client that lost its
+connection asks for the received offset and continues from there.
+
+The sha256 of the content is updated as ranges arrive. The running hash is
+kept per process; a worker that did not see the earlier ranges rebuilds it
+from the spool file once.
+
+Session status: uploading -> uploaded (all bytes in) -> ingesting -> ingested,
+or back to uploaded when ingestion fails so completing can be retried.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+
+from werkzeug.exceptions import ClientDisconnected
+
+READ_SIZE = 1024 * 1024
+CONTENT_RANGE_PATTERN = re.compile(r"bytes (\d+)-(\d+)/(\d+|\*)$")
+
+
+class UploadError(ValueError):
+    """The request does not fit the upload session (bad range, wrong state)"""
+
+
+class UploadConflict(UploadError):
+    """The range does not start at or before the received offset, or the session is busy"""
+
+
+def parse_content_range(header):
+    """(start, end inclusive, total or None) from a 'bytes start-end/total' Content-Range header"""
+    match = CONTENT_RANGE_PATTERN.match((header or '').strip())
+    if not match:
+        raise UploadError("Content-Range must be 'bytes <start>-<end>/<total>'")
+    start, end = int(match.group(1)), int(match.group(2))
+    total = None if match.group(3) == '*' else int(match.group(3))
+    if end < start:
+        raise UploadError("Content-Range end is before its start")
+    return start, end, total
+
+
+class UploadSessions:
+    """SQLite-backed upload sessions with one spool file each"""
+
+    def __init__(self, path, spool_dir, max_bytes=2 * 1024 ** 3, ttl_seconds=86400):
+        self.path = path
+        self.spool_dir = spool_dir
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._hashes = {}  # upload_id -> (offset, running sha256) for ranges this process wrote
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        os.makedirs(spool_dir, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS uploads (
+                upload_id TEXT PRIMARY KEY,
+                filename TEXT NOT NULL,
+                project TEXT NOT NULL,
+                index_name TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                received INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL,
+                sha256 TEXT,
+                document_id TEXT,
+                result TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+        """)
+        self._conn.commit()
+
+    def _spool_path(self, upload_id):
+        return os.path.join(self.spool_dir, f"{upload_id}.part")
+
+    @staticmethod
+    def _session(row):
+        keys = ('upload_id', 'filename', 'project', 'index_name', 'size', 'received', 'status', 'sha256',
+                'document_id', 'result', 'created_at', 'updated_at')
+        return dict(zip(keys, row)) if row else None
+
+    def create(self, filename, size, project, index_name):
+        """Start a session for `size` bytes; returns it"""
+        if size <= 0:
+            raise UploadError("size must be a positive number of bytes")
+        if size > self.max_bytes:
+            raise UploadError(f"Upload is larger than {self.max_bytes} bytes")
+        self.expire()
+        upload_id = uuid.uuid4().hex
+        now = time.time()
+        open(self._spool_path(upload_id), 'wb').close()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO uploads (upload_id, filename, project, index_name, size, status, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, 'uploading', ?, ?)",
+                (upload_id, filename, project, index_name, size, now, now)
+            )
+            self._conn.commit()
+        return self.get(upload_id)
+
+    def get(self, upload_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT upload_id, filename, project, index_name, size, received, status, sha256, document_id, "
+                "result, created_at, updated_at FROM uploads WHERE upload_id = ?", (upload_id,)
+            ).fetchone()
+        return self._session(row)
+
+    def _running_hash(self, upload_id, offset):
+        cached = self._hashes.get(upload_id)
+        if cached and cached[0] == offset:
+            return cached[1].copy()
+        # Earlier ranges went to another worker (or before a restart): rehash what is on disk
+        digest = hashlib.sha256()
+        with open(self._spool_path(upload_id), 'rb') as spool:
+            remaining = offset
+            while remaining:
+                block = spool.read(min(READ_SIZE, remaining))
+                if not block:
+                    raise UploadError("Spool file is shorter than the received offset")
+                digest.update(block)
+                remaining -= len(block)
+        return digest
+
+    def write(self, upload_id, start, stream, length=None):
+        """
+        Write a byte range read from `stream` at offset `start` and return the session. The range
+        may overlap bytes already received (a retried part) - the overlap is skipped - but must
+        not start past the received offset. Raises KeyError for an unknown upload.
+        """
+        session = self.get(upload_id)
+        if session is None:
+            raise KeyError(upload_id)
+        if session['status'] != 'uploading':
+            if session['received'] == session['size']:
+                return session
+            raise UploadConflict(f"Upload is {session['status']}")
+        received = session['received']
+        if start > received:
+            raise UploadConflict(f"Range starts at {start} but only {received} bytes have been received")
+
+        digest = self._running_hash(upload_id, received)
+        skip, offset = received - start, received
+        with open(self._spool_path(upload_id), 'r+b') as spool:
+            spool.seek(received)
+            remaining, disconnected = length, False
+            while remaining is None or remaining > 0:
+                try:
+                    block = stream.read(READ_SIZE if remaining is None else min(READ_SIZE, remaining))
+                except (ClientDisconnected, OSError):
+                    disconnected = True
+                    break
+                if not block:
+                    break
+                if remaining is not None:
+                    remaining -= len(block)
+                if skip:
+                    dropped = min(skip, len(block))
+                    block, skip = block[dropped:], skip - dropped
+                if offset + len(block) > session['size']:
+                    raise UploadError(f"Range runs past the declared size of {session['size']} bytes")
+                spool.write(block)
+                digest.update(block)
+                offset += len(block)
+
+        # Bytes that arrived before a dropped connection still count, so the client resumes after them
+        status = 'uploaded' if offset == session['size'] else 'uploading'
+        with self._lock:
+            # Only the writer that started from the current offset moves it forward
+            advanced = self._conn.execute(
+                "UPDATE uploads SET received = ?, status = ?, sha256 = ?, updated_at = ? "
+                "WHERE upload_id = ? AND received = ? AND status = 'uploading'",
+                (offset, status, digest.hexdigest() if status == 'uploaded' else None, time.time(), upload_id, received)
+            ).rowcount
+            self._conn.commit()
+        if not advanced:
+            self._hashes.pop(upload_id, None)
+            raise UploadConflict("Another request wrote to this upload at the same time")
+        if status == 'uploaded':
+            self._hashes.pop(upload_id, None)
+        else:
+            self._hashes[upload_id] = (offset, digest)
+        if disconnected or remaining:
+            raise UploadError(f"Connection closed before the end of the range; received {offset} bytes")
+        return self.get(upload_id)
+
+    def begin_ingest(self, upload_id, lease_seconds=900):
+        """
+        Move an uploaded session to ingesting; False if it is not fully uploaded or another request
+        is ingesting it. An ingestion silent for lease_seconds (its worker died) may be taken over.
+        """
+        now = time.time()
+        with self._lock:
+            claimed = self._conn.execute(
+                "UPDATE uploads SET status = 'ingesting', updated_at = ? WHERE upload_id = ? "
+                "AND (status = 'uploaded' OR (status = 'ingesting' AND updated_at < ?))",
+                (now, upload_id, now - lease_seconds)
+            ).rowcount
+            self._conn.commit()
+        return bool(claimed)
+
+    def read(self, upload_id):
+        with open(self._spool_path(upload_id), 'rb') as spool:
+            return spool.read()
+
+    def finish(self, upload_id, document_id, result):
+        """Record the ingested document and drop the spool file"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE uploads SET status = 'ingested', document_id = ?, result = ?, updated_at = ? WHERE upload_id = ?",
+                (document_id, result, time.time(), upload_id)
+            )
+            self._conn.commit()
+        self._remove_spool(upload_id)
+
+    def fail(self, upload_id):
+        """Ingestion failed: keep the spool file so completing can be retried"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE uploads SET status = 'uploaded', updated_at = ? WHERE upload_id = ? AND status = 'ingesting'",
+                (time.time(), upload_id)
+            )
+            self._conn.commit()
+
+    def remove(self, upload_id):
+        with self._lock:
+            removed = self._conn.execute("DELETE FROM uploads WHERE upload_id = ?", (upload_id,)).rowcount
+            self._conn.commit()
+        self._hashes.pop(upload_id, None)
+        self._remove_spool(upload_id)
+        return bool(removed)
+
+    def expire(self):
+        """Drop sessions (and spool files) not written to within ttl_seconds; ingested records are kept"""
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            stale = [row[0] for row in self._conn.execute(
+                "SELECT upload_id FROM uploads WHERE status IN ('uploading', 'uploaded') AND updated_at < ?", (cutoff,)
+            ).fetchall()]
+            if stale:
+                self._conn.executemany("DELETE FROM uploads WHERE upload_id = ?", [(upload_id,) for upload_id in stale])
+                self._conn.commit()
+        for upload_id in stale:
+            self._hashes.pop(upload_id, None)
+            self._remove_spool(upload_id)
+        if stale:
+            logging.info(f"Expired {len(stale)} unfinished uploads")
+        return len(stale)
+
+    def _remove_spool(self, upload_id):
+        try:
+            os.remove(self._spool_path(upload_id))
+        except FileNotFoundError:
+            pass
+
+
+_sessions = None
+_sessions_lock = threading.Lock()
+
+
+def get_sessions(path, spool_dir, max_bytes=2 * 1024 ** 3, ttl_seconds=86400):
+    """Process-wide upload session store (lazily opened)"""
+    global _sessions
+    with _sessions_lock:
+        if _sessions is None:
+            logging.info(f"Opening upload sessions at {path}")
+            _sessions = UploadSessions(path, spool_dir, max_bytes, ttl_seconds)
+    return _sessions
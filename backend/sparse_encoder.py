@@ -0,0 +1,216 @@
+"""
+BM25 sparse vectors for hybrid (dense + sparse) Pinecone retrieval
+Per-namespace vocabulary statistics are kept in a local SQLite file and
+updated incrementally at ingest time - no full-corpus pass required.
+Each document's contribution is recorded too, so deleting or re-ingesting
+it takes its counts back out.
+"""
+
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import zlib
+from collections import Counter
+
+from reranker import tokenize
+
+
+def token_index(token):
+    """Stable 32-bit sparse dimension for a token (no global vocabulary needed)"""
+    return zlib.crc32(token.encode('utf-8')) & 0xffffffff
+
+
+class BM25Vocabulary:
+    """
+    Incremental BM25 statistics per (index, namespace)
+
+    Documents are encoded with BM25 term-frequency saturation using the
+    running average chunk length; queries are encoded with IDF weights
+    from the current document frequencies, following the usual Pinecone
+    sparse-dense recipe.
+    """
+
+    def __init__(self, path, k1=1.2, b=0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS corpus (
+                scope TEXT PRIMARY KEY,
+                doc_count INTEGER NOT NULL,
+                total_length INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS doc_freq (
+                scope TEXT NOT NULL,
+                token INTEGER NOT NULL,
+                df INTEGER NOT NULL,
+                PRIMARY KEY (scope, token)
+            );
+            CREATE TABLE IF NOT EXISTS documents (
+                scope TEXT NOT NULL,
+                document_id TEXT NOT NULL,
+                doc_count INTEGER NOT NULL,
+                total_length INTEGER NOT NULL,
+                doc_freq BLOB NOT NULL,
+                PRIMARY KEY (scope, document_id)
+            );
+        """)
+        self._conn.commit()
+
+    @staticmethod
+    def scope(index_name, namespace):
+        return f"{index_name}/{namespace}"
+
+    def _corpus(self, scope):
+        row = self._conn.execute(
+            "SELECT doc_count, total_length FROM corpus WHERE scope = ?", (scope,)
+        ).fetchone()
+        return row if row else (0, 0)
+
+    def _apply(self, scope, doc_count, total_length, doc_freq, sign=1):
+        """Add (sign=1) or subtract (sign=-1) counts; caller holds the lock"""
+        self._conn.execute(
+            "INSERT INTO corpus (scope, doc_count, total_length) VALUES (?, ?, ?) "
+            "ON CONFLICT(scope) DO UPDATE SET doc_count = MAX(doc_count + excluded.doc_count, 0), "
+            "total_length = MAX(total_length + excluded.total_length, 0)",
+            (scope, sign * doc_count, sign * total_length)
+        )
+        self._conn.executemany(
+            "INSERT INTO doc_freq (scope, token, df) VALUES (?, ?, ?) "
+            "ON CONFLICT(scope, token) DO UPDATE SET df = df + excluded.df",
+            [(scope, token, sign * df) for token, df in doc_freq.items()]
+        )
+        if sign < 0:
+            self._conn.execute("DELETE FROM doc_freq WHERE scope = ? AND df <= 0", (scope,))
+
+    def add_documents(self, scope, token_lists, document_ids=None):
+        """
+        Fold a batch of tokenised chunks into the namespace statistics. With document_ids (one per
+        chunk) each document's share is recorded so remove_document can take it out again.
+        """
+        per_document = {}
+        for position, tokens in enumerate(token_lists):
+            document_id = document_ids[position] if document_ids else None
+            stats = per_document.setdefault(document_id, [0, 0, Counter()])
+            stats[0] += 1
+            stats[1] += len(tokens)
+            stats[2].update({token_index(token) for token in tokens})
+
+        with self._lock:
+            for document_id, (doc_count, total_length, doc_freq) in per_document.items():
+                self._apply(scope, doc_count, total_length, doc_freq)
+                if document_id is None:
+                    continue
+                row = self._conn.execute(
+                    "SELECT doc_count, total_length, doc_freq FROM documents WHERE scope = ? AND document_id = ?",
+                    (scope, document_id)
+                ).fetchone()
+                if row:
+                    # A document stored over several batches (streamed crawl pages)
+                    doc_count += row[0]
+                    total_length += row[1]
+                    doc_freq = doc_freq + Counter({int(token): df for token, df in json.loads(zlib.decompress(row[2])).items()})
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO documents (scope, document_id, doc_count, total_length, doc_freq) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (scope, document_id, doc_count, total_length, zlib.compress(json.dumps(doc_freq).encode('utf-8')))
+                )
+            self._conn.commit()
+
+    def remove_document(self, scope, document_id):
+        """Take a deleted document's chunks back out of the statistics; False if it was never recorded"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT doc_count, total_length, doc_freq FROM documents WHERE scope = ? AND document_id = ?",
+                (scope, document_id)
+            ).fetchone()
+            if row is None:
+                return False
+            doc_freq = {int(token): df for token, df in json.loads(zlib.decompress(row[2])).items()}
+            self._apply(scope, row[0], row[1], doc_freq, sign=-1)
+            self._conn.execute("DELETE FROM documents WHERE scope = ? AND document_id = ?", (scope, document_id))
+            self._conn.commit()
+        return True
+
+    def delete_index(self, index_name):
+        """Drop the statistics of every namespace of a deleted index"""
+        prefix = self.scope(index_name, '')
+        with self._lock:
+            for table in ('corpus', 'doc_freq', 'documents'):
+                self._conn.execute(f"DELETE FROM {table} WHERE substr(scope, 1, ?) = ?", (len(prefix), prefix))
+            self._conn.commit()
+
+    def encode_documents(self, scope, texts, document_ids=None):
+        """Update statistics with the new chunks and return their sparse vectors"""
+        token_lists = [tokenize(text) for text in texts]
+        self.add_documents(scope, token_lists, document_ids)
+
+        with self._lock:
+            doc_count, total_length = self._corpus(scope)
+        avg_length = (total_length / doc_count) if doc_count else 1.0
+
+        vectors = []
+        for tokens in token_lists:
+            counts = Counter(token_index(token) for token in tokens)
+            length_norm = 1 - self.b + self.b * len(tokens) / (avg_length or 1.0)
+            indices = sorted(counts)
+            values = [
+                counts[idx] * (self.k1 + 1) / (counts[idx] + self.k1 * length_norm)
+                for idx in indices
+            ]
+            vectors.append({'indices': indices, 'values': values})
+        return vectors
+
+    def encode_query(self, scope, text):
+        """IDF-weighted query vector, normalised so alpha scaling stays comparable"""
+        indices = sorted({token_index(token) for token in tokenize(text)})
+        if not indices:
+            return {'indices': [], 'values': []}
+
+        with self._lock:
+            doc_count, _ = self._corpus(scope)
+            placeholders = ','.join('?' for _ in indices)
+            rows = self._conn.execute(
+                f"SELECT token, df FROM doc_freq WHERE scope = ? AND token IN ({placeholders})",
+                (scope, *indices)
+            ).fetchall()
+        doc_freq = dict(rows)
+
+        values = [
+            math.log(1 + (doc_count - doc_freq.get(idx, 0) + 0.5) / (doc_freq.get(idx, 0) + 0.5))
+            for idx in indices
+        ]
+        total = sum(values) or 1.0
+        return {'indices': indices, 'values': [value / total for value in values]}
+
+
+def hybrid_scale(dense, sparse, alpha):
+    """Convex combination: alpha=1 is pure dense, alpha=0 is pure sparse"""
+    if not 0 <= alpha <= 1:
+        raise ValueError("alpha must be between 0 and 1")
+    return (
+        [value * alpha for value in dense],
+        {'indices': sparse['indices'], 'values': [value * (1 - alpha) for value in sparse['values']]}
+    )
+
+
+_vocabulary = None
+_vocabulary_lock = threading.Lock()
+
+
+def get_vocabulary(path):
+    """Process-wide vocabulary store (lazily opened)"""
+    global _vocabulary
+    with _vocabulary_lock:
+        if _vocabulary is None:
+            logging.info(f"Opening BM25 vocabulary store at {path}")
+            _vocabulary = BM25Vocabulary(path)
+    return _vocabulary
@@ -0,0 +1,271 @@
+"""
+Spreadsheet profiling for document analysis
+Profiles every column of an uploaded workbook or CSV in one pass: inferred
+type, null rate, min/max/mean and the most common values, plus row counts.
+Rows are read in chunks (pandas chunksize for CSV, openpyxl read-only rows
+for .xlsx) and each chunk is summarised with vectorized pandas/NumPy, so a
+large sheet is never held in memory whole. format_profile renders the result
+as a compact block for an LLM prompt.
+"""
+
+import itertools
+import math
+from io import BytesIO
+
+CHUNK_ROWS = 50000
+TOP_K = 5
+MAX_TRACKED_VALUES = 1000  # distinct values counted per column before counts become approximate
+NUMERIC_SHARE = 0.95  # share of non-null values that must parse as numbers for a numeric column
+CATEGORY_MAX_DISTINCT = 50
+SAMPLE_SIZE = 200  # values checked before parsing a text column as numbers or dates
+
+
+class ColumnProfile:
+    """Running statistics for one column, merged chunk by chunk"""
+
+    def __init__(self, name):
+        self.name = name
+        self.rows = 0
+        self.nulls = 0
+        self.numeric = 0
+        self.integral = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.dates = 0
+        self.date_min = None
+        self.date_max = None
+        self.booleans = 0
+        self.counts = {}
+        self.approximate = False
+
+    def _add_dates(self, dates):
+        self.dates += len(dates)
+        if len(dates):
+            low, high = dates.min(), dates.max()
+            self.date_min = low if self.date_min is None else min(self.date_min, low)
+            self.date_max = high if self.date_max is None else max(self.date_max, high)
+
+    def _add_numbers(self, values):
+        import numpy as np
+
+        finite = values[np.isfinite(values)]
+        if finite.size:
+            self.numeric += finite.size
+            self.integral += int(np.count_nonzero(finite == np.floor(finite)))
+            self.total += float(finite.sum())
+            low, high = float(finite.min()), float(finite.max())
+            self.min = low if self.min is None else min(self.min, low)
+            self.max = high if self.max is None else max(self.max, high)
+
+    def update(self, series):
+        import numpy as np
+        import pandas as pd
+
+        self.rows += len(series)
+        present = series.dropna()
+        if present.dtype == object:
+            # Blank cells read from CSV / openpyxl as empty strings count as missing
+            present = present[present.astype(str).str.strip() != '']
+        self.nulls += len(series) - len(present)
+        if present.empty:
+            return
+
+        kind = pd.api.types.infer_dtype(present, skipna=True)
+        if kind == 'boolean':
+            self.booleans += len(present)
+        elif pd.api.types.is_datetime64_any_dtype(present) or kind in ('datetime', 'datetime64', 'date'):
+            self._add_dates(pd.to_datetime(present, errors='coerce').dropna())
+            return
+        elif pd.api.types.is_numeric_dtype(present):
+            self._add_numbers(present.to_numpy(dtype='float64'))
+            return  # categories are only reported for non-numeric columns
+        elif kind == 'string':
+            # Text cells may still hold numbers or dates; a sample decides before parsing the whole chunk
+            sample = present.head(SAMPLE_SIZE)
+            if pd.to_numeric(sample, errors='coerce').notna().mean() >= 0.5:
+                self._add_numbers(pd.to_numeric(present, errors='coerce').to_numpy(dtype='float64', na_value=np.nan))
+            elif pd.to_datetime(sample, errors='coerce', format='mixed').notna().mean() >= NUMERIC_SHARE:
+                self._add_dates(pd.to_datetime(present, errors='coerce', format='mixed').dropna())
+        else:
+            # Mixed cells (typed spreadsheet values): count whatever parses as a number
+            self._add_numbers(pd.to_numeric(present, errors='coerce').to_numpy(dtype='float64', na_value=np.nan))
+
+        counts = present.astype(str).str.strip().value_counts()
+        if len(counts) > MAX_TRACKED_VALUES:
+            # High-cardinality column: merge only this chunk's most frequent values
+            counts = counts.head(MAX_TRACKED_VALUES)
+            self.approximate = True
+        for value, count in counts.items():
+            self.counts[value] = self.counts.get(value, 0) + int(count)
+        if len(self.counts) > MAX_TRACKED_VALUES:
+            kept = sorted(self.counts.items(), key=lambda item: item[1], reverse=True)[:MAX_TRACKED_VALUES // 2]
+            self.counts = dict(kept)
+            self.approximate = True
+
+    def dtype(self):
+        present = self.rows - self.nulls
+        if not present:
+            return 'empty'
+        if self.booleans == present:
+            return 'boolean'
+        if self.dates >= NUMERIC_SHARE * present:
+            return 'datetime'
+        if self.numeric >= NUMERIC_SHARE * present:
+            return 'integer' if self.integral == self.numeric else 'float'
+        if not self.approximate and len(self.counts) <= CATEGORY_MAX_DISTINCT and len(self.counts) <= present / 2:
+            return 'categorical'
+        return 'text'
+
+    def result(self, top_k=TOP_K):
+        dtype = self.dtype()
+        profile = {
+            'name': self.name,
+            'dtype': dtype,
+            'rows': self.rows,
+            'nulls': self.nulls,
+            'null_rate': round(self.nulls / self.rows, 4) if self.rows else 0.0,
+            'distinct': len(self.counts),
+            'distinct_approximate': self.approximate
+        }
+        if dtype in ('integer', 'float'):
+            profile.update(min=_number(self.min), max=_number(self.max), mean=_number(self.total / self.numeric))
+        elif dtype == 'datetime' and self.date_min is not None:
+            profile.update(min=self.date_min.isoformat(), max=self.date_max.isoformat())
+        if dtype not in ('integer', 'float', 'datetime'):
+            top = sorted(self.counts.items(), key=lambda item: (-item[1], item[0]))[:top_k]
+            profile['top'] = [[value, count] for value, count in top]
+        return profile
+
+
+def _number(value):
+    if value is None or not math.isfinite(value):
+        return None
+    return int(value) if value == int(value) and abs(value) < 2 ** 53 else round(value, 4)
+
+
+def _column_names(header):
+    names, seen = [], {}
+    for position, name in enumerate(header):
+        name = str(name).strip() if name is not None and str(name).strip() else f"Column {position + 1}"
+        seen[name] = seen.get(name, 0) + 1
+        names.append(name if seen[name] == 1 else f"{name}.{seen[name] - 1}")
+    return names
+
+
+def _xlsx_frames(file_bytes, chunk_rows):
+    import openpyxl
+    import pandas as pd
+
+    workbook = openpyxl.load_workbook(BytesIO(file_bytes), read_only=True, data_only=True)
+    try:
+        for sheet in workbook.worksheets:
+            rows = sheet.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                yield sheet.title, pd.DataFrame()
+                continue
+            columns = _column_names(header)
+            emitted = False
+            while True:
+                # Short rows are padded, so every chunk of a sheet has the same columns
+                padding = (None,) * len(columns)
+                batch = [(tuple(row) + padding)[:len(columns)] for row in itertools.islice(rows, chunk_rows)]
+                if not batch:
+                    break
+                emitted = True
+                yield sheet.title, pd.DataFrame(batch, columns=columns)
+            if not emitted:
+                yield sheet.title, pd.DataFrame(columns=columns)
+    finally:
+        workbook.close()
+
+
+def iter_frames(file_bytes, file_format, chunk_rows=CHUNK_ROWS):
+    """Yields (sheet name, DataFrame of up to chunk_rows rows); file_format is 'csv', 'xlsx' or 'xls'"""
+    import pandas as pd
+
+    if file_format == 'csv':
+        for frame in pd.read_csv(BytesIO(file_bytes), chunksize=chunk_rows, low_memory=False):
+            yield 'Sheet1', frame
+    elif file_format == 'xlsx':
+        yield from _xlsx_frames(file_bytes, chunk_rows)
+    else:
+        # Legacy .xls has no streaming reader
+        for name, frame in pd.read_excel(BytesIO(file_bytes), sheet_name=None).items():
+            yield name, frame
+
+
+def profile_workbook(file_bytes, file_format, chunk_rows=CHUNK_ROWS, top_k=TOP_K, sample_rows=3):
+    """Profile of every sheet: row / column counts, per-column statistics and the first sample_rows rows"""
+    sheets = {}
+    for name, frame in iter_frames(file_bytes, file_format, chunk_rows):
+        sheet = sheets.setdefault(name, {'name': name, 'rows': 0, 'columns': {}, 'sample': []})
+        for column in frame.columns:
+            sheet['columns'].setdefault(str(column), ColumnProfile(str(column))).update(frame[column])
+        if len(sheet['sample']) < sample_rows and not frame.empty:
+            sample = frame.head(sample_rows - len(sheet['sample']))
+            sheet['sample'].extend(
+                {str(key): _sample_value(value) for key, value in row.items()} for row in sample.to_dict('records')
+            )
+        sheet['rows'] += len(frame)
+
+    result = []
+    for sheet in sheets.values():
+        columns = [column.result(top_k) for column in sheet['columns'].values()]
+        result.append({
+            'name': sheet['name'],
+            'rows': sheet['rows'],
+            'columns': len(columns),
+            'column_profiles': columns,
+            'sample': sheet['sample']
+        })
+    return {'sheets': result, 'total_rows': sum(sheet['rows'] for sheet in result)}
+
+
+def _sample_value(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if isinstance(value, (int, float, bool, str)):
+        return value
+    return str(value)
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return f"{value:,.4g}" if abs(value) < 1e4 else f"{value:,.0f}"
+    if isinstance(value, int):
+        return f"{value:,}"
+    return str(value)
+
+
+def format_profile(profile, max_columns=40, max_value_chars=40):
+    """Compact text for a prompt: one line per sheet and per column"""
+    lines = []
+    for sheet in profile['sheets']:
+        lines.append(f"Sheet \"{sheet['name']}\": {sheet['rows']:,} rows x {sheet['columns']} columns")
+        for column in sheet['column_profiles'][:max_columns]:
+            line = f"- {column['name']} ({column['dtype']}, {column['null_rate']:.1%} null"
+            if column['dtype'] in ('categorical', 'text'):
+                line += f", {column['distinct']:,}{'+' if column['distinct_approximate'] else ''} distinct"
+            line += ")"
+            if 'mean' in column:
+                line += f": min {_format_value(column['min'])}, max {_format_value(column['max'])}, mean {_format_value(column['mean'])}"
+            elif column['dtype'] == 'datetime' and 'min' in column:
+                line += f": {column['min'][:10]} to {column['max'][:10]}"
+            elif column['dtype'] == 'text' and column.get('top') and column['top'][0][1] == 1:
+                line += ": unique values, e.g. " + ", ".join(value[:max_value_chars] for value, _ in column['top'][:3])
+            elif column.get('top'):
+                present = column['rows'] - column['nulls']
+                line += ": top " + ", ".join(
+                    f"{value[:max_value_chars]} ({count / present:.0%})" for value, count in column['top']
+                )
+            lines.append(line)
+        if sheet['columns'] > max_columns:
+            lines.append(f"- ... {sheet['columns'] - max_columns} more columns")
+        for position, row in enumerate(sheet['sample'], 1):
+            cells = ", ".join(f"{key}={str(value)[:max_value_chars]}" for key, value in row.items())
+            lines.append(f"Row {position}: {cells}")
+    return "\n".join(lines)
@@ -0,0 +1,206 @@
+"""
+Lightweight in-process request tracing
+Spans are tracked with contextvars, summarised into a Server-Timing header
+and optionally exported as OTLP/JSON to a file or an OTLP HTTP collector
+"""
+
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+
+SERVICE_NAME = 'knowledge-base-api'
+
+_current_trace = contextvars.ContextVar('kb_trace', default=None)
+_current_span = contextvars.ContextVar('kb_span', default=None)
+
+
+class Span:
+    __slots__ = ('span_id', 'parent_id', 'name', 'start_ns', 'end_ns', 'attributes', 'error')
+
+    def __init__(self, name, parent_id, attributes):
+        self.span_id = '%016x' % random.getrandbits(64)
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes
+        self.error = None
+
+    @property
+    def duration_ms(self):
+        end_ns = self.end_ns or time.time_ns()
+        return (end_ns - self.start_ns) / 1e6
+
+
+class Trace:
+    def __init__(self, name, attributes=None):
+        self.trace_id = '%032x' % random.getrandbits(128)
+        self._lock = threading.Lock()
+        self.spans = []
+        self.root = self.add_span(name, None, attributes or {})
+
+    def add_span(self, name, parent_id, attributes):
+        span = Span(name, parent_id, attributes)
+        with self._lock:
+            self.spans.append(span)
+        return span
+
+    def server_timing(self, limit=8):
+        """Server-Timing header value: total plus the slowest span names (durations summed per name)"""
+        totals = {}
+        with self._lock:
+            for span in self.spans:
+                if span is not self.root and span.end_ns:
+                    totals[span.name] = totals.get(span.name, 0.0) + span.duration_ms
+        slowest = sorted(totals.items(), key=lambda item: item[1], reverse=True)[:limit]
+        entries = [f"total;dur={self.root.duration_ms:.1f}"]
+        entries.extend(f"{name.replace(' ', '_')};dur={duration:.1f}" for name, duration in slowest)
+        return ', '.join(entries)
+
+    def to_otlp(self):
+        def attributes(values):
+            encoded = []
+            for key, value in values.items():
+                if isinstance(value, bool):
+                    encoded.append({'key': key, 'value': {'boolValue': value}})
+                elif isinstance(value, int):
+                    encoded.append({'key': key, 'value': {'intValue': str(value)}})
+                elif isinstance(value, float):
+                    encoded.append({'key': key, 'value': {'doubleValue': value}})
+                else:
+                    encoded.append({'key': key, 'value': {'stringValue': str(value)}})
+            return encoded
+
+        with self._lock:
+            spans = list(self.spans)
+        return {
+            'resourceSpans': [{
+                'resource': {'attributes': attributes({'service.name': SERVICE_NAME, 'process.pid': os.getpid()})},
+                'scopeSpans': [{
+                    'scope': {'name': 'kb.tracing'},
+                    'spans': [{
+                        'traceId': self.trace_id,
+                        'spanId': span.span_id,
+                        'parentSpanId': span.parent_id or '',
+                        'name': span.name,
+                        'kind': 2 if span is self.root else 1,
+                        'startTimeUnixNano': str(span.start_ns),
+                        'endTimeUnixNano': str(span.end_ns or span.start_ns),
+                        'attributes': attributes(span.attributes),
+                        'status': {'code': 2, 'message': span.error} if span.error else {'code': 1}
+                    } for span in spans]
+                }]
+            }]
+        }
+
+
+class Exporter:
+    """Background exporter - drops traces rather than blocking requests when the queue is full"""
+
+    def __init__(self, mode, path=None, endpoint=None, max_queue=1000):
+        self.mode = mode
+        self.path = path
+        self.endpoint = endpoint
+        self.max_queue = max_queue
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def _ensure_worker(self):
+        # Started lazily (and again after fork) so preloaded gunicorn workers get their own thread
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue(maxsize=self.max_queue)
+                threading.Thread(target=self._run, args=(self._queue,), name='trace-exporter', daemon=True).start()
+                self._pid = os.getpid()
+
+    def submit(self, trace):
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self, pending):
+        while True:
+            trace = pending.get()
+            try:
+                payload = trace.to_otlp()
+                if self.mode == 'file':
+                    with open(self.path, 'a') as output:
+                        output.write(json.dumps(payload) + '\n')
+                elif self.mode == 'otlp':
+                    requests.post(self.endpoint, json=payload, timeout=5)
+            except Exception as e:
+                logging.warning(f"Trace export failed: {e}")
+
+
+class Tracer:
+    def __init__(self, sample_rate=0.0, exporter=None):
+        self.sample_rate = sample_rate
+        self.exporter = exporter
+
+    def start_trace(self, name, force=False, **attributes):
+        """Begin a trace for the current context if sampled; returns the Trace or None"""
+        if not force and (self.sample_rate <= 0 or random.random() >= self.sample_rate):
+            return None
+        trace = Trace(name, attributes)
+        _current_trace.set(trace)
+        _current_span.set(trace.root)
+        return trace
+
+    def finish_trace(self, trace, **attributes):
+        trace.root.attributes.update(attributes)
+        trace.root.end_ns = time.time_ns()
+        _current_trace.set(None)
+        _current_span.set(None)
+        if self.exporter:
+            self.exporter.submit(trace)
+
+
+@contextmanager
+def span(name, **attributes):
+    """Record a child span of the current span; a no-op when the request is not sampled"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    parent = _current_span.get()
+    child = trace.add_span(name, parent.span_id if parent else None, attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except Exception as e:
+        child.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        child.end_ns = time.time_ns()
+        _current_span.reset(token)
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+def create_tracer(sample_rate, export=None, export_path=None, otlp_endpoint=None):
+    exporter = None
+    if export == 'file' and export_path:
+        directory = os.path.dirname(export_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        exporter = Exporter('file', path=export_path)
+    elif export == 'otlp' and otlp_endpoint:
+        exporter = Exporter('otlp', endpoint=otlp_endpoint)
+    elif export:
+        logging.warning(f"Trace export '{export}' is missing its destination - traces will not be exported")
+    return Tracer(sample_rate=sample_rate, exporter=exporter)
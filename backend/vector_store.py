@@ -0,0 +1,517 @@
+"""
+Pluggable vector-store backends
+Pinecone for hosted deployments, plus a local NumPy store (memory-mapped
+float32 matrix per namespace, optional HNSW graph for large namespaces)
+that mirrors the subset of the Pinecone client API this service uses
+"""
+
+import json
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import threading
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+
+class PineconeVectorStore:
+    """Thin wrapper over the Pinecone client - index handles are returned untouched"""
+
+    supports_sparse = True
+
+    def __init__(self, api_key, cloud='aws', region='us-east-1'):
+        from pinecone import Pinecone, ServerlessSpec
+        self._client = Pinecone(api_key=api_key)
+        self._spec_class = ServerlessSpec
+        self.cloud = cloud
+        self.region = region
+
+    def list_indexes(self):
+        return self._client.list_indexes()
+
+    def describe_index(self, name):
+        return self._client.describe_index(name)
+
+    def create_index(self, name, dimension, metric='cosine'):
+        return self._client.create_index(
+            name=name,
+            dimension=dimension,
+            metric=metric,
+            spec=self._spec_class(cloud=self.cloud, region=self.region)
+        )
+
+    def delete_index(self, name):
+        return self._client.delete_index(name)
+
+    def Index(self, name):
+        return self._client.Index(name)
+
+
+# ---------------------------------------------------------------------------
+# Local backend - response objects mimic the Pinecone SDK attributes we read
+# ---------------------------------------------------------------------------
+
+class Match:
+    def __init__(self, id, score, metadata=None, values=None):
+        self.id = id
+        self.score = score
+        self.metadata = metadata
+        self.values = values or []
+
+
+class QueryResponse:
+    def __init__(self, matches, namespace):
+        self.matches = matches
+        self.namespace = namespace
+
+
+class NamespaceSummary:
+    def __init__(self, vector_count):
+        self.vector_count = vector_count
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+
+class IndexStats:
+    def __init__(self, dimension, namespaces):
+        self.dimension = dimension
+        self.namespaces = namespaces
+        self.total_vector_count = sum(ns.vector_count for ns in namespaces.values())
+
+
+class IndexDescription:
+    def __init__(self, name, dimension, metric, host):
+        self.name = name
+        self.dimension = dimension
+        self.metric = metric
+        self.host = host
+
+
+def _compare(value, operator, operand):
+    if operator == '$eq':
+        return value == operand
+    if operator == '$ne':
+        return value != operand
+    if operator == '$in':
+        return value in operand
+    if operator == '$nin':
+        return value not in operand
+    if operator == '$exists':
+        return (value is not None) == bool(operand)
+    if value is None:
+        return False
+    try:
+        if operator == '$gt':
+            return value > operand
+        if operator == '$gte':
+            return value >= operand
+        if operator == '$lt':
+            return value < operand
+        if operator == '$lte':
+            return value <= operand
+    except TypeError:
+        return False
+    raise ValueError(f"Unsupported filter operator: {operator}")
+
+
+def matches_filter(metadata, filter):
+    """Evaluate a Pinecone-style metadata filter against one record"""
+    if not filter:
+        return True
+    metadata = metadata or {}
+    for key, condition in filter.items():
+        if key == '$and':
+            if not all(matches_filter(metadata, sub) for sub in condition):
+                return False
+        elif key == '$or':
+            if not any(matches_filter(metadata, sub) for sub in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            if not all(_compare(value, op, operand) for op, operand in condition.items()):
+                return False
+        elif metadata.get(key) != condition:
+            return False
+    return True
+
+
+class LocalNamespace:
+    """
+    One namespace on disk: vectors.npy (float32, memory-mapped, grown by
+    doubling) plus a SQLite table mapping rows to IDs and metadata
+    """
+
+    def __init__(self, path, dimension, metric, hnsw_threshold):
+        self.path = path
+        self.dimension = dimension
+        self.metric = metric
+        self.hnsw_threshold = hnsw_threshold
+        self.lock = threading.RLock()
+        os.makedirs(path, exist_ok=True)
+
+        self._db = sqlite3.connect(os.path.join(path, 'records.sqlite'), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS records (row INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, metadata TEXT)"
+        )
+        self._db.commit()
+
+        self.row_ids = {}
+        self.row_metadata = {}
+        for row, vector_id, metadata in self._db.execute("SELECT row, id, metadata FROM records"):
+            self.row_ids[row] = vector_id
+            self.row_metadata[row] = json.loads(metadata) if metadata else {}
+        self.id_rows = {vector_id: row for row, vector_id in self.row_ids.items()}
+
+        matrix_path = os.path.join(path, 'vectors.npy')
+        if os.path.exists(matrix_path):
+            self.matrix = np.load(matrix_path, mmap_mode='r+')
+        else:
+            self.matrix = self._allocate(matrix_path, 1024)
+        self.next_row = (max(self.row_ids) + 1) if self.row_ids else 0
+        self.free_rows = sorted(set(range(self.next_row)) - set(self.row_ids))
+        self._hnsw = None
+        self._hnsw_labels = set()  # every label added to the graph, including marked-deleted ones
+
+    def _allocate(self, matrix_path, capacity):
+        return np.lib.format.open_memmap(
+            matrix_path, mode='w+', dtype=np.float32, shape=(capacity, self.dimension)
+        )
+
+    def _grow(self, required):
+        capacity = self.matrix.shape[0]
+        if required <= capacity:
+            return
+        while capacity < required:
+            capacity *= 2
+        matrix_path = os.path.join(self.path, 'vectors.npy')
+        tmp_path = matrix_path + '.tmp'
+        grown = np.lib.format.open_memmap(
+            tmp_path, mode='w+', dtype=np.float32, shape=(capacity, self.dimension)
+        )
+        grown[:self.matrix.shape[0]] = self.matrix
+        grown.flush()
+        del grown
+        self.matrix = None
+        os.replace(tmp_path, matrix_path)
+        self.matrix = np.load(matrix_path, mmap_mode='r+')
+
+    def _prepare(self, values):
+        vector = np.asarray(values, dtype=np.float32)
+        if vector.shape != (self.dimension,):
+            raise ValueError(f"Vector dimension {vector.shape[-1]} does not match index dimension {self.dimension}")
+        if self.metric == 'cosine':
+            norm = np.linalg.norm(vector)
+            if norm > 0:
+                vector = vector / norm
+        return vector
+
+    def upsert(self, records):
+        with self.lock:
+            rows_written = []
+            for vector_id, values, metadata in records:
+                row = self.id_rows.get(vector_id)
+                if row is None:
+                    row = self.free_rows.pop(0) if self.free_rows else self.next_row
+                    self.next_row = max(self.next_row, row + 1)
+                    self._grow(self.next_row)
+                self.matrix[row] = self._prepare(values)
+                self.row_ids[row] = vector_id
+                self.id_rows[vector_id] = row
+                self.row_metadata[row] = metadata or {}
+                rows_written.append(row)
+            self.matrix.flush()
+            self._db.executemany(
+                "INSERT OR REPLACE INTO records (row, id, metadata) VALUES (?, ?, ?)",
+                [(row, self.row_ids[row], json.dumps(self.row_metadata[row])) for row in rows_written]
+            )
+            self._db.commit()
+            if self._hnsw is not None:
+                self._hnsw_add(rows_written)
+            return len(rows_written)
+
+    def delete(self, ids=None, delete_all=False, filter=None):
+        with self.lock:
+            if delete_all:
+                rows = list(self.row_ids)
+            elif filter:
+                rows = [row for row, metadata in self.row_metadata.items() if matches_filter(metadata, filter)]
+            else:
+                rows = [self.id_rows[vector_id] for vector_id in (ids or []) if vector_id in self.id_rows]
+            for row in rows:
+                vector_id = self.row_ids.pop(row)
+                self.id_rows.pop(vector_id, None)
+                self.row_metadata.pop(row, None)
+                self.matrix[row] = 0
+                if self._hnsw is not None:
+                    self._hnsw.mark_deleted(row)
+            self.free_rows = sorted(set(self.free_rows) | set(rows))
+            self._db.executemany("DELETE FROM records WHERE row = ?", [(row,) for row in rows])
+            self._db.commit()
+            self.matrix.flush()
+            return len(rows)
+
+    def _hnsw_add(self, rows):
+        # Marked-deleted labels still take up capacity; only labels new to the graph add to the count
+        new_labels = [row for row in dict.fromkeys(rows) if row not in self._hnsw_labels]
+        capacity = self._hnsw.get_max_elements()
+        required = self._hnsw.get_current_count() + len(new_labels)
+        if required > capacity:
+            self._hnsw.resize_index(max(capacity * 2, required))
+        self._hnsw_labels.update(new_labels)
+        for row in rows:
+            try:
+                self._hnsw.unmark_deleted(row)
+            except RuntimeError:
+                pass
+        self._hnsw.add_items(self.matrix[rows], np.asarray(rows))
+
+    def _ensure_hnsw(self):
+        """Build the HNSW graph lazily once the namespace outgrows brute force"""
+        if hnswlib is None or len(self.row_ids) < self.hnsw_threshold:
+            return None
+        if self._hnsw is None:
+            logging.info(f"Building HNSW graph for {self.path} ({len(self.row_ids)} vectors)")
+            space = 'cosine' if self.metric == 'cosine' else 'ip'
+            graph = hnswlib.Index(space=space, dim=self.dimension)
+            graph.init_index(max_elements=max(len(self.row_ids) * 2, 1024), ef_construction=200, M=16)
+            rows = np.fromiter(self.row_ids.keys(), dtype=np.int64)
+            graph.add_items(self.matrix[rows], rows)
+            graph.set_ef(128)
+            self._hnsw = graph
+            self._hnsw_labels = set(rows.tolist())
+        return self._hnsw
+
+    def _brute_force(self, query, top_k, rows):
+        if not len(rows):
+            return [], []
+        scores = self.matrix[rows] @ query
+        if top_k < len(rows):
+            top = np.argpartition(-scores, top_k - 1)[:top_k]
+        else:
+            top = np.arange(len(rows))
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return rows[top].tolist(), scores[top].tolist()
+
+    def query(self, vector, top_k, filter=None):
+        top_k = max(1, int(top_k))
+        with self.lock:
+            if not self.row_ids:
+                return [], []
+            query = np.asarray(vector, dtype=np.float32)
+            norm = np.linalg.norm(query)
+            if self.metric == 'cosine' and norm > 0:
+                query = query / norm
+
+            if filter:
+                rows = np.fromiter(
+                    (row for row, metadata in self.row_metadata.items() if matches_filter(metadata, filter)),
+                    dtype=np.int64
+                )
+                # Restrictive filters are cheaper to brute-force than to over-fetch from the graph
+                if len(rows) < self.hnsw_threshold or norm == 0:
+                    return self._brute_force(query, top_k, rows)
+            else:
+                rows = None
+
+            graph = self._ensure_hnsw() if norm > 0 else None
+            if graph is None:
+                if rows is None:
+                    rows = np.fromiter(self.row_ids.keys(), dtype=np.int64)
+                return self._brute_force(query, top_k, rows)
+
+            allowed = set(rows.tolist()) if rows is not None else None
+            k = min(top_k * (4 if allowed is not None else 1), len(self.row_ids))
+            labels, distances = graph.knn_query(query, k=k)
+            result_rows, result_scores = [], []
+            for label, distance in zip(labels[0].tolist(), distances[0].tolist()):
+                if allowed is not None and label not in allowed:
+                    continue
+                result_rows.append(label)
+                result_scores.append(1 - distance)
+                if len(result_rows) == top_k:
+                    break
+            if allowed is not None and len(result_rows) < min(top_k, len(allowed)):
+                return self._brute_force(query, top_k, rows)
+            return result_rows, result_scores
+
+    def count(self):
+        return len(self.row_ids)
+
+
+class LocalIndex:
+    """Index handle exposing the Pinecone Index methods the app calls"""
+
+    def __init__(self, store, name):
+        self._store = store
+        self.name = name
+
+    def _namespace(self, namespace):
+        return self._store.namespace(self.name, namespace or '')
+
+    def upsert(self, vectors, namespace=None, **kwargs):
+        records = []
+        for vector in vectors:
+            if isinstance(vector, dict):
+                # Sparse values are accepted for API compatibility but not scored locally
+                records.append((vector['id'], vector['values'], vector.get('metadata')))
+            else:
+                vector_id, values = vector[0], vector[1]
+                records.append((vector_id, values, vector[2] if len(vector) > 2 else None))
+        return {'upserted_count': self._namespace(namespace).upsert(records)}
+
+    def query(self, vector, top_k=10, namespace=None, include_metadata=False,
+              include_values=False, filter=None, sparse_vector=None, **kwargs):
+        ns = self._namespace(namespace)
+        rows, scores = ns.query(vector, top_k, filter=filter)
+        matches = []
+        with ns.lock:
+            for row, score in zip(rows, scores):
+                if row not in ns.row_ids:
+                    continue
+                matches.append(Match(
+                    ns.row_ids[row],
+                    float(score),
+                    metadata=dict(ns.row_metadata.get(row, {})) if include_metadata else None,
+                    values=ns.matrix[row].tolist() if include_values else None
+                ))
+        return QueryResponse(matches, namespace or '')
+
+    def fetch(self, ids, namespace=None):
+        ns = self._namespace(namespace)
+        with ns.lock:
+            return {
+                vector_id: Match(vector_id, 0.0, dict(ns.row_metadata[ns.id_rows[vector_id]]),
+                                 ns.matrix[ns.id_rows[vector_id]].tolist())
+                for vector_id in ids if vector_id in ns.id_rows
+            }
+
+    def delete(self, ids=None, namespace=None, delete_all=False, filter=None, **kwargs):
+        self._namespace(namespace).delete(ids=ids, delete_all=delete_all, filter=filter)
+        return {}
+
+    def list(self, prefix=None, namespace=None, limit=100):
+        """Yield pages of vector IDs, like the serverless Pinecone list() generator"""
+        ns = self._namespace(namespace)
+        with ns.lock:
+            ids = sorted(vector_id for vector_id in ns.id_rows if not prefix or vector_id.startswith(prefix))
+        for start in range(0, len(ids), limit):
+            yield ids[start:start + limit]
+
+    def describe_index_stats(self, **kwargs):
+        namespaces = {
+            name: NamespaceSummary(ns.count())
+            for name, ns in self._store.namespaces(self.name).items()
+            if ns.count()
+        }
+        return IndexStats(self._store.describe_index(self.name).dimension, namespaces)
+
+
+class LocalVectorStore:
+    """
+    Single-node vector store persisted under a root directory
+
+    Layout: <root>/<index>/index.json and <root>/<index>/<namespace>/
+    Namespaces below hnsw_threshold vectors are searched with a vectorized
+    brute-force top-k; larger ones use an HNSW graph when hnswlib is installed.
+    """
+
+    supports_sparse = False
+    NAME_PATTERN = re.compile(r'^[A-Za-z0-9_-]+$')
+
+    def __init__(self, root, hnsw_threshold=20000):
+        if np is None:
+            raise RuntimeError("numpy is required for the local vector store")
+        self.root = root
+        self.hnsw_threshold = hnsw_threshold
+        self._lock = threading.Lock()
+        self._namespaces = {}
+        os.makedirs(root, exist_ok=True)
+
+    def _index_path(self, name):
+        if not self.NAME_PATTERN.match(name):
+            raise ValueError(f"Invalid index name: {name}")
+        return os.path.join(self.root, name)
+
+    def list_indexes(self):
+        descriptions = []
+        for name in sorted(os.listdir(self.root)):
+            if os.path.exists(os.path.join(self.root, name, 'index.json')):
+                descriptions.append(self.describe_index(name))
+        return descriptions
+
+    def describe_index(self, name):
+        config_path = os.path.join(self._index_path(name), 'index.json')
+        if not os.path.exists(config_path):
+            raise KeyError(f"Index '{name}' not found")
+        with open(config_path) as config_file:
+            config = json.load(config_file)
+        return IndexDescription(name, config['dimension'], config['metric'], f"local://{self._index_path(name)}")
+
+    def create_index(self, name, dimension, metric='cosine'):
+        path = self._index_path(name)
+        if os.path.exists(os.path.join(path, 'index.json')):
+            raise ValueError(f"Index '{name}' already exists")
+        if metric not in ('cosine', 'dotproduct'):
+            raise ValueError(f"Unsupported metric for local store: {metric}")
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, 'index.json'), 'w') as config_file:
+            json.dump({'dimension': dimension, 'metric': metric}, config_file)
+
+    def delete_index(self, name):
+        path = self._index_path(name)
+        with self._lock:
+            for key in [key for key in self._namespaces if key[0] == name]:
+                del self._namespaces[key]
+        shutil.rmtree(path, ignore_errors=True)
+
+    def Index(self, name):
+        self.describe_index(name)
+        return LocalIndex(self, name)
+
+    def namespace(self, index_name, namespace):
+        key = (index_name, namespace)
+        with self._lock:
+            ns = self._namespaces.get(key)
+            if ns is None:
+                description = self.describe_index(index_name)
+                # Plain names map to themselves; anything else (including '') is hex-encoded behind '~'
+                ns_dir = namespace if self.NAME_PATTERN.match(namespace) else '~' + namespace.encode('utf-8').hex()
+                ns = LocalNamespace(
+                    os.path.join(self._index_path(index_name), ns_dir),
+                    description.dimension,
+                    description.metric,
+                    self.hnsw_threshold
+                )
+                self._namespaces[key] = ns
+            return ns
+
+    def namespaces(self, index_name):
+        path = self._index_path(index_name)
+        found = {}
+        for entry in sorted(os.listdir(path)):
+            if not os.path.isdir(os.path.join(path, entry)):
+                continue
+            name = bytes.fromhex(entry[1:]).decode('utf-8') if entry.startswith('~') else entry
+            found[name] = self.namespace(index_name, name)
+        return found
+
+
+def create_vector_store(backend, pinecone_api_key=None, pinecone_region='us-east-1',
+                        local_path=None, hnsw_threshold=20000):
+    """Build the configured backend ('pinecone' or 'local')"""
+    if backend == 'pinecone':
+        return PineconeVectorStore(pinecone_api_key, region=pinecone_region)
+    if backend == 'local':
+        return LocalVectorStore(local_path, hnsw_threshold=hnsw_threshold)
+    raise ValueError(f"Unknown vector store backend: {backend}")
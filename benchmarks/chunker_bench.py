@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Chunker benchmark: backend/chunker.py vs the previous per-call SentenceSplitter
+
+The old chunk_text built a SentenceSplitter and a Document on every call and
+ran the full node parser. This times that against the shared SentenceChunker on
+one large document and on many small ones (typical crawled pages).
+
+Usage:
+    python3 benchmarks/chunker_bench.py [--large-kb 1024] [--small-count 300] [--small-kb 4]
+        [--chunk-size 1000] [--overlap 300] [--repeat 3] [--json results.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'backend'))
+sys.path.insert(0, BENCH_DIR)
+
+import chunker  # noqa: E402
+import fixtures  # noqa: E402
+
+
+def llama_chunks(text, chunk_size, overlap):
+    """The chunk_text implementation this replaced"""
+    from llama_index.core import Document
+    from llama_index.core.node_parser import SentenceSplitter
+    splitter = SentenceSplitter(chunk_size=chunk_size, chunk_overlap=overlap, separator=" ")
+    nodes = splitter.get_nodes_from_documents([Document(text=text)])
+    return [node.text for node in nodes]
+
+
+def shared_chunks(text, chunk_size, overlap):
+    return [chunk['text'] for chunk in chunker.get_chunker(chunk_size, overlap).chunk(text)]
+
+
+def document(kilobytes, seed):
+    # A fixture paragraph is ~0.5-1KB
+    text = '\n\n'.join(fixtures.paragraphs(2 * kilobytes + 1, seed=seed))
+    return text[:kilobytes * 1024]
+
+
+def best_of(repeat, call):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--large-kb', type=int, default=1024)
+    parser.add_argument('--small-count', type=int, default=300)
+    parser.add_argument('--small-kb', type=int, default=4)
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--overlap', type=int, default=300)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', help='Write results to this path')
+    args = parser.parse_args()
+
+    workloads = {
+        'large_document': [document(args.large_kb, seed=1)],
+        'small_documents': [document(args.small_kb, seed=seed) for seed in range(args.small_count)]
+    }
+    implementations = {'llama_sentence_splitter': llama_chunks, 'shared_chunker': shared_chunks}
+
+    # Warm both (imports, tokenizer load) and check they agree before timing
+    for texts in workloads.values():
+        for text in texts[:3]:
+            assert llama_chunks(text, args.chunk_size, args.overlap) == shared_chunks(text, args.chunk_size, args.overlap)
+
+    print("=" * 60)
+    print(f"Chunker benchmark (chunk_size={args.chunk_size}, overlap={args.overlap}, best of {args.repeat})")
+    print("=" * 60)
+    results = {}
+    for workload, texts in workloads.items():
+        results[workload] = {'documents': len(texts), 'bytes': sum(len(text) for text in texts)}
+        for name, implementation in implementations.items():
+            seconds = best_of(args.repeat, lambda: [implementation(text, args.chunk_size, args.overlap) for text in texts])
+            results[workload][name] = seconds
+            print(f"  {workload:<16} {name:<24} {seconds * 1000:9.1f} ms")
+        speedup = results[workload]['llama_sentence_splitter'] / results[workload]['shared_chunker']
+        results[workload]['speedup'] = speedup
+        print(f"  {workload:<16} {'speedup':<24} {speedup:9.2f}x")
+
+    if args.json:
+        with open(args.json, 'w') as handle:
+            json.dump({'suite': 'chunker', 'config': vars(args), 'results': results}, handle, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
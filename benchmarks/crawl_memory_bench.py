@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Crawl frontier memory benchmark: compact CrawlFrontier vs plain Python structures
+
+Queues N discovered URLs on one host, then pops them all, and reports the peak
+traced allocation (tracemalloc) and wall time (slowed down by tracemalloc) for:
+
+  set_deque     visited set of URL strings + deque of (url, depth) - the original crawl_website
+  set_heap      visited set of URL strings + heap of (score, order, url, depth) - the frontier before
+                fingerprints and spilling
+  frontier      crawl_frontier.CrawlFrontier (URL fingerprints + spill-to-disk queue segments)
+
+Usage:
+    python3 benchmarks/crawl_memory_bench.py [--sizes 10000 100000 1000000] [--max-memory 50000]
+        [--json results.json]
+"""
+
+import argparse
+import heapq
+import itertools
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import deque
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'backend'))
+
+import crawl_frontier  # noqa: E402
+
+HOST = 'https://www.example.com'
+
+
+def urls(count):
+    # Realistic lengths (~60-70 chars): a mix of sections, slugs and ids
+    sections = ('blog', 'docs', 'products', 'listing', 'news')
+    for i in range(count):
+        yield f"{HOST}/{sections[i % 5]}/{i // 7}/how-to-index-documents-part-{i}"
+
+
+def run_set_deque(count, max_memory):
+    visited, queue = set(), deque()
+    for url in urls(count):
+        if url not in visited:
+            visited.add(url)
+            queue.append((url, 1))
+    while queue:
+        queue.popleft()
+    return len(visited)
+
+
+def run_set_heap(count, max_memory):
+    visited, heap, order = set(), [], itertools.count()
+    for url in urls(count):
+        if url not in visited:
+            visited.add(url)
+            heapq.heappush(heap, (-crawl_frontier.score_url(url, 1), next(order), url, 1))
+    while heap:
+        heapq.heappop(heap)
+    return len(visited)
+
+
+def run_frontier(count, max_memory):
+    frontier = crawl_frontier.CrawlFrontier(HOST + '/', max_depth=1, max_size=count, max_memory=max_memory)
+    try:
+        for url in urls(count):
+            frontier.add(url, 1)
+        popped = 0
+        while frontier.pop() is not None:
+            popped += 1
+        return popped
+    finally:
+        frontier.close()
+
+
+IMPLEMENTATIONS = {'set_deque': run_set_deque, 'set_heap': run_set_heap, 'frontier': run_frontier}
+
+
+def measure(implementation, count, max_memory):
+    tracemalloc.start()
+    started = time.perf_counter()
+    processed = implementation(count, max_memory)
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert processed == count, (processed, count)
+    return {'peak_bytes': peak, 'bytes_per_url': peak / count, 'seconds': seconds}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--max-memory', type=int, default=50000, help='Queued URLs CrawlFrontier keeps in memory')
+    parser.add_argument('--only', nargs='+', choices=sorted(IMPLEMENTATIONS), help='Run a subset')
+    parser.add_argument('--json', help='Write results to this path')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"Crawl frontier memory (peak traced allocation, max_memory={args.max_memory})")
+    print("=" * 60)
+    results = {}
+    for count in args.sizes:
+        results[count] = {}
+        for name in args.only or IMPLEMENTATIONS:
+            result = measure(IMPLEMENTATIONS[name], count, args.max_memory)
+            results[count][name] = result
+            print(f"  {count:>9,} URLs  {name:<10} {result['peak_bytes'] / 2**20:9.1f} MiB"
+                  f"  {result['bytes_per_url']:7.1f} B/URL  {result['seconds']:7.2f} s")
+
+    if args.json:
+        with open(args.json, 'w') as handle:
+            json.dump({'suite': 'crawl_memory', 'config': vars(args), 'results': results}, handle, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
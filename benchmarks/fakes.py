@@ -0,0 +1,175 @@
+"""
+Local stand-ins for Gemini and Pinecone used by the benchmark suite
+
+FakeGenAI mimics the slice of google.generativeai the backend calls
+(embed_content, GenerativeModel.generate_content) with deterministic
+hashed bag-of-words embeddings. FakeVectorStore wraps the backend's local
+vector store in a temp directory. Both take a FaultInjector so network
+latency and error rates can be dialled in per run.
+"""
+
+import hashlib
+import math
+import os
+import random
+import re
+import shutil
+import tempfile
+import threading
+import time
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+# Every on-disk store the backend keeps under backend/data/ by default
+STATE_PATHS = {
+    'CRAWL_CHECKPOINT_PATH': 'crawls.sqlite',
+    'CRAWL_SYNC_PATH': 'sources.sqlite',
+    'DOCUMENT_HASH_PATH': 'document_hashes.sqlite',
+    'NEAR_DUP_PATH': 'near_duplicates.sqlite',
+    'EXTRACTION_CACHE_PATH': 'extraction_cache.sqlite',
+    'ANALYSIS_CACHE_PATH': 'analysis_cache.sqlite',
+    'CHUNK_STORE_PATH': 'chunks.sqlite',
+    'SPARSE_VOCAB_PATH': 'sparse_vocab.sqlite',
+    'RESUMABLE_UPLOAD_PATH': 'uploads.sqlite',
+    'RESUMABLE_UPLOAD_SPOOL_DIR': 'upload_spool',
+    'LOCAL_VECTOR_STORE_PATH': 'vectors',
+    'TRACE_EXPORT_PATH': 'traces.jsonl'
+}
+
+
+def isolate_state(root):
+    """Points every backend store at root (unless already set) so runs never touch backend/data/"""
+    for name, filename in STATE_PATHS.items():
+        os.environ.setdefault(name, os.path.join(root, filename))
+    return root
+
+
+class InjectedFault(RuntimeError):
+    """Raised by a FaultInjector to simulate an upstream API error"""
+
+
+class FaultInjector:
+    """Adds latency (fixed + jitter) and random failures to fake service calls"""
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, seed=0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.faults = 0
+
+    def __call__(self, operation):
+        with self._lock:
+            self.calls += 1
+            delay_ms = self.latency_ms + (self._random.uniform(0, self.jitter_ms) if self.jitter_ms else 0.0)
+            fail = self.error_rate > 0 and self._random.random() < self.error_rate
+            if fail:
+                self.faults += 1
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000)
+        if fail:
+            raise InjectedFault(f"Injected failure in {operation}")
+
+
+def hashed_embedding(text, dimension=768):
+    """Deterministic unit-length bag-of-words vector - similar texts score higher"""
+    vector = [0.0] * dimension
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        digest = hashlib.blake2b(token.encode(), digest_size=8).digest()
+        bucket = int.from_bytes(digest[:4], 'little') % dimension
+        vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+    norm = math.sqrt(sum(value * value for value in vector))
+    if not norm:
+        vector[0] = norm = 1.0
+    return [value / norm for value in vector]
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+        self.candidates = []
+
+
+class FakeGenerativeModel:
+    def __init__(self, service, model_name):
+        self._service = service
+        self.model_name = model_name
+
+    def generate_content(self, prompt):
+        self._service.injector('generate_content')
+        # Echo a bounded slice of the prompt so response size tracks context size
+        return FakeResponse(f"[{self.model_name}] " + ' '.join(str(prompt).split()[:self._service.answer_words]))
+
+
+class FakeGenAI:
+    """Drop-in for the google.generativeai module object held in app.genai"""
+
+    def __init__(self, injector=None, dimension=768, answer_words=120):
+        self.injector = injector or FaultInjector()
+        self.dimension = dimension
+        self.answer_words = answer_words
+
+    def configure(self, **kwargs):
+        pass
+
+    def embed_content(self, model, content, task_type=None, **kwargs):
+        self.injector('embed_content')
+        if isinstance(content, list):
+            return {'embedding': [hashed_embedding(text, self.dimension) for text in content]}
+        return {'embedding': hashed_embedding(content, self.dimension)}
+
+    def GenerativeModel(self, model_name):
+        return FakeGenerativeModel(self, model_name)
+
+
+class _FaultInjectingIndex:
+    def __init__(self, index, injector):
+        self._index = index
+        self._injector = injector
+
+    def upsert(self, *args, **kwargs):
+        self._injector('upsert')
+        return self._index.upsert(*args, **kwargs)
+
+    def query(self, *args, **kwargs):
+        self._injector('query')
+        return self._index.query(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        self._injector('delete')
+        return self._index.delete(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._index, name)
+
+
+class FakeVectorStore:
+    """Pinecone stand-in: the backend's LocalVectorStore in a throwaway directory plus fault injection"""
+
+    supports_sparse = False
+
+    def __init__(self, injector=None):
+        import vector_store
+        self.injector = injector or FaultInjector()
+        self.root = tempfile.mkdtemp(prefix='kb-bench-vectors-')
+        # Brute force only - keeps results exact and comparable across runs
+        self._store = vector_store.LocalVectorStore(self.root, hnsw_threshold=10 ** 9)
+
+    def list_indexes(self):
+        return self._store.list_indexes()
+
+    def describe_index(self, name):
+        return self._store.describe_index(name)
+
+    def create_index(self, name, dimension, metric='cosine'):
+        return self._store.create_index(name, dimension, metric)
+
+    def delete_index(self, name):
+        return self._store.delete_index(name)
+
+    def Index(self, name):
+        return _FaultInjectingIndex(self._store.Index(name), self.injector)
+
+    def close(self):
+        shutil.rmtree(self.root, ignore_errors=True)
@@ -0,0 +1,193 @@
+"""
+Deterministic benchmark fixtures
+Generates PDF/DOCX/XLSX/TXT documents from a seeded pseudo-text corpus and
+serves a small interlinked HTML site from a local http.server thread, so
+benchmarks never touch the network.
+"""
+
+import io
+import os
+import random
+import tempfile
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+VOCABULARY = (
+    'invoice pricing contract renewal onboarding customer account warehouse shipment '
+    'policy refund warranty support ticket escalation database ingestion pipeline search '
+    'embedding vector latency throughput quarterly revenue forecast region inventory '
+    'supplier compliance audit security access token report dashboard analytics metric '
+    'employee handbook holiday payroll benefit training schedule meeting project roadmap'
+).split()
+FILLER = 'the a of to and in for with on by from is are was that this at as'.split()
+
+
+def paragraphs(count, seed=0, sentences=6):
+    """Seeded pseudo-English paragraphs - same seed, same text"""
+    rng = random.Random(seed)
+    result = []
+    for _ in range(count):
+        parts = []
+        for _ in range(sentences):
+            words = [rng.choice(VOCABULARY if rng.random() < 0.6 else FILLER) for _ in range(rng.randint(8, 20))]
+            parts.append(' '.join(words).capitalize() + '.')
+        result.append(' '.join(parts))
+    return result
+
+
+def make_txt(paragraph_count, seed=1):
+    return '\n\n'.join(paragraphs(paragraph_count, seed)).encode('utf-8')
+
+
+def _pdf_escape(text):
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def make_pdf(paragraph_count, seed=2, lines_per_page=60, line_chars=90):
+    """Minimal multi-page text PDF (Helvetica, one content stream per page) without extra dependencies"""
+    lines = []
+    for paragraph in paragraphs(paragraph_count, seed):
+        words, current = paragraph.split(), ''
+        for word in words:
+            if len(current) + len(word) + 1 > line_chars:
+                lines.append(current)
+                current = word
+            else:
+                current = f"{current} {word}".strip()
+        lines.extend([current, ''])
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+
+    objects = []  # object number = position + 1
+    objects.append(b'<< /Type /Catalog /Pages 2 0 R >>')
+    objects.append(None)  # pages tree, filled in once page object numbers are known
+    objects.append(b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>')
+    page_numbers = []
+    for page_lines in pages:
+        stream = 'BT /F1 10 Tf 12 TL 50 790 Td\n' + ''.join(f"({_pdf_escape(line)}) '\n" for line in page_lines) + 'ET'
+        stream = stream.encode('latin-1')
+        objects.append(b'<< /Length %d >>\nstream\n' % len(stream) + stream + b'\nendstream')
+        content_number = len(objects)
+        objects.append(
+            b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] '
+            b'/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>' % content_number
+        )
+        page_numbers.append(len(objects))
+    kids = ' '.join(f"{number} 0 R" for number in page_numbers).encode()
+    objects[1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (kids, len(page_numbers))
+
+    output = io.BytesIO()
+    output.write(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(output.tell())
+        output.write(b'%d 0 obj\n' % number + body + b'\nendobj\n')
+    xref_offset = output.tell()
+    output.write(b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1))
+    for offset in offsets:
+        output.write(b'%010d 00000 n \n' % offset)
+    output.write(b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref_offset))
+    return output.getvalue()
+
+
+def make_docx(paragraph_count, seed=3):
+    import docx
+    document = docx.Document()
+    document.add_heading('Benchmark Handbook', level=1)
+    for number, paragraph in enumerate(paragraphs(paragraph_count, seed), start=1):
+        if number % 10 == 1:
+            document.add_heading(f"Section {number // 10 + 1}", level=2)
+        document.add_paragraph(paragraph)
+    table = document.add_table(rows=1, cols=3)
+    table.rows[0].cells[0].text, table.rows[0].cells[1].text, table.rows[0].cells[2].text = 'Item', 'Owner', 'Status'
+    rng = random.Random(seed)
+    for row in range(20):
+        cells = table.add_row().cells
+        cells[0].text = f"{rng.choice(VOCABULARY)} {row}"
+        cells[1].text = rng.choice(VOCABULARY)
+        cells[2].text = rng.choice(['open', 'closed', 'pending'])
+    output = io.BytesIO()
+    document.save(output)
+    return output.getvalue()
+
+
+def make_xlsx(rows, seed=4, sheets=2):
+    from openpyxl import Workbook
+    rng = random.Random(seed)
+    workbook = Workbook()
+    for sheet_number in range(sheets):
+        sheet = workbook.active if sheet_number == 0 else workbook.create_sheet()
+        sheet.title = f"Sheet{sheet_number + 1}"
+        sheet.append(['order_id', 'region', 'product', 'quantity', 'unit_price', 'notes'])
+        for row in range(rows):
+            sheet.append([
+                f"ORD-{sheet_number}-{row:06d}",
+                rng.choice(['north', 'south', 'east', 'west']),
+                rng.choice(VOCABULARY),
+                rng.randint(1, 500),
+                round(rng.uniform(1, 999), 2),
+                ' '.join(rng.choice(VOCABULARY) for _ in range(6))
+            ])
+    output = io.BytesIO()
+    workbook.save(output)
+    return output.getvalue()
+
+
+def build_documents(scale=1):
+    """{filename: bytes} for each supported upload type; scale multiplies document size"""
+    return {
+        'handbook.txt': make_txt(40 * scale),
+        'report.pdf': make_pdf(40 * scale),
+        'policies.docx': make_docx(40 * scale),
+        'orders.xlsx': make_xlsx(200 * scale)
+    }
+
+
+def write_site(root, page_count=12, seed=5):
+    """Write an interlinked static site: index.html links to every page, pages link to neighbours"""
+    rng = random.Random(seed)
+    names = [f"page-{number}.html" for number in range(1, page_count + 1)]
+
+    def render(title, body_paragraphs, links):
+        link_html = ''.join(f'<li><a href="{href}">{href}</a></li>' for href in links)
+        body_html = ''.join(f'<p>{text}</p>' for text in body_paragraphs)
+        return (
+            f'<html><head><title>{title}</title></head><body>'
+            f'<nav><ul>{link_html}</ul></nav><main><h1>{title}</h1>{body_html}'
+            f'<img src="/images/{title.lower().replace(" ", "-")}.png" alt="{title} diagram"></main>'
+            f'<footer>Fixture site footer</footer></body></html>'
+        )
+
+    with open(os.path.join(root, 'index.html'), 'w') as handle:
+        handle.write(render('Fixture Home', paragraphs(3, seed), names))
+    for number, name in enumerate(names):
+        neighbours = [names[(number + offset) % page_count] for offset in (1, 2, 5)]
+        with open(os.path.join(root, name), 'w') as handle:
+            handle.write(render(f"Fixture Page {number + 1}", paragraphs(rng.randint(4, 10), seed + number + 1), neighbours))
+    return root
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureSite:
+    """Serves write_site() output on 127.0.0.1 from a background thread"""
+
+    def __init__(self, page_count=12):
+        self.root = write_site(tempfile.mkdtemp(prefix='kb-bench-site-'), page_count)
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), partial(_QuietHandler, directory=self.root))
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fixture-site', daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}/index.html"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
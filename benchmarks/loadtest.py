@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+HTTP load generator and capacity report for the API routes
+
+  run       Drive a running server with a weighted mix of /api/search,
+            /api/chat, /api/upload and /api/ingest-url requests
+  capacity  Start the backend with local stand-ins (benchmarks/loadtest_app.py)
+            under each server mode / worker count, step up concurrency and
+            report the highest throughput that meets the latency SLO
+
+Closed-loop by default (--concurrency clients, each sends its next request when
+the last one returns). With --rate the load is open-loop: Poisson arrivals at
+that many requests/s, with latency measured from each request's scheduled
+start so a saturated server can't hide its queueing delay.
+
+Usage:
+    python3 benchmarks/loadtest.py run --url http://127.0.0.1:5001 --concurrency 16 --duration 30
+    python3 benchmarks/loadtest.py run --url http://127.0.0.1:5001 --rate 50 --mix search=8,chat=2
+    python3 benchmarks/loadtest.py capacity --configs dev gthread:1x4 gthread:2x4 sync:4 \\
+        --steps 1 4 8 16 32 --duration 15 --latency-ms 80 --output capacity.json
+"""
+
+import argparse
+import contextlib
+import datetime
+import itertools
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(BENCH_DIR, '..', 'backend')
+sys.path.insert(0, BENCH_DIR)
+
+import fixtures  # noqa: E402
+
+ROUTES = ('search', 'chat', 'upload', 'ingest-url')
+DEFAULT_MIX = 'search=60,chat=25,upload=10,ingest-url=5'
+QUERIES = [
+    'refund policy for warranty claims',
+    'quarterly revenue forecast by region',
+    'employee holiday and payroll benefits',
+    'database ingestion pipeline latency',
+    'supplier compliance audit report',
+    'customer onboarding support escalation'
+]
+
+
+def parse_mix(spec):
+    weights = {}
+    for part in spec.split(','):
+        route, _, weight = part.partition('=')
+        route = route.strip()
+        if route not in ROUTES:
+            raise argparse.ArgumentTypeError(f"Unknown route '{route}' (choose from {', '.join(ROUTES)})")
+        weights[route] = float(weight or 1)
+    return weights
+
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+class RequestFactory:
+    """Builds the next request for a route; payloads are deterministic per sequence number"""
+
+    def __init__(self, base_url, site_url, project='loadtest', scale=1):
+        self.base_url = base_url.rstrip('/')
+        self.site_url = site_url
+        self.project = project
+        self.documents = list(fixtures.build_documents(scale).items())
+
+    def send(self, session, route, sequence, timeout):
+        query = QUERIES[sequence % len(QUERIES)]
+        if route == 'search':
+            return session.post(f"{self.base_url}/api/search", timeout=timeout,
+                                json={'query': query, 'project': self.project, 'top_k': 10})
+        if route == 'chat':
+            return session.post(f"{self.base_url}/api/chat", timeout=timeout,
+                                json={'query': query, 'project': self.project, 'top_k': 5})
+        if route == 'upload':
+            filename, data = self.documents[sequence % len(self.documents)]
+            return session.post(f"{self.base_url}/api/upload", timeout=timeout,
+                                # The documents repeat; on_duplicate=ingest keeps every upload a full ingestion
+                                files={'file': (filename, data)}, data={'project': self.project, 'on_duplicate': 'ingest'})
+        return session.post(f"{self.base_url}/api/ingest-url", timeout=timeout,
+                            json={'url': self.site_url, 'project': f"{self.project}-crawl",
+                                  'max_pages': 5, 'max_depth': 1})
+
+
+class LoadResult:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {route: [] for route in ROUTES}
+        self.errors = {route: 0 for route in ROUTES}
+        self.statuses = {route: {} for route in ROUTES}
+
+    def record(self, route, latency_ms, status):
+        with self._lock:
+            self.samples[route].append(latency_ms)
+            self.statuses[route][status] = self.statuses[route].get(status, 0) + 1
+            if not isinstance(status, int) or status >= 400:
+                self.errors[route] += 1
+
+    def summary(self, elapsed):
+        routes = {}
+        for route in ROUTES:
+            ordered = sorted(self.samples[route])
+            if not ordered:
+                continue
+            routes[route] = {
+                'requests': len(ordered),
+                'errors': self.errors[route],
+                'error_rate': self.errors[route] / len(ordered),
+                'throughput_rps': (len(ordered) - self.errors[route]) / elapsed,
+                'p50_ms': percentile(ordered, 0.50),
+                'p95_ms': percentile(ordered, 0.95),
+                'p99_ms': percentile(ordered, 0.99),
+                'max_ms': ordered[-1],
+                'statuses': {str(status): count for status, count in self.statuses[route].items()}
+            }
+        everything = sorted(itertools.chain.from_iterable(self.samples.values()))
+        total_errors = sum(self.errors.values())
+        overall = {
+            'requests': len(everything),
+            'errors': total_errors,
+            'error_rate': total_errors / len(everything) if everything else 0.0,
+            'throughput_rps': (len(everything) - total_errors) / elapsed,
+            'p50_ms': percentile(everything, 0.50),
+            'p95_ms': percentile(everything, 0.95),
+            'p99_ms': percentile(everything, 0.99),
+            'elapsed_seconds': elapsed
+        }
+        return {'overall': overall, 'routes': routes}
+
+
+def run_load(factory, mix, duration, concurrency, rate=None, timeout=120, seed=0):
+    """Generate load for `duration` seconds; returns LoadResult.summary()"""
+    result = LoadResult()
+    rng = random.Random(seed)
+    routes, weights = zip(*mix.items())
+    counter = itertools.count()
+    local = threading.local()
+
+    def session():
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        return local.session
+
+    def fire(route, sequence, scheduled):
+        try:
+            status = factory.send(session(), route, sequence, timeout).status_code
+        except requests.RequestException as e:
+            status = type(e).__name__
+        result.record(route, (time.perf_counter() - scheduled) * 1000, status)
+
+    started = time.perf_counter()
+    deadline = started + duration
+    if rate:
+        # Open loop: arrivals never wait for responses; the pool bounds in-flight requests
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            next_arrival = started
+            while next_arrival < deadline:
+                delay = next_arrival - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(fire, rng.choices(routes, weights)[0], next(counter), next_arrival)
+                next_arrival += rng.expovariate(rate)
+    else:
+        def client(client_seed):
+            client_rng = random.Random(client_seed)
+            while time.perf_counter() < deadline:
+                fire(client_rng.choices(routes, weights)[0], next(counter), time.perf_counter())
+
+        threads = [threading.Thread(target=client, args=(seed + number,), daemon=True) for number in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    return result.summary(time.perf_counter() - started)
+
+
+def print_summary(label, summary):
+    overall = summary['overall']
+    print(f"\n{label}: {overall['requests']} requests in {overall['elapsed_seconds']:.1f}s, "
+          f"{overall['throughput_rps']:.1f} ok req/s, error rate {overall['error_rate']:.1%}")
+    print(f"  {'route':<11} {'reqs':>6} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for route, stats in summary['routes'].items():
+        print(f"  {route:<11} {stats['requests']:>6} {stats['throughput_rps']:>8.1f} {stats['p50_ms']:>9.1f} "
+              f"{stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f} {stats['error_rate']:>7.1%}")
+
+
+# ---------------------------------------------------------------------------
+# Capacity report - start the stand-in server per configuration
+# ---------------------------------------------------------------------------
+
+def parse_config(spec):
+    """'dev', 'gthread:2x4' (workers x threads) or 'sync:4' (workers)"""
+    mode, _, shape = spec.partition(':')
+    if mode == 'dev':
+        return {'label': 'dev', 'mode': 'dev', 'workers': 1, 'threads': None}
+    if mode == 'gthread':
+        workers, _, threads = (shape or '2x4').partition('x')
+        return {'label': f"gthread {workers}x{threads or 4}", 'mode': mode,
+                'workers': int(workers), 'threads': int(threads or 4)}
+    if mode == 'sync':
+        return {'label': f"sync {shape or 2}x1", 'mode': mode, 'workers': int(shape or 2), 'threads': 1}
+    raise argparse.ArgumentTypeError(f"Unknown server config '{spec}'")
+
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+class StandInServer:
+    """Runs benchmarks/loadtest_app.py under the dev server or gunicorn in a subprocess"""
+
+    def __init__(self, config, injection, log_dir):
+        self.config = config
+        self.port = free_port()
+        self.log_path = os.path.join(log_dir, f"server-{config['label'].replace(' ', '-')}.log")
+        self.env = dict(os.environ, **{
+            'LOADTEST_LATENCY_MS': str(injection['latency_ms']),
+            'LOADTEST_JITTER_MS': str(injection['jitter_ms']),
+            'LOADTEST_ERROR_RATE': str(injection['error_rate']),
+            'PORT': str(self.port),
+            'WEB_CONCURRENCY': str(config['workers']),
+            'GUNICORN_THREADS': str(config['threads'] or 1),
+            'GUNICORN_MAX_REQUESTS': '0',
+            'LOADTEST_STATE_DIR': os.path.join(log_dir, f"state-{config['label'].replace(' ', '-')}")
+        })
+        self.process = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self):
+        if self.config['mode'] == 'dev':
+            command = [sys.executable, os.path.join(BENCH_DIR, 'loadtest_app.py'), '--port', str(self.port)]
+        else:
+            command = [sys.executable, '-m', 'gunicorn', '-c', os.path.join(BACKEND_DIR, 'gunicorn.conf.py'),
+                       '--chdir', BENCH_DIR, '--bind', f"127.0.0.1:{self.port}",
+                       '--worker-class', self.config['mode'], 'loadtest_app:app']
+        self._log = open(self.log_path, 'w')
+        self.process = subprocess.Popen(command, cwd=BACKEND_DIR, env=self.env, stdout=self._log, stderr=subprocess.STDOUT)
+        deadline = time.time() + 60
+        while time.time() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Server exited during startup - see {self.log_path}")
+            try:
+                if requests.get(f"{self.url}/health", timeout=1).status_code == 200:
+                    return self
+            except requests.RequestException:
+                pass
+            time.sleep(0.2)
+        raise RuntimeError(f"Server did not become healthy - see {self.log_path}")
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self._log.close()
+
+
+def warm_server(factory, workers):
+    """Touch every worker so per-process seeding and lazy imports happen outside measurements"""
+    # No session: a fresh connection per request lets gunicorn hand them to different workers
+    for sequence in range(4 * workers):
+        factory.send(requests, 'search', sequence, timeout=120)
+        factory.send(requests, 'upload', sequence, timeout=120)
+
+
+def capacity(args, mix):
+    injection = {'latency_ms': args.latency_ms, 'jitter_ms': args.jitter_ms, 'error_rate': args.error_rate}
+    log_dir = tempfile.mkdtemp(prefix='kb-loadtest-')
+    report = {
+        'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'cpu_count': os.cpu_count(),
+        'mix': mix,
+        'injection': injection,
+        'slo': {'p95_ms': args.slo_p95_ms, 'max_error_rate': args.max_error_rate},
+        'step_duration_seconds': args.duration,
+        'configs': []
+    }
+    with fixtures.FixtureSite() as site:
+        for config in args.configs:
+            print(f"\n=== {config['label']} ===")
+            entry = {**config, 'steps': [], 'capacity': None}
+            with StandInServer(config, injection, log_dir) as server:
+                factory = RequestFactory(server.url, site.url, scale=args.scale)
+                warm_server(factory, config['workers'])
+                for concurrency in args.steps:
+                    summary = run_load(factory, mix, args.duration, concurrency, timeout=args.timeout, seed=args.seed)
+                    overall = summary['overall']
+                    meets_slo = (overall['error_rate'] <= args.max_error_rate
+                                 and overall['p95_ms'] is not None and overall['p95_ms'] <= args.slo_p95_ms)
+                    entry['steps'].append({'concurrency': concurrency, 'meets_slo': meets_slo, **summary})
+                    print(f"  c={concurrency:<4} {overall['throughput_rps']:8.1f} req/s  p95 {overall['p95_ms'] or 0:9.1f} ms  "
+                          f"errors {overall['error_rate']:6.1%}  {'ok' if meets_slo else 'over SLO'}")
+                    if meets_slo and (entry['capacity'] is None
+                                      or overall['throughput_rps'] > entry['capacity']['throughput_rps']):
+                        entry['capacity'] = {'concurrency': concurrency, 'throughput_rps': overall['throughput_rps'],
+                                             'p95_ms': overall['p95_ms']}
+            report['configs'].append(entry)
+    report['server_logs'] = log_dir
+    return report
+
+
+def capacity_markdown(report):
+    slo = report['slo']
+    lines = [
+        '# Capacity report',
+        '',
+        f"Generated {report['created_at']} on {report['cpu_count']} CPUs. Mix: "
+        + ', '.join(f"{route} {weight:g}" for route, weight in report['mix'].items())
+        + f". Injected upstream latency {report['injection']['latency_ms']:g} ms "
+          f"(+{report['injection']['jitter_ms']:g} ms jitter), error rate {report['injection']['error_rate']:g}.",
+        f"Capacity = highest throughput with p95 <= {slo['p95_ms']:g} ms and error rate <= {slo['max_error_rate']:.1%}.",
+        '',
+        '| Server | Capacity (req/s) | At concurrency | p95 at capacity (ms) | Peak req/s (any step) |',
+        '| --- | --- | --- | --- | --- |'
+    ]
+    for entry in report['configs']:
+        peak = max((step['overall']['throughput_rps'] for step in entry['steps']), default=0.0)
+        cap = entry['capacity']
+        if cap:
+            lines.append(f"| {entry['label']} | {cap['throughput_rps']:.1f} | {cap['concurrency']} | {cap['p95_ms']:.0f} | {peak:.1f} |")
+        else:
+            lines.append(f"| {entry['label']} | - | - | - | {peak:.1f} |")
+    lines += ['', '## Per-step results', '']
+    for entry in report['configs']:
+        lines += [f"### {entry['label']}", '', '| Concurrency | req/s | p50 ms | p95 ms | p99 ms | Errors |',
+                  '| --- | --- | --- | --- | --- | --- |']
+        for step in entry['steps']:
+            overall = step['overall']
+            lines.append(f"| {step['concurrency']} | {overall['throughput_rps']:.1f} | {overall['p50_ms'] or 0:.0f} | "
+                         f"{overall['p95_ms'] or 0:.0f} | {overall['p99_ms'] or 0:.0f} | {overall['error_rate']:.1%} |")
+        lines.append('')
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    def common(sub):
+        sub.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                         help=f"Route weights (default {DEFAULT_MIX})")
+        sub.add_argument('--duration', type=float, default=30, help='Seconds of load (per step for capacity)')
+        sub.add_argument('--timeout', type=float, default=120)
+        sub.add_argument('--scale', type=int, default=1, help='Upload fixture size multiplier')
+        sub.add_argument('--seed', type=int, default=0)
+        sub.add_argument('--output', help='Write JSON results to this file')
+
+    run_parser = subparsers.add_parser('run', help='Load-test a running server')
+    common(run_parser)
+    run_parser.add_argument('--url', default='http://127.0.0.1:5001')
+    run_parser.add_argument('--concurrency', type=int, default=8, help='Clients (closed loop) or max in-flight (open loop)')
+    run_parser.add_argument('--rate', type=float, help='Open-loop arrival rate in requests/s')
+    run_parser.add_argument('--site-url', help='Site for /api/ingest-url (default: local fixture site)')
+    run_parser.add_argument('--project', default='loadtest')
+
+    capacity_parser = subparsers.add_parser('capacity', help='Compare server modes and worker counts')
+    common(capacity_parser)
+    capacity_parser.add_argument('--configs', nargs='+', type=parse_config,
+                                 default=[parse_config(spec) for spec in ('dev', 'gthread:1x4', 'gthread:2x4')],
+                                 help="dev | gthread:WORKERSxTHREADS | sync:WORKERS")
+    capacity_parser.add_argument('--steps', nargs='+', type=int, default=[1, 4, 8, 16, 32], help='Concurrency levels')
+    capacity_parser.add_argument('--latency-ms', type=float, default=0.0, help='Injected Gemini/Pinecone latency')
+    capacity_parser.add_argument('--jitter-ms', type=float, default=0.0)
+    capacity_parser.add_argument('--error-rate', type=float, default=0.0)
+    capacity_parser.add_argument('--slo-p95-ms', type=float, default=2000)
+    capacity_parser.add_argument('--max-error-rate', type=float, default=0.01)
+    capacity_parser.add_argument('--markdown', help='Also write the capacity report as Markdown')
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        with (contextlib.nullcontext() if args.site_url else fixtures.FixtureSite()) as site:
+            factory = RequestFactory(args.url, args.site_url or site.url, project=args.project, scale=args.scale)
+            summary = run_load(factory, args.mix, args.duration, args.concurrency, rate=args.rate,
+                               timeout=args.timeout, seed=args.seed)
+        mode = f"open loop {args.rate:g} req/s" if args.rate else f"closed loop x{args.concurrency}"
+        print_summary(f"{args.url} ({mode})", summary)
+        result = {'url': args.url, 'mix': args.mix, 'concurrency': args.concurrency, 'rate': args.rate, **summary}
+    else:
+        result = capacity(args, args.mix)
+        markdown = capacity_markdown(result)
+        print('\n' + markdown)
+        if args.markdown:
+            with open(args.markdown, 'w') as handle:
+                handle.write(markdown + '\n')
+
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(result, handle, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
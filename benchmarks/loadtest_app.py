@@ -0,0 +1,87 @@
+"""
+WSGI entry point for load tests: the real backend app with local stand-ins
+
+    cd backend && gunicorn -c gunicorn.conf.py --chdir ../benchmarks loadtest_app:app
+    python3 benchmarks/loadtest_app.py --port 5099      # Flask development server
+
+Gemini and Pinecone are replaced with the fakes from fakes.py. Latency and
+errors are injected through LOADTEST_LATENCY_MS, LOADTEST_JITTER_MS and
+LOADTEST_ERROR_RATE. Each server process gets its own vector store, created
+after fork and seeded with the fixture documents so that /api/search and
+/api/chat have something to retrieve.
+"""
+
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+import threading
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'backend'))
+sys.path.insert(0, BENCH_DIR)
+
+os.environ.setdefault('PINECONE_API_KEY', 'loadtest')
+os.environ.setdefault('GEMINI_API_KEY', 'loadtest')
+os.environ.setdefault('TRACE_SAMPLE_RATE', '0')
+os.environ.setdefault('EXTRACTION_CACHE_ENABLED', 'false')  # the upload documents repeat; keep parsing them
+
+# SQLite stores and spool files live in a throwaway directory (loadtest.py passes one per server)
+STATE_DIR = os.getenv('LOADTEST_STATE_DIR')
+if not STATE_DIR:
+    STATE_DIR = tempfile.mkdtemp(prefix='kb-loadtest-state-')
+    atexit.register(shutil.rmtree, STATE_DIR, True)
+
+import fakes  # noqa: E402
+fakes.isolate_state(STATE_DIR)
+import app as backend  # noqa: E402
+import fixtures  # noqa: E402
+
+LATENCY_MS = float(os.getenv('LOADTEST_LATENCY_MS', '0'))
+JITTER_MS = float(os.getenv('LOADTEST_JITTER_MS', '0'))
+ERROR_RATE = float(os.getenv('LOADTEST_ERROR_RATE', '0'))
+SEED_PROJECT = 'loadtest'
+
+
+class PerProcessVectorStore:
+    """Creates (and seeds) a separate FakeVectorStore in each worker process on first use"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._pid = None
+        self._store = None
+
+    def _current(self):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._store = fakes.FakeVectorStore(fakes.FaultInjector(LATENCY_MS, JITTER_MS, seed=os.getpid()))
+                    self._pid = os.getpid()
+                    # Seed without injected errors; the index lookup re-enters through backend.pc
+                    backend.genai.injector.error_rate = 0.0
+                    try:
+                        backend.ingest_text_payload(
+                            fixtures.make_txt(60).decode('utf-8'), 'loadtest-seed.txt', SEED_PROJECT,
+                            backend.DEFAULT_INDEX_NAME, extra_metadata={'content_type': 'text/plain'}
+                        )
+                    finally:
+                        backend.genai.injector.error_rate = ERROR_RATE
+                        self._store.injector.error_rate = ERROR_RATE
+        return self._store
+
+    def __getattr__(self, name):
+        return getattr(self._current(), name)
+
+
+backend.genai = fakes.FakeGenAI(fakes.FaultInjector(LATENCY_MS, JITTER_MS, ERROR_RATE, seed=os.getpid()))
+backend.pc = PerProcessVectorStore()
+app = backend.app
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Run the backend with local stand-ins on the development server')
+    parser.add_argument('--port', type=int, default=5099)
+    args = parser.parse_args()
+    app.run(host='127.0.0.1', port=args.port, debug=False, threaded=True)
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+End-to-end pipeline benchmarks with local stand-ins for Gemini and Pinecone
+
+Drives the Flask app in-process through its test client:
+  upload_txt / upload_pdf / upload_docx / upload_xlsx  POST /api/upload
+  upload_many                                          --bulk-files small files, one POST /api/upload each
+  upload_bulk                                          the same files as one zip to POST /api/upload/bulk
+  crawl                                                POST /api/ingest-url (local fixture site)
+  search                                               POST /api/search
+  chat                                                 POST /api/chat
+
+Embeddings, generation and the vector index are faked (see fakes.py), so runs
+are deterministic and offline. --latency-ms / --jitter-ms / --error-rate inject
+upstream behaviour. Results are written as JSON; --compare flags regressions
+against an earlier run.
+
+Usage:
+    python3 benchmarks/pipeline_bench.py [--iterations 5] [--scale 1] [--only upload_pdf search]
+        [--latency-ms 0] [--jitter-ms 0] [--error-rate 0] [--output results.json]
+        [--compare benchmarks/results/baseline.json] [--threshold 0.2]
+"""
+
+import argparse
+import datetime
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(BENCH_DIR, '..', 'backend')
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+
+UPLOADS = ['upload_txt', 'upload_pdf', 'upload_docx', 'upload_xlsx']
+BENCHMARKS = UPLOADS + ['upload_many', 'upload_bulk', 'crawl', 'search', 'chat']
+QUERIES = [
+    'refund policy for warranty claims',
+    'quarterly revenue forecast by region',
+    'employee holiday and payroll benefits',
+    'database ingestion pipeline latency',
+    'supplier compliance audit report',
+    'customer onboarding support escalation'
+]
+
+
+def load_app(args):
+    # Keys only need to be non-empty - every external call goes to the fakes
+    os.environ.setdefault('PINECONE_API_KEY', 'benchmark')
+    os.environ.setdefault('GEMINI_API_KEY', 'benchmark')
+    os.environ.setdefault('TRACE_SAMPLE_RATE', '0')
+    # Every iteration uploads the same bytes; measure extraction and ingestion, not duplicate or cache lookups
+    os.environ.setdefault('DOCUMENT_DEDUP_ENABLED', 'false')
+    os.environ.setdefault('EXTRACTION_CACHE_ENABLED', 'false')
+    sys.path.insert(0, BACKEND_DIR)
+    sys.path.insert(0, BENCH_DIR)
+    import fakes
+    fakes.isolate_state(args.state_dir)
+    import app
+    app.genai = fakes.FakeGenAI(fakes.FaultInjector(args.latency_ms, args.jitter_ms, args.error_rate, seed=args.seed))
+    app.pc = fakes.FakeVectorStore(fakes.FaultInjector(args.latency_ms, args.jitter_ms, args.error_rate, seed=args.seed + 1))
+    return app
+
+
+def summarize(samples_ms, errors):
+    ordered = sorted(samples_ms)
+    return {
+        'runs': len(ordered),
+        'errors': errors,
+        'mean_ms': statistics.fmean(ordered),
+        'median_ms': statistics.median(ordered),
+        'p95_ms': ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))],
+        'min_ms': ordered[0],
+        'max_ms': ordered[-1],
+        'stdev_ms': statistics.stdev(ordered) if len(ordered) > 1 else 0.0
+    }
+
+
+def run_benchmark(name, call, iterations, warmup):
+    for _ in range(warmup):
+        call(0)
+    samples, errors = [], 0
+    for iteration in range(iterations):
+        started = time.perf_counter()
+        status = call(iteration)
+        samples.append((time.perf_counter() - started) * 1000)
+        if status != 200:
+            errors += 1
+    result = summarize(samples, errors)
+    print(f"  {name:<12} median {result['median_ms']:9.1f} ms  p95 {result['p95_ms']:9.1f} ms  "
+          f"errors {errors}/{iterations}")
+    return result
+
+
+def build_calls(app, client, documents, site_url, args):
+    calls = {}
+    for name in UPLOADS:
+        extension = name.split('_', 1)[1]
+        filename = next(key for key in documents if key.endswith('.' + extension))
+
+        def upload(iteration, filename=filename):
+            response = client.post('/api/upload', data={
+                'file': (io.BytesIO(documents[filename]), filename),
+                'project': 'bench-upload'
+            }, content_type='multipart/form-data')
+            return response.status_code
+        calls[name] = upload
+
+    import fixtures
+    small_files = {
+        f"notes/note-{i:04d}.txt": '\n\n'.join(fixtures.paragraphs(3, seed=1000 + i)).encode('utf-8')
+        for i in range(args.bulk_files)
+    }
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as handle:
+        for filename, data in small_files.items():
+            handle.writestr(filename, data)
+
+    def upload_many(iteration):
+        statuses = [
+            client.post('/api/upload', data={
+                'file': (io.BytesIO(data), os.path.basename(filename)), 'project': 'bench-bulk'
+            }, content_type='multipart/form-data').status_code
+            for filename, data in small_files.items()
+        ]
+        return max(statuses)
+
+    def upload_bulk(iteration):
+        response = client.post('/api/upload/bulk', data={
+            'files': (io.BytesIO(archive.getvalue()), 'notes.zip'), 'project': 'bench-bulk'
+        }, content_type='multipart/form-data')
+        if response.status_code == 200 and response.get_json()['files_ingested'] != len(small_files):
+            return 500
+        return response.status_code
+
+    def crawl(iteration):
+        response = client.post('/api/ingest-url', json={
+            'url': site_url, 'project': 'bench-crawl', 'max_pages': args.crawl_pages, 'max_depth': 2
+        })
+        return response.status_code
+
+    def search(iteration):
+        response = client.post('/api/search', json={
+            'query': QUERIES[iteration % len(QUERIES)], 'project': 'bench-upload', 'top_k': 10
+        })
+        return response.status_code
+
+    def chat(iteration):
+        response = client.post('/api/chat', json={
+            'query': QUERIES[iteration % len(QUERIES)], 'project': 'bench-upload', 'top_k': 5
+        })
+        return response.status_code
+
+    calls.update(upload_many=upload_many, upload_bulk=upload_bulk, crawl=crawl, search=search, chat=chat)
+    return calls
+
+
+def git_revision():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=BENCH_DIR, capture_output=True, text=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=BENCH_DIR,
+                                    capture_output=True, text=True).stdout.strip())
+        return commit or None, dirty
+    except OSError:
+        return None, False
+
+
+def compare(current, baseline_path, threshold):
+    """Print per-benchmark median deltas; returns True when any benchmark regressed beyond threshold"""
+    with open(baseline_path) as handle:
+        baseline = json.load(handle)
+    regressed = False
+    print(f"\nCompared with {baseline_path} ({(baseline.get('commit') or 'unknown')[:10]}):")
+    for name, result in current['benchmarks'].items():
+        previous = baseline.get('benchmarks', {}).get(name)
+        if not previous:
+            continue
+        delta = (result['median_ms'] - previous['median_ms']) / previous['median_ms'] if previous['median_ms'] else 0.0
+        flag = ''
+        if delta > threshold:
+            flag, regressed = '  <-- regression', True
+        print(f"  {name:<12} {previous['median_ms']:9.1f} -> {result['median_ms']:9.1f} ms  ({delta:+.1%}){flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=5)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--scale', type=int, default=1, help='Multiplies fixture document sizes')
+    parser.add_argument('--crawl-pages', type=int, default=10)
+    parser.add_argument('--bulk-files', type=int, default=50, help='Files in the upload_many / upload_bulk workloads')
+    parser.add_argument('--only', nargs='+', choices=BENCHMARKS, help='Run a subset of benchmarks')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Injected latency per fake API call')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='Extra uniform random latency per call')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of fake API calls that fail')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='JSON results path (default: benchmarks/results/pipeline-<commit>-<time>.json)')
+    parser.add_argument('--compare', help='Earlier results JSON to diff medians against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Median slowdown that counts as a regression')
+    args = parser.parse_args()
+
+    import fixtures
+    args.state_dir = tempfile.mkdtemp(prefix='kb-bench-state-')
+    app = load_app(args)
+    client = app.app.test_client()
+    documents = fixtures.build_documents(args.scale)
+    selected = args.only or BENCHMARKS
+
+    print("=" * 60)
+    print(f"Pipeline benchmarks (iterations={args.iterations}, scale={args.scale}, "
+          f"latency={args.latency_ms}ms, error_rate={args.error_rate})")
+    print("=" * 60)
+    results = {}
+    try:
+        with fixtures.FixtureSite(page_count=max(args.crawl_pages, 2)) as site:
+            calls = build_calls(app, client, documents, site.url, args)
+            if any(name in selected for name in ('search', 'chat')) and not any(name in selected for name in UPLOADS):
+                # Search and chat need something indexed
+                for name in UPLOADS:
+                    calls[name](0)
+            for name in BENCHMARKS:
+                if name in selected:
+                    results[name] = run_benchmark(name, calls[name], args.iterations, args.warmup)
+    finally:
+        app.pc.close()
+        shutil.rmtree(args.state_dir, ignore_errors=True)
+
+    commit, dirty = git_revision()
+    report = {
+        'suite': 'pipeline',
+        'commit': commit,
+        'dirty': dirty,
+        'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+        'fixture_bytes': {name: len(data) for name, data in documents.items()},
+        'benchmarks': results,
+        'stages': {
+            labels[0]: {'total_seconds': total, 'count': count}
+            for labels, (total, count) in sorted(app.STAGE_SECONDS.totals().items())
+        },
+        'injected_faults': app.genai.injector.faults + app.pc.injector.faults
+    }
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+        output = os.path.join(RESULTS_DIR, f"pipeline-{(commit or 'nogit')[:10]}-{stamp}.json")
+    with open(output, 'w') as handle:
+        json.dump(report, handle, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare and compare(report, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for backend/app.py
+
+Runs `python -X importtime -c "import app"` in fresh interpreters, reports the
+total import time, the slowest top-level modules, and the time until the
+first /health response via Flask's test client.
+
+Usage:
+    python3 benchmarks/startup_importtime.py [--runs 5] [--top 15] [--json out.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend')
+
+HEALTH_PROBE = """
+import time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+response = app.app.test_client().get('/health')
+assert response.status_code == 200, response.status_code
+ready = time.perf_counter()
+print(f"{imported - started} {ready - started}")
+"""
+
+
+def _env():
+    env = dict(os.environ)
+    # Keys only need to be non-empty; nothing is called at import time
+    env.setdefault('PINECONE_API_KEY', 'benchmark')
+    env.setdefault('GEMINI_API_KEY', 'benchmark')
+    return env
+
+
+def parse_importtime(stderr):
+    """Return [(cumulative_us, self_us, module, depth)] from -X importtime output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((int(cumulative_us), int(self_us), name.strip(), depth))
+    return rows
+
+
+def measure_importtime():
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app'],
+        cwd=BACKEND_DIR, env=_env(), capture_output=True, text=True, check=True
+    )
+    return parse_importtime(result.stderr)
+
+
+def measure_health_ready():
+    result = subprocess.run(
+        [sys.executable, '-c', HEALTH_PROBE],
+        cwd=BACKEND_DIR, env=_env(), capture_output=True, text=True, check=True
+    )
+    imported, ready = result.stdout.strip().splitlines()[-1].split()
+    return float(imported), float(ready)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--json', help='Write results to this file')
+    args = parser.parse_args()
+
+    # First run warms the filesystem cache and .pyc files
+    measure_health_ready()
+
+    import_times, ready_times = [], []
+    for _ in range(args.runs):
+        imported, ready = measure_health_ready()
+        import_times.append(imported)
+        ready_times.append(ready)
+
+    rows = measure_importtime()
+    app_row = next((row for row in rows if row[2] == 'app'), None)
+    # Direct children of app (depth 1) show which dependencies dominate
+    top_level = sorted((row for row in rows if row[3] == 1), reverse=True)[:args.top]
+
+    print("=" * 60)
+    print("Cold start: import app + first /health")
+    print("=" * 60)
+    print(f"import app      median {statistics.median(import_times) * 1000:8.1f} ms  (runs={args.runs})")
+    print(f"/health ready   median {statistics.median(ready_times) * 1000:8.1f} ms")
+    if app_row:
+        print(f"-X importtime   app cumulative {app_row[0] / 1000:8.1f} ms")
+    print(f"\nSlowest imports pulled in by app (top {args.top}):")
+    for cumulative_us, self_us, name, _ in top_level:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+    if args.json:
+        with open(args.json, 'w') as output:
+            json.dump({
+                'import_ms': [t * 1000 for t in import_times],
+                'health_ready_ms': [t * 1000 for t in ready_times],
+                'importtime_app_ms': app_row[0] / 1000 if app_row else None,
+                'top_imports': [{'module': name, 'cumulative_ms': cumulative_us / 1000}
+                                for cumulative_us, _, name, _ in top_level]
+            }, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
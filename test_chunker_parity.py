@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Parity test: backend/chunker.py vs LlamaIndex's SentenceSplitter
+
+Chunks the repo's Markdown docs plus synthetic edge cases with both
+implementations and requires identical chunk text. Offsets must match too,
+except where LlamaIndex's text.find() lands on an earlier duplicate of the
+same chunk text (both offsets then point at identical text). Streaming the
+same text in random pieces must give the same chunks as one call.
+
+Run with pytest or directly: python3 test_chunker_parity.py
+"""
+
+import glob
+import os
+import random
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+
+import chunker  # noqa: E402
+
+CONFIGS = [(1000, 300), (256, 64), (64, 16), (64, 0)]
+
+
+def corpus():
+    texts = {}
+    for path in sorted(glob.glob(os.path.join(ROOT, '*.md'))):
+        with open(path, encoding='utf-8') as handle:
+            texts[os.path.basename(path)] = handle.read()
+    rng = random.Random(7)
+    words = 'invoice pricing refund policy the a of to and in Dr. Mr. e.g. U.S. 3.5 v2.0 (see above)'.split()
+    sentences = [' '.join(rng.choice(words) for _ in range(rng.randint(4, 30))) + rng.choice('.?!;,') for _ in range(3000)]
+    texts['synthetic_paragraphs'] = '\n\n\n'.join(' '.join(sentences[i:i + 12]) for i in range(0, len(sentences), 12))
+    texts['synthetic_newlines'] = '\n'.join(sentences)
+    texts['long_words'] = ' '.join(['supercalifragilisticexpialidocious'] * 2000)
+    texts['no_spaces'] = 'x' * 12000
+    texts['cjk_punctuation'] = '开始。' + '这是一个测试句子，包含中文标点！还有问题吗？' * 300
+    texts['leading_separators'] = '\n\n\n\n\nLeading text. ' + 'Hello world, this is; a test. ' * 500 + '\n\n\n\n'
+    texts['special_tokens'] = 'Text with <|endoftext|> inside. ' * 400
+    texts['short'] = 'A short document that fits in a single chunk.'
+    return texts
+
+
+def reference_chunks(text, chunk_size, overlap):
+    from llama_index.core import Document
+    from llama_index.core.node_parser import SentenceSplitter
+    splitter = SentenceSplitter(chunk_size=chunk_size, chunk_overlap=overlap, separator=" ")
+    nodes = splitter.get_nodes_from_documents([Document(text=text)])
+    return [(node.text, node.start_char_idx, node.end_char_idx) for node in nodes]
+
+
+def check_parity(chunk_size, overlap):
+    engine = chunker.SentenceChunker(chunk_size, overlap)
+    failures = []
+    for name, text in corpus().items():
+        expected = reference_chunks(text, chunk_size, overlap)
+        actual = [(chunk['text'], chunk['start_position'], chunk['end_position']) for chunk in engine.chunk(text)]
+        if [chunk[0] for chunk in expected] != [chunk[0] for chunk in actual]:
+            failures.append(f"{name} ({chunk_size}/{overlap}): chunk text differs")
+            continue
+        for (content, ref_start, ref_end), (_, start, end) in zip(expected, actual):
+            if ref_start is None or (ref_start, ref_end) == (start, end):
+                continue
+            if text[ref_start:ref_end] != content or text[start:end] != content:
+                failures.append(f"{name} ({chunk_size}/{overlap}): offsets {start}-{end} vs {ref_start}-{ref_end}")
+                break
+
+        rng = random.Random(len(text))
+        pieces, position = [], 0
+        while position < len(text):
+            size = rng.randint(1, 4000)
+            pieces.append(text[position:position + size])
+            position += size
+        streamed = [(chunk['text'], chunk['start_position'], chunk['end_position']) for chunk in engine.iter_chunks(pieces)]
+        if streamed != actual:
+            failures.append(f"{name} ({chunk_size}/{overlap}): streamed chunks differ")
+    return failures
+
+
+def test_parity_production_size():
+    assert not check_parity(*CONFIGS[0])
+
+
+def test_parity_small_chunks():
+    failures = []
+    for chunk_size, overlap in CONFIGS[1:]:
+        failures.extend(check_parity(chunk_size, overlap))
+    assert not failures, failures
+
+
+def test_chunk_indexes_are_sequential():
+    chunks = chunker.get_chunker(64, 16).chunk(corpus()['synthetic_paragraphs'])
+    assert [chunk['chunk_index'] for chunk in chunks] == list(range(len(chunks)))
+
+
+if __name__ == "__main__":
+    all_failures = []
+    for chunk_size, overlap in CONFIGS:
+        failures = check_parity(chunk_size, overlap)
+        print(f"{'✅' if not failures else '❌'} chunk_size={chunk_size} overlap={overlap}: {len(failures)} failures")
+        all_failures.extend(failures)
+    for failure in all_failures:
+        print(f"   {failure}")
+    sys.exit(1 if all_failures else 0)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Tests for backend/crawl_sync.py: schedule parsing and source claiming
+
+Interval and cron specs must parse to the documented run times (UTC), cron
+specs that can never fire must be rejected, and the registry must never
+lease more sources at once than max_concurrent.
+
+Run with pytest or directly: python3 test_crawl_sync.py
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+
+import crawl_sync  # noqa: E402
+
+START = datetime(2026, 3, 4, 10, 7, 30, tzinfo=timezone.utc).timestamp()  # a Wednesday
+
+
+def next_runs(spec, count=4, after=START):
+    schedule = crawl_sync.Schedule(spec)
+    runs = []
+    for _ in range(count):
+        after = schedule.next_after(after)
+        runs.append(datetime.fromtimestamp(after, timezone.utc))
+    return runs
+
+
+def test_intervals():
+    for spec, seconds in [('every 6h', 6 * 3600), ('90m', 90 * 60), ('3600', 3600), ('Every 2d', 2 * 86400)]:
+        assert crawl_sync.Schedule(spec).next_after(START) == START + seconds, spec
+
+
+def test_interval_minimum():
+    for spec in ('30s', '59', 'every 0m'):
+        try:
+            crawl_sync.Schedule(spec)
+        except ValueError:
+            continue
+        raise AssertionError(f"{spec!r} should be rejected")
+
+
+def test_cron_fields():
+    assert [run.minute for run in next_runs('*/15 * * * *')] == [15, 30, 45, 0]
+    assert [run.minute for run in next_runs('5/15 * * * *', count=5)] == [20, 35, 50, 5, 20]
+    assert [run.hour for run in next_runs('0 9-17/4 * * *')] == [13, 17, 9, 13]
+    assert [(run.day, run.hour) for run in next_runs('30 2 1,15 * *', count=3)] == [(15, 2), (1, 2), (15, 2)]
+
+
+def test_cron_weekdays_and_aliases():
+    assert [run.weekday() for run in next_runs('0 3 * * 1-5', count=5)] == [3, 4, 0, 1, 2]
+    assert all(run.weekday() == 6 for run in next_runs('0 0 * * 7', count=2))  # 7 is Sunday like 0
+    assert next_runs('@daily', count=1)[0] == datetime(2026, 3, 5, tzinfo=timezone.utc)
+    assert next_runs('@monthly', count=1)[0] == datetime(2026, 4, 1, tzinfo=timezone.utc)
+    # Both day fields restricted: either one matching is enough
+    runs = next_runs('0 0 13 * 5', count=3)
+    assert all(run.day == 13 or run.weekday() == 4 for run in runs)
+
+
+def test_invalid_specs():
+    for spec in ('', 'sometimes', '* * * *', '60 * * * *', '0 24 * * *', '0 0 0 * *', '0 0 * 13 *', '5-1 * * * *', '*/0 * * * *'):
+        try:
+            crawl_sync.Schedule(spec)
+        except ValueError:
+            continue
+        raise AssertionError(f"{spec!r} should be rejected")
+
+
+def test_cron_that_never_fires():
+    for spec in ('0 0 31 2 *', '0 0 30 2 *', '0 0 31 4,6,9,11 *'):
+        schedule = crawl_sync.Schedule(spec)
+        try:
+            schedule.next_after(START)
+        except ValueError:
+            continue
+        raise AssertionError(f"{spec!r} should never fire")
+    assert next_runs('0 0 29 2 *', count=1)[0] == datetime(2028, 2, 29, tzinfo=timezone.utc)
+
+
+def test_claim_respects_capacity():
+    with tempfile.TemporaryDirectory() as directory:
+        registry = crawl_sync.SourceRegistry(os.path.join(directory, 'sources.sqlite'))
+        sources = [
+            registry.register(f"https://example.com/{name}", 'default', 'kb', 'every 1h', {}, run_now=True)
+            for name in ('a', 'b', 'c')
+        ]
+        first, reason = registry.claim(max_concurrent=2)
+        assert reason is None
+        second, reason = registry.claim(max_concurrent=2)
+        assert reason is None and second['source_id'] != first['source_id']
+        assert registry.claim(max_concurrent=2) == (None, 'capacity')
+        assert registry.claim(first['source_id'], max_concurrent=5) == (None, 'running')
+        assert registry.claim('missing', max_concurrent=5) == (None, 'missing')
+
+        registry.finish(first['source_id'], 'ok', {})
+        third, reason = registry.claim(max_concurrent=2)
+        assert reason is None and third['source_id'] not in (first['source_id'], second['source_id'])
+        assert registry.get(first['source_id'])['next_run'] > START
+        assert len({source['source_id'] for source in sources}) == 3
+
+
+if __name__ == "__main__":
+    failures = 0
+    for name, test in sorted(globals().items()):
+        if name.startswith('test_') and callable(test):
+            try:
+                test()
+                print(f"✅ {name}")
+            except AssertionError as e:
+                failures += 1
+                print(f"❌ {name}: {e}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Tests for backend/resumable_upload.py: byte-range edge cases
+
+Retried ranges that overlap received bytes are written once, ranges that
+skip ahead or run past the declared size are refused without moving the
+offset, and a connection that drops mid-range keeps the bytes that arrived
+so the client can resume after them. The final sha256 must always match the
+content.
+
+Run with pytest or directly: python3 test_resumable_upload.py
+"""
+
+import hashlib
+import io
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+
+import resumable_upload  # noqa: E402
+from werkzeug.exceptions import ClientDisconnected  # noqa: E402
+
+CONTENT = bytes(range(256)) * 4096  # 1 MiB, so ranges cross READ_SIZE boundaries
+resumable_upload.READ_SIZE = 64 * 1024
+
+
+class DroppingStream:
+    """Request stream whose client goes away after `limit` bytes"""
+
+    def __init__(self, data, limit, error=ClientDisconnected):
+        self._stream = io.BytesIO(data[:limit])
+        self._error = error
+
+    def read(self, size=-1):
+        block = self._stream.read(size)
+        if not block:
+            raise self._error()
+        return block
+
+
+def new_sessions(directory):
+    return resumable_upload.UploadSessions(
+        os.path.join(directory, 'uploads.sqlite'), os.path.join(directory, 'spool'), max_bytes=len(CONTENT) * 2
+    )
+
+
+def put(sessions, upload_id, start, end):
+    return sessions.write(upload_id, start, io.BytesIO(CONTENT[start:end]), end - start)
+
+
+def assert_complete(sessions, upload_id):
+    session = sessions.get(upload_id)
+    assert session['status'] == 'uploaded' and session['received'] == len(CONTENT)
+    assert session['sha256'] == hashlib.sha256(CONTENT).hexdigest()
+    assert sessions.read(upload_id) == CONTENT
+
+
+def expect(error, call):
+    try:
+        call()
+    except error as e:
+        return e
+    raise AssertionError(f"expected {error.__name__}")
+
+
+def test_overlapping_ranges_are_written_once():
+    with tempfile.TemporaryDirectory() as directory:
+        sessions = new_sessions(directory)
+        upload_id = sessions.create('big.bin', len(CONTENT), 'default', 'kb')['upload_id']
+        assert put(sessions, upload_id, 0, 300000)['received'] == 300000
+        assert put(sessions, upload_id, 0, 300000)['received'] == 300000  # retried part
+        assert put(sessions, upload_id, 250000, 700000)['received'] == 700000
+        put(sessions, upload_id, 699999, len(CONTENT))
+        assert_complete(sessions, upload_id)
+        # Repeating a part of a finished upload is a no-op
+        assert put(sessions, upload_id, 0, 10)['received'] == len(CONTENT)
+
+
+def test_skip_ahead_and_over_size_are_refused():
+    with tempfile.TemporaryDirectory() as directory:
+        sessions = new_sessions(directory)
+        upload_id = sessions.create('big.bin', len(CONTENT), 'default', 'kb')['upload_id']
+        put(sessions, upload_id, 0, 1000)
+        expect(resumable_upload.UploadConflict, lambda: put(sessions, upload_id, 1001, 2000))
+        oversized = CONTENT + b'extra'
+        expect(resumable_upload.UploadError,
+               lambda: sessions.write(upload_id, 1000, io.BytesIO(oversized[1000:]), len(oversized) - 1000))
+        assert sessions.get(upload_id)['received'] == 1000
+        put(sessions, upload_id, 1000, len(CONTENT))
+        assert_complete(sessions, upload_id)
+
+
+def test_disconnect_keeps_received_bytes():
+    for error in (ClientDisconnected, ConnectionResetError):
+        with tempfile.TemporaryDirectory() as directory:
+            sessions = new_sessions(directory)
+            upload_id = sessions.create('big.bin', len(CONTENT), 'default', 'kb')['upload_id']
+            stream = DroppingStream(CONTENT, 400000, error)
+            failure = expect(resumable_upload.UploadError, lambda: sessions.write(upload_id, 0, stream, len(CONTENT)))
+            assert not isinstance(failure, resumable_upload.UploadConflict)
+            assert sessions.get(upload_id)['received'] == 400000
+            put(sessions, upload_id, 400000, len(CONTENT))
+            assert_complete(sessions, upload_id)
+
+
+def test_short_body_and_other_worker_resume():
+    with tempfile.TemporaryDirectory() as directory:
+        sessions = new_sessions(directory)
+        upload_id = sessions.create('big.bin', len(CONTENT), 'default', 'kb')['upload_id']
+        # The body ends before the declared range does
+        expect(resumable_upload.UploadError,
+               lambda: sessions.write(upload_id, 0, io.BytesIO(CONTENT[:123457]), 500000))
+        assert sessions.get(upload_id)['received'] == 123457
+        # A second process has no running hash and rebuilds it from the spool file
+        put(new_sessions(directory), upload_id, 123457, len(CONTENT))
+        assert_complete(sessions, upload_id)
+
+
+if __name__ == "__main__":
+    failures = 0
+    for name, test in sorted(globals().items()):
+        if name.startswith('test_') and callable(test):
+            try:
+                test()
+                print(f"✅ {name}")
+            except AssertionError as e:
+                failures += 1
+                print(f"❌ {name}: {e}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Startup budget test for backend/app.py
+
+Fails if importing the app pulls in heavy SDKs eagerly, or if a cold
+`import app` + first /health takes longer than STARTUP_BUDGET_MS.
+
+Run with pytest or directly: python3 test_startup_budget.py
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+STARTUP_BUDGET_MS = float(os.getenv('STARTUP_BUDGET_MS', '1000'))
+
+HEAVY_MODULES = [
+    'pandas',
+    'llama_index',
+    'tiktoken',
+    'nltk',
+    'PyPDF2',
+    'docx',
+    'bs4',
+    'google.generativeai',
+    'pinecone',
+    'playwright',
+    'cloudscraper',
+    'undetected_chromedriver',
+    'numpy',
+]
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app
+status = app.app.test_client().get('/health').status_code
+elapsed_ms = (time.perf_counter() - started) * 1000
+print(json.dumps({
+    'status': status,
+    'elapsed_ms': elapsed_ms,
+    'loaded': sorted(name for name in sys.modules if name.split('.')[0] in %r or name in %r)
+}))
+"""
+
+
+def run_probe():
+    env = dict(os.environ)
+    env.setdefault('PINECONE_API_KEY', 'startup-test')
+    env.setdefault('GEMINI_API_KEY', 'startup-test')
+    top_level = sorted({name.split('.')[0] for name in HEAVY_MODULES})
+    result = subprocess.run(
+        [sys.executable, '-c', PROBE % (top_level, HEAVY_MODULES)],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_health_ready_without_heavy_imports():
+    run_probe()  # warm .pyc files
+    probe = run_probe()
+    assert probe['status'] == 200
+    loaded = [name for name in probe['loaded'] if any(name == heavy or name.startswith(heavy + '.') for heavy in HEAVY_MODULES)]
+    assert not loaded, f"Heavy modules imported at startup: {loaded}"
+
+
+def test_startup_within_budget():
+    run_probe()
+    probe = run_probe()
+    assert probe['elapsed_ms'] < STARTUP_BUDGET_MS, (
+        f"Cold start took {probe['elapsed_ms']:.0f} ms (budget {STARTUP_BUDGET_MS:.0f} ms)"
+    )
+
+
+if __name__ == "__main__":
+    probe = run_probe()
+    print(f"⏱️  import app + /health: {probe['elapsed_ms']:.0f} ms (budget {STARTUP_BUDGET_MS:.0f} ms)")
+    test_health_ready_without_heavy_imports()
+    test_startup_within_budget()
+    print("✅ Startup budget test passed")